@@ -9,20 +9,438 @@ Code with functions used with D-Wave solvers (Simulator/Hybrid Solver and QPU)
 
 # Import libraries
 from dwave.samplers import SimulatedAnnealingSampler
-from dwave.system import DWaveSampler, EmbeddingComposite
+from dwave.system import DWaveSampler, FixedEmbeddingComposite
 from dwave.system import LeapHybridSampler
-from helpers.variables import get_qubits_per_variable, get_value
+from dwave.system.testing import MockDWaveSampler
+from dwave.embedding import broken_chains, majority_vote
+from minorminer import find_embedding
+from helpers.variables import get_results_from_samples
+from qubo_formulation.qubo_formulation import get_qubo_terms
 from helpers.constants import AnnealerSolution
-from dwave.inspector import show
+from helpers.anytime import get_chunked_responses, get_anytime_info
+from dimod import concatenate, BinaryQuadraticModel
+import numpy as np
+import threading
+import hashlib
+import atexit
+import time
+import json
 import os
 
-# Import information of D-Wave token (it changes for every user)
-with open('dwave_token.txt', 'r') as file:
-    os.environ['DWAVE_API_TOKEN'] = file.read()
+# File with the D-Wave token (it changes for every user), only read when a remote sampler is created
+DWAVE_TOKEN_FILE = "dwave_token.txt"
 
+# Number of reads of the first chunk of the QPU with time budget, where the chain strength is adjusted (the broken
+# chains of one read are not representative)
+CHAIN_STRENGTH_CHUNK_READS = 10
 
-def get_dwave_solution(annealer_solution, total_num_qubits, qubo_matrix, num_reads=500, chain_strength=100,
-                       annealing_time_us=20):
+# Directory of the minor-embedding cache (one JSON file per QUBO graph and QPU topology)
+EMBEDDING_CACHE_DIRECTORY = "embedding_cache"
+
+# Embeddings already loaded or calculated, key is the hash of the QUBO graph and the QPU topology
+embedding_cache = {}
+
+# Functions which create the sampler of each D-Wave solver (called with the sampler configuration, for instance the
+# solver name). They can be replaced by local stand-ins with set_sampler_factory (see use_mock_samplers)
+sampler_factories = {AnnealerSolution.DWAVE_SIM: SimulatedAnnealingSampler,
+                     AnnealerSolution.DWAVE_HYBRID_SOLVER: LeapHybridSampler,
+                     AnnealerSolution.DWAVE_QPU: DWaveSampler}
+
+# Samplers already created (long-lived and reused across calls, with their connection to D-Wave cloud), key is the
+# D-Wave solver and the sampler configuration
+sampler_pool = {}
+sampler_pool_lock = threading.Lock()     # problems may be submitted from several threads (see async_solver)
+
+
+def load_dwave_token(token_file=DWAVE_TOKEN_FILE):
+    """
+    This function loads the D-Wave token from the token file, unless it is already defined in the environment
+    (DWAVE_API_TOKEN)
+    :param token_file: file with the D-Wave token
+    :return: D-Wave token
+    """
+
+    if not os.environ.get('DWAVE_API_TOKEN'):
+        if not os.path.isfile(token_file):
+            raise Exception("D-Wave token file not found : {}".format(token_file))
+        with open(token_file, 'r') as file:
+            os.environ['DWAVE_API_TOKEN'] = file.read().strip()
+
+    return os.environ['DWAVE_API_TOKEN']
+
+
+def get_topology_hash(target_edgelist):
+    """
+    This function returns a canonical hash of the topology of the QPU (working qubits and couplers)
+    :param target_edgelist: list of couplers of the QPU
+    :return: hexadecimal string
+    """
+
+    target_edges = sorted(tuple(sorted(edge)) for edge in target_edgelist)
+
+    return hashlib.sha256(json.dumps(target_edges, separators=(",", ":")).encode()).hexdigest()
+
+
+def get_pooled_sampler(annealer_solution, sampler_config=None):
+    """
+    This function returns the sampler of the D-Wave solver from the sampler pool. The sampler (and its client of D-Wave
+    cloud, solver properties and topology) is created the first time it is requested with a configuration and reused
+    in the next calls. For the QPU, the structure graph (couplers) and its hash are also kept.
+    :param annealer_solution: D-Wave solver (Simulator, Hybrid Solver or QPU)
+    :param sampler_config: dictionary with the configuration of the sampler, for instance {"solver": "Advantage_system4.1"}
+    (by default, the default solver)
+    :return: dictionary with the sampler ("sampler") and, for the QPU, its couplers ("target_edgelist") and the hash of
+    its topology ("topology_hash")
+    """
+
+    sampler_config = {} if sampler_config is None else sampler_config
+    key = (annealer_solution, tuple(sorted(sampler_config.items())))
+
+    with sampler_pool_lock:
+        if key not in sampler_pool:
+            if annealer_solution not in sampler_factories:
+                raise Exception("Annealer Solution not found : {}".format(annealer_solution))
+            # The token is only required by the samplers of D-Wave cloud (not by the simulator or local stand-ins)
+            if sampler_factories[annealer_solution] in (LeapHybridSampler, DWaveSampler):
+                load_dwave_token()
+
+            pooled_sampler = {"sampler": sampler_factories[annealer_solution](**sampler_config)}
+            if annealer_solution == AnnealerSolution.DWAVE_QPU:
+                pooled_sampler["target_edgelist"] = pooled_sampler["sampler"].edgelist
+                pooled_sampler["topology_hash"] = get_topology_hash(pooled_sampler["target_edgelist"])
+            sampler_pool[key] = pooled_sampler
+
+    return sampler_pool[key]
+
+
+def close_sampler_pool():
+    """
+    This function closes the clients of D-Wave cloud of the samplers of the pool and empties the pool
+    """
+
+    for pooled_sampler in sampler_pool.values():
+        client = getattr(pooled_sampler["sampler"], "client", None)
+        if client is not None:
+            client.close()
+    sampler_pool.clear()
+
+
+atexit.register(close_sampler_pool)
+
+
+def set_sampler_factory(annealer_solution, factory):
+    """
+    This function replaces the function which creates the sampler of a D-Wave solver (for instance, by a local
+    stand-in). The samplers of the pool of this solver are discarded.
+    :param annealer_solution: D-Wave solver (Simulator, Hybrid Solver or QPU)
+    :param factory: function (or class) called with the sampler configuration, which returns the sampler
+    """
+
+    sampler_factories[annealer_solution] = factory
+    for key in [key for key in sampler_pool if key[0] == annealer_solution]:
+        del sampler_pool[key]
+
+
+class MockHybridSampler:
+    """
+    This class is a local stand-in of the Hybrid Solver (no access to D-Wave cloud), with the same interface as
+    LeapHybridSampler: one sample is returned, the best one of several reads of D-Wave Simulator.
+    """
+
+    def __init__(self, num_reads=10, **sampler_config):
+        """
+        :param num_reads: number of reads of D-Wave Simulator
+        :param sampler_config: configuration of LeapHybridSampler (not used)
+        """
+        self.num_reads = num_reads
+        self.sampler = SimulatedAnnealingSampler()
+        self.properties = {"category": "hybrid", "supported_problem_types": ["bqm"]}
+
+    def sample_qubo(self, qubo, **parameters):
+        return self.sampler.sample_qubo(qubo, num_reads=self.num_reads).truncate(1)
+
+
+class MockLatencySampler:
+    """
+    This class adds the latency of D-Wave cloud (queue and network) to a local stand-in: each submission waits the
+    latency before it is sampled. The waiting does not use the CPU, as it happens with the remote solvers. The rest of
+    the attributes (properties, structure, etc.) are the ones of the stand-in.
+    """
+
+    def __init__(self, sampler, latency_s):
+        """
+        :param sampler: local stand-in
+        :param latency_s: latency in seconds of each submission
+        """
+        self.sampler = sampler
+        self.latency_s = latency_s
+
+    def __getattr__(self, name):
+        return getattr(self.sampler, name)
+
+    def sample(self, bqm, **parameters):
+        time.sleep(self.latency_s)
+        return self.sampler.sample(bqm, **parameters)
+
+    def sample_qubo(self, qubo, **parameters):
+        time.sleep(self.latency_s)
+        return self.sampler.sample_qubo(qubo, **parameters)
+
+
+def use_mock_samplers(topology_type="pegasus", topology_shape=None, latency_s=0):
+    """
+    This function replaces the remote D-Wave solvers (Hybrid Solver and QPU) by local stand-ins, so that these paths
+    (sampler pool, embedding, chains, asynchronous submission) can be run offline and without D-Wave token
+    :param topology_type: "pegasus" or "chimera" (topology of the QPU stand-in)
+    :param topology_shape: shape of the topology (see get_mock_qpu_sampler)
+    :param latency_s: latency in seconds of each submission to the stand-ins (by default, 0), to simulate the queue of
+    D-Wave cloud
+    """
+
+    def get_hybrid_sampler(**sampler_config):
+        return MockLatencySampler(MockHybridSampler(**sampler_config), latency_s) if latency_s else \
+            MockHybridSampler(**sampler_config)
+
+    def get_qpu_sampler(**sampler_config):
+        qpu_sampler = get_mock_qpu_sampler(topology_type=topology_type, topology_shape=topology_shape)
+        return MockLatencySampler(qpu_sampler, latency_s) if latency_s else qpu_sampler
+
+    set_sampler_factory(AnnealerSolution.DWAVE_HYBRID_SOLVER, get_hybrid_sampler)
+    set_sampler_factory(AnnealerSolution.DWAVE_QPU, get_qpu_sampler)
+
+
+def get_qubo_dict(total_num_qubits, qubo_matrix):
+    """
+    This function converts the QUBO matrix into the dictionary format used by D-Wave solvers, with qubits named q1, q2,
+    etc.
+    :param total_num_qubits: total number of qubits used in QUBO matrix
+    :param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+    :return: dictionary with linear and quadratic terms of the QUBO
+    """
+
+    # The terms to program in the annealer solver are split into 2 groups: linear terms (diagonal terms of QUBO matrix)
+    # and quadratic terms (nonzero off - upper diagonal terms of QUBO matrix)
+    linear, rows, columns, values = get_qubo_terms(qubo_matrix)
+    labels = ["q" + str(i + 1) for i in range(total_num_qubits)]
+
+    # A dictionary is built with linear and quadratic terms
+    qubo = {(labels[i], labels[i]): linear[i] for i in range(total_num_qubits)}
+    qubo.update({(labels[i], labels[j]): value for i, j, value in zip(rows.tolist(), columns.tolist(), values.tolist())})
+
+    return qubo
+
+
+def get_graph_hash(qubo, topology_hash):
+    """
+    This function returns a canonical hash of the graph of the QUBO (qubits and nonzero quadratic terms) and the
+    topology of the QPU, used as key of the embedding cache. QUBO matrices with the same sparsity pattern have the same
+    hash, whatever the values of their coefficients.
+    :param qubo: dictionary with linear and quadratic terms of the QUBO (see get_qubo_dict)
+    :param topology_hash: hash of the topology of the QPU (see get_topology_hash)
+    :return: hexadecimal string
+    """
+
+    nodes = sorted({int(label[1:]) for term in qubo for label in term})
+    edges = sorted(tuple(sorted((int(u[1:]), int(v[1:])))) for (u, v), bias in qubo.items() if u != v and bias != 0)
+
+    graph = json.dumps({"nodes": nodes, "edges": edges, "topology": topology_hash}, separators=(",", ":"))
+
+    return hashlib.sha256(graph.encode()).hexdigest()
+
+
+def get_embedding(qubo, target_edgelist, cache_directory=EMBEDDING_CACHE_DIRECTORY, random_seed=None,
+                  topology_hash=None):
+    """
+    This function returns the minor-embedding of the QUBO graph into the QPU graph. Embeddings are cached in memory and
+    on disk (one JSON file per graph hash), so that minorminer only runs the first time a sparsity pattern is submitted
+    to a QPU.
+    :param qubo: dictionary with linear and quadratic terms of the QUBO (see get_qubo_dict)
+    :param target_edgelist: list of couplers of the QPU
+    :param cache_directory: directory of the embedding cache. If None, embeddings are only cached in memory
+    :param random_seed: seed of minorminer (by default, random)
+    :param topology_hash: hash of the topology of the QPU (by default, it is calculated from target_edgelist)
+    :return: dictionary with the chain of QPU qubits of each qubit of the QUBO
+    """
+
+    if topology_hash is None:
+        topology_hash = get_topology_hash(target_edgelist)
+    graph_hash = get_graph_hash(qubo=qubo, topology_hash=topology_hash)
+    if graph_hash in embedding_cache:
+        return embedding_cache[graph_hash]
+
+    cache_file = None if cache_directory is None else os.path.join(cache_directory, graph_hash + ".json")
+    if cache_file is not None and os.path.isfile(cache_file):
+        with open(cache_file, 'r') as file:
+            embedding = json.load(file)
+    else:
+        source_edgelist = [(u, v) for (u, v), bias in qubo.items() if u != v and bias != 0]
+        embedding = find_embedding(source_edgelist, target_edgelist, random_seed=random_seed)
+        if source_edgelist and not embedding:
+            raise Exception("Embedding not found : {} qubits".format(len({label for term in qubo for label in term})))
+
+        # Qubits without quadratic terms are not embedded by minorminer, a free QPU qubit is assigned to each one
+        used_qubits = {qubit for chain in embedding.values() for qubit in chain}
+        free_qubits = (qubit for qubit in sorted({qubit for edge in target_edgelist for qubit in edge})
+                       if qubit not in used_qubits)
+        for label in sorted({label for term in qubo for label in term} - set(embedding), key=lambda q: int(q[1:])):
+            embedding[label] = [next(free_qubits)]
+        embedding = {label: [int(qubit) for qubit in chain] for label, chain in embedding.items()}
+
+        if cache_file is not None:
+            # The file is written with a temporary name and renamed, so that other processes never read it half written
+            os.makedirs(cache_directory, exist_ok=True)
+            temporary_file = "{}.{}.tmp".format(cache_file, os.getpid())
+            with open(temporary_file, 'w') as file:
+                json.dump(embedding, file)
+            os.replace(temporary_file, cache_file)
+
+    embedding_cache[graph_hash] = embedding
+
+    return embedding
+
+
+def get_mock_qpu_sampler(topology_type="pegasus", topology_shape=None):
+    """
+    This function returns a local stand-in of the QPU (no access to D-Wave cloud) with the same structure (working
+    qubits and couplers of Pegasus or Chimera topology), so that the QPU path (embedding, chains) can be run offline.
+    Samples are calculated classically.
+    :param topology_type: "pegasus" or "chimera"
+    :param topology_shape: shape of the topology, for instance [16] for Pegasus P16 or [16, 16, 4] for Chimera C16 (by
+    default, a small shape)
+    :return: structured sampler with the interface of DWaveSampler
+    """
+
+    return MockDWaveSampler(topology_type=topology_type, topology_shape=topology_shape)
+
+
+def get_chain_strength(qubo, embedding, prefactor=1.414):
+    """
+    This function calculates the chain strength from the statistics of the QUBO coefficients and the embedding. The
+    couplings acting on each chained variable (in Ising format, J = Q / 4) are combined as sqrt(sum(J^2)), which is the
+    typical torque that may break its chain (uniform torque compensation), and the chain strength is the mean torque of
+    the chained variables multiplied by the prefactor.
+    :param qubo: dictionary with linear and quadratic terms of the QUBO (see get_qubo_dict)
+    :param embedding: dictionary with the chain of QPU qubits of each qubit of the QUBO (see get_embedding)
+    :param prefactor: factor applied to the mean torque (by default, 1.414)
+    :return: chain strength (Ising format, as the chain strength parameter of D-Wave composites)
+    """
+
+    squared_couplings = {label: 0.0 for label in embedding}
+    for (u, v), bias in qubo.items():
+        if u != v:
+            squared_couplings[u] += (bias / 4) ** 2
+            squared_couplings[v] += (bias / 4) ** 2
+
+    torques = [np.sqrt(squared_couplings[label]) for label, chain in embedding.items() if len(chain) > 1]
+    if not torques or max(torques) == 0:
+        # Without chains (or without couplings on them) the chain strength has no effect
+        return 1.0
+
+    return float(prefactor * np.mean(torques))
+
+
+def get_chain_break_report(broken, num_occurrences, labels):
+    """
+    This function summarizes the chains broken in the samples returned by the QPU
+    :param broken: boolean NumPy array (samples x variables), True if the chain of the variable is broken in the sample
+    :param num_occurrences: number of occurrences of each sample
+    :param labels: qubits of the QUBO (columns of broken)
+    :return: dictionary with the fraction of broken chains of each sample ("per_sample"), the fraction of reads in which
+    the chain of each variable is broken ("per_variable") and the fraction of broken chains of all the reads ("total")
+    """
+
+    if broken.size == 0:
+        return {"per_sample": np.zeros(len(num_occurrences)), "per_variable": {label: 0.0 for label in labels},
+                "total": 0.0}
+
+    weights = np.asarray(num_occurrences, dtype=float) / np.sum(num_occurrences)
+    per_sample = broken.mean(axis=1)
+
+    return {"per_sample": per_sample, "per_variable": dict(zip(labels, (weights @ broken).tolist())),
+            "total": float(weights @ per_sample)}
+
+
+def get_merged_chain_break_report(reports, num_reads):
+    """
+    This function merges the chain break reports of several submissions to the QPU (for instance, the chunks of reads
+    solved with time budget) into the report of all the reads
+    :param reports: list of chain break reports (see get_chain_break_report)
+    :param num_reads: list with the number of reads of each report
+    :return: dictionary with the fraction of broken chains of each sample (samples of all the reports, in the same
+    order), the fraction of reads in which the chain of each variable is broken and the fraction of broken chains of all
+    the reads (both weighted by the number of reads of each report)
+    """
+
+    if len(reports) == 1:
+        return dict(reports[0])
+
+    weights = np.asarray(num_reads, dtype=float) / np.sum(num_reads)
+    labels = reports[0]["per_variable"].keys()
+
+    return {"per_sample": np.concatenate([report["per_sample"] for report in reports]),
+            "per_variable": {label: float(sum(weight * report["per_variable"][label]
+                                              for weight, report in zip(weights, reports))) for label in labels},
+            "total": float(sum(weight * report["total"] for weight, report in zip(weights, reports)))}
+
+
+def get_aggregated_chain_break_report(report, response, aggregated_response):
+    """
+    This function keys the chain break report of the raw samples of the QPU to the samples of the aggregated response
+    (the occurrences of the same sample are added, but their chains may be broken differently)
+    :param report: chain break report of the raw samples (see get_chain_break_report)
+    :param response: raw response (sample set, samples in the same order as the report)
+    :param aggregated_response: aggregated response (see dimod SampleSet.aggregate)
+    :return: dictionary with the fraction of broken chains of each sample of the aggregated response (mean of its raw
+    samples weighted by their occurrences), the fraction of reads in which the chain of each variable is broken and the
+    fraction of broken chains of all the reads (not changed by the aggregation)
+    """
+
+    columns = [response.variables.index(label) for label in aggregated_response.variables]
+    rows = {sample.tobytes(): row for row, sample in enumerate(np.ascontiguousarray(aggregated_response.record.sample))}
+    indices = [rows[sample.tobytes()] for sample in np.ascontiguousarray(response.record.sample[:, columns])]
+
+    num_occurrences = np.asarray(response.record.num_occurrences, dtype=float)
+    broken_occurrences = np.bincount(indices, weights=num_occurrences * report["per_sample"],
+                                     minlength=len(aggregated_response))
+    per_sample = broken_occurrences / np.bincount(indices, weights=num_occurrences, minlength=len(aggregated_response))
+
+    return {**report, "per_sample": per_sample}
+
+
+def get_embedded_qpu_response(qpu, embedding, qubo, chain_strength, **sample_parameters):
+    """
+    This function samples the QUBO in the QPU with a fixed embedding and records the broken chains of the raw samples,
+    before they are resolved by majority vote
+    :param qpu: structured sampler (DWaveSampler or local stand-in)
+    :param embedding: dictionary with the chain of QPU qubits of each qubit of the QUBO (see get_embedding)
+    :param qubo: dictionary with linear and quadratic terms of the QUBO (see get_qubo_dict)
+    :param chain_strength: chain strength (Ising format)
+    :param sample_parameters: parameters of the QPU (num_reads, annealing_time, etc.)
+    :return: response (not aggregated) and chain break report (see get_chain_break_report)
+    """
+
+    recorded = {}
+
+    def recorded_majority_vote(samples, chains):
+        recorded["broken"] = broken_chains(samples, chains)
+        return majority_vote(samples, chains)
+
+    sampler = FixedEmbeddingComposite(qpu, embedding=embedding)
+    response = sampler.sample_qubo(qubo, chain_strength=chain_strength, chain_break_method=recorded_majority_vote,
+                                   **sample_parameters)
+    # The response is resolved (unembedded) when the QPU returns the samples. Majority vote keeps all the samples in the
+    # same order, so the rows of broken match the rows of the response
+    response.resolve()
+    report = get_chain_break_report(broken=recorded["broken"], num_occurrences=response.record.num_occurrences,
+                                    labels=list(response.variables))
+
+    return response, report
+
+
+def get_dwave_solution(annealer_solution, total_num_qubits, qubo_matrix, num_reads=500, chain_strength=None,
+                       annealing_time_us=20, sampler_config=None, embedding_cache_directory=EMBEDDING_CACHE_DIRECTORY,
+                       chain_break_threshold=0.1, chain_strength_retries=2, chain_strength_factor=1.5,
+                       time_budget_s=None):
     """
     This function receives the QUBO matrix obtained previously and according to the D-Wave solver (Simulator, Hybrid
     Solver and QPU) and set its configuration (QUBO terms, number of reads, chain strength and annealing time in us)
@@ -31,53 +449,117 @@ def get_dwave_solution(annealer_solution, total_num_qubits, qubo_matrix, num_rea
     :param qubo_matrix: QUBO matrix
     :param num_reads: total number of reads (by default, 500) (only for D-Wave Simulator and QPU). For the case of
     Hybrid solver, the number of reads is always 1.
-    :param chain_strength: chain strength parameter (only for D-Wave QPU).
+    :param chain_strength: chain strength parameter (only for D-Wave QPU). By default, it is calculated from the QUBO
+    coefficients and the embedding (see get_chain_strength)
     :param annealing_time_us: annealing time in us of each read.
-    :return: it returns the response in raw provided by D-Wave solver
+    :param sampler_config: dictionary with the configuration of the sampler, for instance the solver name (see
+    get_pooled_sampler). Samplers are reused across calls with the same configuration. Remote solvers can be replaced by
+    local stand-ins with use_mock_samplers
+    :param embedding_cache_directory: directory of the embedding cache (only for D-Wave QPU). If None, embeddings are
+    only cached in memory
+    :param chain_break_threshold: maximum fraction of broken chains (only for D-Wave QPU). If it is exceeded, the QUBO is
+    submitted again with a stronger chain strength
+    :param chain_strength_retries: maximum number of submissions repeated because of broken chains (only for D-Wave QPU)
+    :param chain_strength_factor: factor applied to the chain strength in each repeated submission (only for D-Wave QPU)
+    :param time_budget_s: time budget in seconds (by default, no budget). D-Wave Simulator and QPU solve the reads in
+    chunks until the budget expires (see anytime); the chain strength is only adjusted in the first chunk, of
+    CHAIN_STRENGTH_CHUNK_READS reads, and kept for the next chunks (without retries). For the Hybrid Solver, it is the
+    time limit of the solver (at least the minimum time limit of the problem)
+    :return: it returns the response in raw provided by D-Wave solver (aggregated). For D-Wave QPU, the chain break
+    report of all the reads (see get_merged_chain_break_report; with time budget, the accepted submission of each
+    chunk), keyed to the aggregated samples (see get_aggregated_chain_break_report), and the chain strength of each
+    submission are added to response.info ("chain_breaks"). With time budget, the information of the anytime execution
+    is added to response.info ("anytime")
     """
 
-    # The terms to program in the annealer solver are split into 2 dictionaries: linear and quadratic terms
-
-    # dictionary with linear terms (diagonal terms of QUBO matrix)
-    linear_dict = {}
-    for i in range(total_num_qubits - 1):
-        linear = i + 1
-        linear_dict[("q" + str(linear), "q" + str(linear))] = qubo_matrix[i][i]
-
-    linear_dict[("q" + str(total_num_qubits), "q" + str(total_num_qubits))] = \
-        qubo_matrix[total_num_qubits - 1][total_num_qubits - 1]
-
-    # dictionary with quadratic terms (off - upper diagonal terms of QUBO matrix)
-    quadratic_dict = {}
-
-    for i in range(total_num_qubits - 1):
-        for j in range(i + 1, total_num_qubits):
-            if qubo_matrix[i][j] != 0:
-                qdrt1 = i + 1
-                qdrt2 = j + 1
-                quadratic_dict[("q" + str(qdrt1), "q" + str(qdrt2))] = qubo_matrix[i][j]
-
-    # A dictionary is built with linear and quadratic terms
-    qubo = dict(linear_dict)
-    qubo.update(quadratic_dict)
+    qubo = get_qubo_dict(total_num_qubits=total_num_qubits, qubo_matrix=qubo_matrix)
 
     # Call to the D-Wave solvers (Simulator, Hybrid Solver or QPU) with the applicable parameters
+    # (samplers are taken from the sampler pool, so that they are only created once)
+    pooled_sampler = get_pooled_sampler(annealer_solution=annealer_solution, sampler_config=sampler_config)
+    anytime_info = None
     if annealer_solution == AnnealerSolution.DWAVE_SIM:
-        sampler = SimulatedAnnealingSampler()
-        response = sampler.sample_qubo(qubo, num_reads=num_reads)
+        sampler = pooled_sampler["sampler"]
+        if time_budget_s is None:
+            response = sampler.sample_qubo(qubo, num_reads=num_reads)
+        else:
+            responses, anytime_info = get_chunked_responses(
+                solve_chunk=lambda chunk_reads: sampler.sample_qubo(qubo, num_reads=chunk_reads), num_reads=num_reads,
+                time_budget_s=time_budget_s)
+            response = concatenate(responses)
     elif annealer_solution == AnnealerSolution.DWAVE_HYBRID_SOLVER:
-        sampler = LeapHybridSampler()
-        response = sampler.sample_qubo(qubo)
+        sampler = pooled_sampler["sampler"]
+        if time_budget_s is None:
+            response = sampler.sample_qubo(qubo)
+        else:
+            # The Hybrid Solver is not interrupted, the budget is its time limit (it can not be lower than the minimum
+            # time limit of the problem)
+            time_start = time.perf_counter()
+            time_limit = time_budget_s
+            if hasattr(sampler, "min_time_limit"):
+                time_limit = max(time_limit, sampler.min_time_limit(BinaryQuadraticModel.from_qubo(qubo)))
+            response = sampler.sample_qubo(qubo, time_limit=time_limit)
+            anytime_info = get_anytime_info(partial=False, reads=1, requested_reads=1, chunks=1, time_start=time_start,
+                                            time_budget_s=time_budget_s)
     elif annealer_solution == AnnealerSolution.DWAVE_QPU:
-        sampler = EmbeddingComposite(DWaveSampler())
-        response = sampler.sample_qubo(qubo, num_reads=num_reads, chain_strength=chain_strength,
-                                       annealing_time=annealing_time_us)
+        qpu = pooled_sampler["sampler"]
+        # The embedding is reused for QUBO matrices with the same sparsity pattern (minorminer only runs once)
+        embedding = get_embedding(qubo=qubo, target_edgelist=pooled_sampler["target_edgelist"],
+                                  cache_directory=embedding_cache_directory,
+                                  topology_hash=pooled_sampler["topology_hash"])
+        if chain_strength is None:
+            chain_strength = get_chain_strength(qubo=qubo, embedding=embedding)
+
+        # The QUBO is submitted again with a stronger chain strength while too many chains are broken. With time
+        # budget, the chain strength adjusted in the first chunk is kept for the next chunks (no retries)
+        attempts = []
+        reports = []
+        reports_num_reads = []
+
+        def get_qpu_response(chunk_reads):
+            nonlocal chain_strength
+            retries = chain_strength_retries if not reports else 0
+            for retry in range(retries + 1):
+                qpu_response, report = get_embedded_qpu_response(qpu=qpu, embedding=embedding, qubo=qubo,
+                                                                 chain_strength=chain_strength, num_reads=chunk_reads,
+                                                                 annealing_time=annealing_time_us)
+                attempts.append({"chain_strength": chain_strength, "total": report["total"]})
+                print('Chain strength: {} broken chains: {:.1%}'.format(chain_strength, report["total"]))
+                if report["total"] <= chain_break_threshold or retry == retries:
+                    break
+                chain_strength *= chain_strength_factor
+            reports.append(report)
+            reports_num_reads.append(int(np.sum(qpu_response.record.num_occurrences)))
+            return qpu_response
+
+        if time_budget_s is None:
+            response = get_qpu_response(num_reads)
+        else:
+            responses, anytime_info = get_chunked_responses(
+                solve_chunk=get_qpu_response, num_reads=num_reads, time_budget_s=time_budget_s,
+                first_chunk_reads=min(num_reads, CHAIN_STRENGTH_CHUNK_READS))
+            response = concatenate(responses)
+        report = get_merged_chain_break_report(reports=reports, num_reads=reports_num_reads)
+        report["attempts"] = attempts
         # For the case of D-Wave QPU, it shows the D-Wave Inspector (Web format) after providing the solution
-        show(response)
+        if isinstance(qpu, DWaveSampler):
+            # Imported here, D-Wave Inspector is only loaded when a QPU problem is shown
+            from dwave.inspector import show
+            show(response)
     else:
         raise Exception("Annealer Solution not found : {}".format(annealer_solution))
 
-    response = response.aggregate()
+    aggregated_response = response.aggregate()
+    if annealer_solution == AnnealerSolution.DWAVE_QPU:
+        # The chain break report is computed on the raw samples, it is keyed to the samples of the aggregated response
+        # (also its chain break fraction, which is the one of the first raw sample of each aggregated sample)
+        report = get_aggregated_chain_break_report(report=report, response=response,
+                                                   aggregated_response=aggregated_response)
+        aggregated_response.record.chain_break_fraction[:] = report["per_sample"]
+        aggregated_response.info["chain_breaks"] = report
+    response = aggregated_response
+    if anytime_info is not None:
+        response.info["anytime"] = anytime_info
 
     # Print response (raw)
     print(response)
@@ -89,7 +571,8 @@ def get_dwave_solution(annealer_solution, total_num_qubits, qubo_matrix, num_rea
             variables = [key for key in values if values[key] != 0]
             print('{:4.0f}/{} occurrences: {} energy'.format(num_occurrences, num_reads, variables, energy))
     elif annealer_solution == AnnealerSolution.DWAVE_QPU:
-        for values, energy, num_occurrences, _ in response.data():
+        for values, energy, num_occurrences, _ in response.data(fields=['sample', 'energy', 'num_occurrences',
+                                                                          'chain_break_fraction']):
             variables = [key for key in values if values[key] != 0]
             print('{:4.0f}/{} occurrences: {} energy: {}'.format(num_occurrences, num_reads, variables, energy))
     else:
@@ -98,12 +581,33 @@ def get_dwave_solution(annealer_solution, total_num_qubits, qubo_matrix, num_rea
     return response
 
 
+def get_dwave_samples(response):
+    """
+    This function converts the response (raw) provided by D-Wave solvers (Simulator, Hybrid Solver or QPU) into samples
+    ordered by energy, with the qubit values in the order q1, q2, etc.
+    :param response: response (sample set) provided by D-Wave solver
+    :return: dictionary with the samples (NumPy array with the qubit values), their energies and number of occurrences.
+    For D-Wave QPU, the fraction of broken chains of each sample is added ("chain_break_fraction")
+    """
+
+    record = response.record
+    columns = [response.variables.index(label) for label in sorted(response.variables, key=lambda q: int(q[1:]))]
+    order = np.argsort(record.energy, kind='stable')
+
+    samples_dict = {"samples": np.asarray(record.sample[order][:, columns], dtype=np.int8),
+                    "energies": np.asarray(record.energy[order], dtype=float),
+                    "num_occurrences": np.asarray(record.num_occurrences[order], dtype=int)}
+    if 'chain_break_fraction' in record.dtype.names:
+        samples_dict["chain_break_fraction"] = np.asarray(record.chain_break_fraction[order], dtype=float)
+
+    return samples_dict
+
+
 def process_dwave_results(annealer_solution, list_of_variables, method, response, num_qubits_dict):
     """
     This function processes the response (raw) provided by D-Wave solvers (Simulator, Hybrid Solver or QPU) and rebuilds
     the values of the variables from the qubit values obtained in the response.
-    :param annealer_solution: D-Wave solver used (Simulator, Hybrid Solver or QPU). Depending on the solver, the format
-    of the response changes.
+    :param annealer_solution: D-Wave solver used (Simulator, Hybrid Solver or QPU)
     :param list_of_variables: list of variables (x vector), in symbolic format
     :param method: method used (method 1 or same number of qubits for integer and fractional parts or method 2 or one
     qubit dedicated to the sign and the rest for the absolute value)
@@ -114,60 +618,54 @@ def process_dwave_results(annealer_solution, list_of_variables, method, response
     Example:
     {'result_1': {V1: 3, V2: 1, I_V1: -2, 'occurrences': 73, 'energy': -9.0},
     'result_2': {V1: 3, V2: 1, I_V1: -1, 'occurrences': 23, 'energy': -8.0}, etc
-
+    For D-Wave QPU, the fraction of broken chains of each solution is added ('chain_break_fraction')
     """
 
-    qubit_list_per_variable_dict, number_qubits_used = get_qubits_per_variable(list_of_variables=list_of_variables,
-                                                                               method=method,
-                                                                               num_qubits_dict=num_qubits_dict)
-
-    variable_value_dict = {}
-    result_index = 1
-
-    if annealer_solution == AnnealerSolution.DWAVE_SIM or annealer_solution == AnnealerSolution.DWAVE_HYBRID_SOLVER:
-        # In the case of D-Wave Simulator and Hybrid Solver, the data is returned with this format and order:
-        # Values of qubits, energy and number of occurrences of each solution
-        for raw_values_dict, energy, num_occurrences in response.data():
-            # For each result returned by dwave, calculate the variable values
+    if annealer_solution not in (AnnealerSolution.DWAVE_SIM, AnnealerSolution.DWAVE_HYBRID_SOLVER,
+                                 AnnealerSolution.DWAVE_QPU):
+        raise Exception("Annealer solution not found : {}".format(annealer_solution))
 
-            result_dict = {}
+    return get_results_from_samples(list_of_variables=list_of_variables, method=method,
+                                    samples_dict=get_dwave_samples(response), num_qubits_dict=num_qubits_dict)
 
-            # For each variable, it calls to a function "get_value" which rebuilds the value of the variable. This
-            # function requires the method used (method 1 or 2), raw values dictionary (qubits values), number of qubits
-            # of each variable used (integer and fractional parts) and assignment of qubits per each variable.
-            for variable_index in range(0, len(list_of_variables)):
-                result_dict[list_of_variables[variable_index]] = \
-                    get_value(method, raw_values_dict, num_qubits_dict[list_of_variables[variable_index]],
-                              qubit_list_per_variable_dict[list_of_variables[variable_index]])
 
-            result_dict["occurrences"] = num_occurrences
-            result_dict["energy"] = energy
+def get_dwave_warm_started_sample(qubo_matrix, initial_state, num_reads=10, num_sweeps=100, beta_range=None):
+    """
+    This function solves the QUBO matrix with D-Wave Simulator starting all the reads from the state provided (for
+    instance, the solution of a previous QUBO which shares the same quadratic terms). To keep the reads close to the
+    initial state, annealing starts at low temperature.
+    :param qubo_matrix: QUBO matrix
+    :param initial_state: list/array with the initial value of each qubit (q1, q2, etc.)
+    :param num_reads: total number of reads (by default, 10)
+    :param num_sweeps: number of sweeps of each read (by default, 100)
+    :param beta_range: range of inverse temperatures (hot, cold). By default, it is calculated from the smallest
+    QUBO coefficient, starting 10 times hotter than the final inverse temperature
+    :return: it returns the qubit values (NumPy array) of the minimum energy solution
+    """
 
-            variable_value_dict["result_" + str(result_index)] = result_dict
-            result_index += 1
+    total_num_qubits = len(qubo_matrix)
+    qubo = get_qubo_dict(total_num_qubits=total_num_qubits, qubo_matrix=qubo_matrix)
+    labels = ["q" + str(i + 1) for i in range(total_num_qubits)]
 
-    elif annealer_solution == AnnealerSolution.DWAVE_QPU:
-        # In the case of D-Wave QPU, the data is returned with this format and order:
-        # Values of qubits, energy and number of occurrences, and other parameters (not used) of each solution
-        for raw_values_dict, energy, num_occurrences, _ in response.data():
-            # For each variable, it calls to a function "get_value" which rebuilds the value of the variable. This
-            # function requires the method used (method 1 or 2), raw values dictionary (qubits values), number of qubits
-            # of each variable used (integer and fractional parts) and assignment of qubits per each variable.
+    if beta_range is None:
+        coefficients = np.abs(np.asarray(qubo_matrix, dtype=float))
+        beta_cold = np.log(100) / coefficients[coefficients > 0].min()
+        beta_range = (beta_cold / 10, beta_cold)
 
-            result_dict = {}
+    initial_states = (np.tile(np.asarray(initial_state, dtype=np.int8), (num_reads, 1)), labels)
+    sampler = get_pooled_sampler(annealer_solution=AnnealerSolution.DWAVE_SIM)["sampler"]
+    response = sampler.sample_qubo(qubo, num_reads=num_reads, num_sweeps=num_sweeps, beta_range=beta_range,
+                                   initial_states=initial_states)
 
-            for variable_index in range(0, len(list_of_variables)):
-                result_dict[list_of_variables[variable_index]] = \
-                    get_value(method, raw_values_dict, num_qubits_dict[list_of_variables[variable_index]],
-                              qubit_list_per_variable_dict[list_of_variables[variable_index]])
+    return np.array([response.first.sample[label] for label in labels], dtype=np.int8)
 
-            result_dict["occurrences"] = num_occurrences
-            result_dict["energy"] = energy
 
-            variable_value_dict["result_" + str(result_index)] = result_dict
-            result_index += 1
-    else:
-        raise Exception("Annealer solution not found : {}".format(annealer_solution))
+def get_merged_dwave_response(responses):
+    """
+    This function merges the responses of several executions of D-Wave Simulator (for instance, parts of the reads run
+    in parallel) into one response
+    :param responses: list of responses (sample sets) provided by D-Wave Simulator
+    :return: it returns the merged response (sample set aggregated, the occurrences of the same sample are added)
+    """
 
-    # A dictionary with the results already converted is returned (see format in the description of the function above)
-    return variable_value_dict
+    return concatenate(responses).aggregate()
@@ -10,45 +10,11 @@ Code with functions used with Fujitsu solver (Digital Annealer Simulator)
 # Import libraries
 from dadk.QUBOSolverCPU import *
 from dadk.QUBOSolverDAv2 import *
-from helpers.variables import get_qubits_per_variable, get_value
-from helpers.constants import AnnealerSolution
-
-
-class TemperatureMode:
-	"""
-	This class defines the Temperature Mode parameter (Exponential, Inverse or Inverse Root)
-	"""
-	EXPONENTIAL = 0     # reduce temperature by factor (1-temperature_decay) every temperature_interval steps
-	INVERSE = 1         # reduce temperature by factor (1-temperature_decay*temperature) every temperature_interval steps
-	INVERSE_ROOT = 2    # reduce temperature by factor (1-temperature_decay*temperature^2) every temperature_interval steps
-
-	@staticmethod
-	def get_temperature_mode_str(temperature_mode_int):
-		"""
-		This function returns the temperature mode in string format (provided the mode in integer as parameter)
-		:param temperature_mode_int: temperature mode in integer format (0, 1 or 2)
-		:return: temperature mode in string format
-		"""
-		d = {
-			TemperatureMode.EXPONENTIAL: "EXPONENTIAL",
-			TemperatureMode.INVERSE: "INVERSE",
-			TemperatureMode.INVERSE_ROOT: "INVERSE_ROOT",
-		}
-		return d[temperature_mode_int]
-
-	@staticmethod
-	def get_temperature_mode_int(temperature_mode_str):
-		"""
-		This function returns the temperature mode in integer format (provided the mode in string as parameter)
-		:param temperature_mode_str: temperature mode in string forma
-		:return: temperature mode in integer format
-		"""
-		d = {
-			"EXPONENTIAL": TemperatureMode.EXPONENTIAL,
-			"INVERSE": TemperatureMode.INVERSE,
-			"INVERSE_ROOT": TemperatureMode.INVERSE_ROOT
-		}
-		return d[temperature_mode_str]
+from helpers.variables import get_results_from_samples
+from qubo_formulation.qubo_formulation import get_qubo_terms
+from local_tools.local_tools import get_da_samples, get_merged_da_response
+from helpers.anytime import get_chunked_responses
+from helpers.constants import AnnealerSolution, TemperatureMode
 
 
 class AutoTuningMode:
@@ -136,7 +102,7 @@ class GraphicsDetailMode:
 def get_fujitsu_solution(annealer_solution, total_num_qubits, qubo_matrix, num_reads=125, number_iterations=500,
                          temperature_start=0.01, temperature_end=0.00001, temperature_mode=TemperatureMode.EXPONENTIAL,
                          temperature_interval=1, offset_increase_rate=0.0005, scaling_bit_precision=62,
-                         auto_tuning=AutoTuning.AUTO_SCALING, graphics=GraphicsDetail.ALL):
+                         auto_tuning=AutoTuning.AUTO_SCALING, graphics=GraphicsDetail.ALL, time_budget_s=None):
 	"""
 	This function receives the QUBO matrix obtained previously and according and sets the configuration of Fujitsu
 	Digital Annealer Simulator (QUBO terms, and specific parameters)
@@ -154,26 +120,29 @@ def get_fujitsu_solution(annealer_solution, total_num_qubits, qubo_matrix, num_r
 	:param scaling_bit_precision: scaling bit precision (by default 62)
 	:param auto_tuning: Auto Tuning mode (by default, AUTO_SCALING)
 	:param graphics: Graphics Detail Mode (by default, ALL)
-	:return: it returns the response in raw provided by Fujitsu solver
+	:param time_budget_s: time budget in seconds (by default, no budget). The runs are solved in chunks until the budget
+	expires (see anytime)
+	:return: it returns the response in raw provided by Fujitsu solver. With time budget, the responses of the chunks are
+	merged (DigitalAnnealerSolutionList, see get_merged_da_response, its display_graphs displays the graphs of each
+	chunk) and the information of the anytime execution is added to its information ("anytime")
 	"""
 	my_poly = BinPol()
 
-	# The terms to program in the annealer solver are split into 2: linear and quadratic terms
-
-	# linear terms (diagonal terms of QUBO matrix)
+	# The terms to program in the annealer solver are split into 2: linear terms (diagonal terms of QUBO matrix) and
+	# quadratic terms (nonzero off - upper diagonal terms of QUBO matrix)
+	linear, rows, columns, values = get_qubo_terms(qubo_matrix)
 	for i in range(total_num_qubits):
-		my_poly.set_term(qubo_matrix[i][i], (i,))
+		my_poly.set_term(linear[i], (i,))
+	for i, j, value in zip(rows.tolist(), columns.tolist(), values.tolist()):
+		my_poly.set_term(value, (i, j))
 
-	#  quadratic terms (off - upper diagonal terms of QUBO matrix)
-	for i in range(total_num_qubits - 1):
-		for j in range(i + 1, total_num_qubits):
-			if qubo_matrix[i][j] != 0:
-				my_poly.set_term(qubo_matrix[i][j], (i, j))
+	if annealer_solution != AnnealerSolution.FUJITSU_SIM:
+		raise Exception("Annealer not found : {}".format(annealer_solution))
 
-	if annealer_solution == AnnealerSolution.FUJITSU_SIM:
+	def get_chunk_solution(number_runs):
 		solver = QUBOSolverCPU(
 			number_iterations=number_iterations,  # Total number of iterations per run.
-			number_runs=num_reads,  # Number of stochastically independent runs.
+			number_runs=number_runs,  # Number of stochastically independent runs.
 			temperature_start=temperature_start,  # Start temperature of the annealing process.
 			temperature_end=temperature_end,  # End temperature of the annealing process.
 			temperature_mode=temperature_mode,  # 0, 1, or 2 to define the cooling curve
@@ -184,13 +153,19 @@ def get_fujitsu_solution(annealer_solution, total_num_qubits, qubo_matrix, num_r
 			auto_tuning=auto_tuning,
 			scaling_bit_precision=scaling_bit_precision
 		)
-	else:
-		raise Exception("Annealer not found : {}".format(annealer_solution))
+		chunk_solution_list = solver.minimize(my_poly)
+		# Print Execution time and solutions in raw provided by Fujitsu Digital Annealer Simulator
+		print(KEYWORD_EXECUTION_TIME, chunk_solution_list.solver_times.duration_execution)
+		print(chunk_solution_list)
+		return chunk_solution_list
 
-	solution_list = solver.minimize(my_poly)
-	# Print Execution time and solutions in raw provided by Fujitsu Digital Annealer Simulator
-	print(KEYWORD_EXECUTION_TIME, solution_list.solver_times.duration_execution)
-	print(solution_list)
+	if time_budget_s is None:
+		return get_chunk_solution(num_reads)
+
+	solution_lists, anytime_info = get_chunked_responses(solve_chunk=get_chunk_solution, num_reads=num_reads,
+	                                                     time_budget_s=time_budget_s)
+	solution_list = get_merged_da_response(solution_lists)
+	solution_list.info["anytime"] = anytime_info
 
 	return solution_list
 
@@ -211,37 +186,5 @@ def process_fujitsu_results(list_of_variables, method, response, num_qubits_dict
     'result_2': {V1: 3, V2: 1, I_V1: -1, 'occurrences': 23, 'energy': -8.0}, etc
 	"""
 
-	qubit_list_per_variable_dict, number_qubits_used = get_qubits_per_variable(list_of_variables=list_of_variables,
-	                                                                           method=method,
-	                                                                           num_qubits_dict=num_qubits_dict)
-
-	variable_value_dict = {}
-
-	result_index = 1
-
-	for solution in response.solutions:
-		raw_values_dict = {}
-		for i, qubit_value in zip(range(0, len(solution.configuration)), solution.configuration):
-			raw_values_dict['q' + str(i + 1)] = qubit_value
-		energy = solution.energy
-		num_occurrences = solution.frequency
-
-		result_dict = {}
-
-		for variable_index in range(0, len(list_of_variables)):
-
-			# For each variable, it calls to a function "get_value" which rebuilds the value of the variable. This
-			# function requires the method used (method 1 or 2), raw values dictionary (qubits values), number of qubits
-			# of each variable used (integer and fractional parts) and assignment of qubits per each variable.
-			result_dict[list_of_variables[variable_index]] = \
-				get_value(method, raw_values_dict, num_qubits_dict[list_of_variables[variable_index]],
-				          qubit_list_per_variable_dict[list_of_variables[variable_index]])
-
-		result_dict["occurrences"] = num_occurrences
-		result_dict["energy"] = energy
-
-		variable_value_dict["result_" + str(result_index)] = result_dict
-		result_index += 1
-
-	# A dictionary with the results already converted is returned (see format in the description of the function above)
-	return variable_value_dict
+	return get_results_from_samples(list_of_variables=list_of_variables, method=method,
+	                                samples_dict=get_da_samples(response), num_qubits_dict=num_qubits_dict)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the anytime execution of the solvers with a time budget: the reads are solved in chunks and the solver stops
+when the next chunk does not fit in the remaining time. The responses of the chunks already solved are the best-so-far
+result, which is valid even if not all the reads were solved (partial result).
+
+The first chunk has one read (by default), so that a result is available as soon as possible. The size of the next
+chunks is estimated from the time per read measured in the previous chunks.
+
+Responses solved with a time budget have this information ("anytime", in the information of the response):
+{"partial": True if not all the reads (or iterations) were solved, "reads": number of reads solved, "requested_reads":
+number of reads requested, "chunks": number of chunks, "time": time in seconds, "time_budget_s": time budget}
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import time
+
+# Fraction of the remaining time used to size the next chunk (margin for the variation of the time per read)
+ANYTIME_SAFETY_FACTOR = 0.8
+
+
+def get_anytime_info(partial, reads, requested_reads, chunks, time_start, time_budget_s):
+	"""
+	This function returns the information of the anytime execution of a solver (see format above)
+	:param partial: True if not all the reads (or iterations) were solved
+	:param reads: number of reads solved
+	:param requested_reads: number of reads requested
+	:param chunks: number of chunks
+	:param time_start: start time (time.perf_counter)
+	:param time_budget_s: time budget in seconds
+	:return: dictionary with the information
+	"""
+
+	return {"partial": partial, "reads": reads, "requested_reads": requested_reads, "chunks": chunks,
+	        "time": time.perf_counter() - time_start, "time_budget_s": time_budget_s}
+
+
+def get_chunked_responses(solve_chunk, num_reads, time_budget_s, first_chunk_reads=1):
+	"""
+	This function solves the reads in chunks until all of them are solved or the next chunk does not fit in the time
+	budget. At least one read is always solved.
+	:param solve_chunk: function which solves a chunk (its argument is the number of reads) and returns the response
+	:param num_reads: total number of reads
+	:param time_budget_s: time budget in seconds
+	:param first_chunk_reads: number of reads of the first chunk (by default, 1)
+	:return: list of responses of the chunks and information of the anytime execution (see format above)
+	"""
+
+	time_start = time.perf_counter()
+	deadline = time_start + time_budget_s
+	responses = []
+	reads = 0
+	chunk_reads = first_chunk_reads
+	while reads < num_reads:
+		chunk_reads = min(chunk_reads, num_reads - reads)
+		chunk_start = time.perf_counter()
+		responses.append(solve_chunk(chunk_reads))
+		reads += chunk_reads
+
+		# The next chunk is sized to the remaining time, with the time per read of the last chunk
+		time_per_read = (time.perf_counter() - chunk_start) / chunk_reads
+		remaining_time = deadline - time.perf_counter()
+		if remaining_time < time_per_read:
+			break
+		chunk_reads = max(1, int(ANYTIME_SAFETY_FACTOR * remaining_time / time_per_read)) if time_per_read > 0 \
+			else num_reads - reads
+
+	return responses, get_anytime_info(partial=reads < num_reads, reads=reads, requested_reads=num_reads,
+	                                   chunks=len(responses), time_start=time_start, time_budget_s=time_budget_s)
+
+
+def get_response_info(response):
+	"""
+	This function returns the dictionary with the information of a response of any solver (key "info" of the responses
+	in dictionary format, attribute info of the rest)
+	:param response: response (raw) provided by the solver
+	:return: dictionary with the information (None if the response does not have information)
+	"""
+
+	if isinstance(response, dict):
+		return response.get("info")
+
+	return getattr(response, "info", None)
+
+
+def is_partial_response(response):
+	"""
+	This function returns True if the response is a partial result (the time budget expired before all the reads were
+	solved)
+	:param response: response (raw) provided by the solver
+	:return: True if partial result
+	"""
+
+	info = get_response_info(response)
+
+	return bool(info and info.get("anytime", {}).get("partial", False))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with functions to submit many QUBO problems (for instance, a batch of circuits) concurrently, with asyncio.
+
+Each problem (job) is solved by get_solution in an executor, so that the event loop is not blocked, and its response is
+processed by get_results as soon as it is returned. The number of jobs in flight is limited. By default, the executor
+depends on the solvers (see get_default_executor): asynchronous solvers (D-Wave Hybrid Solver and QPU) spend most of
+the time waiting for the queue of D-Wave cloud, so a pool of threads is enough to overlap them; batches of local
+solvers (CPU bound) are run in a pool of processes.
+
+Each job is a dictionary with the parameters of get_solution and get_results:
+{"annealer_solution": ..., "number_qubits_used": ..., "qubo_matrix": ..., "num_reads": ...,
+"solver_parameters": {"dwave_annealing_time_us": 20, ...} (optional), "x_matrix": ..., "method": ...,
+"num_qubits_dict": ..., "reductions": [...] (optional)}
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from helpers.linear_solver import get_solution, get_results
+from helpers.solver_backends import get_solver_backend
+
+
+def get_job_solution(job):
+	"""
+	This function solves the QUBO problem of one job (it is run in the executor)
+	:param job: job dictionary (see format above)
+	:return: it returns the raw response provided by the annealer solver
+	"""
+
+	return get_solution(annealer_solution=job["annealer_solution"], number_qubits_used=job["number_qubits_used"],
+	                    qubo_matrix=job["qubo_matrix"], num_reads=job["num_reads"],
+	                    **job.get("solver_parameters", {}))
+
+
+async def get_job_results(job, semaphore, executor):
+	"""
+	This coroutine solves one job in the executor, once there is room in the number of jobs in flight, and processes its
+	response with get_results
+	:param job: job dictionary (see format above)
+	:param semaphore: asyncio semaphore which limits the number of jobs in flight
+	:param executor: executor where get_solution is run
+	:return: it returns the dictionary of results of the job (see get_results)
+	"""
+
+	async with semaphore:
+		response = await asyncio.get_running_loop().run_in_executor(executor, get_job_solution, job)
+
+	return get_results(annealer_solution=job["annealer_solution"], x_matrix=job["x_matrix"], method=job["method"],
+	                   response=response, num_qubits_dict=job["num_qubits_dict"], reductions=job.get("reductions"))
+
+
+def get_default_executor(jobs, max_in_flight=8):
+	"""
+	This function returns the default executor of the jobs, according to the capabilities of their solvers (see
+	solver_backends): a pool of threads if any solver is asynchronous (remote, the threads overlap the waits for the
+	queue) and a pool of processes otherwise (CPU bound, threads would not run them in parallel). The pools are not
+	mixed, so that processes are not forked while the threads of the other pool are running
+	:param jobs: list of job dictionaries (see format above)
+	:param max_in_flight: maximum number of jobs solved at the same time
+	:return: it returns the executor (ThreadPoolExecutor or ProcessPoolExecutor)
+	"""
+
+	if any(get_solver_backend(job["annealer_solution"]).asynchronous for job in jobs):
+		return ThreadPoolExecutor(max_workers=max_in_flight)
+
+	return ProcessPoolExecutor(max_workers=min(max_in_flight, os.cpu_count() or 1))
+
+
+def submit_jobs(jobs, executor, max_in_flight=8):
+	"""
+	This function submits the jobs to the running event loop and returns immediately
+	:param jobs: list of job dictionaries (see format above)
+	:param executor: executor where get_solution is run
+	:param max_in_flight: maximum number of jobs solved at the same time
+	:return: list of futures (asyncio tasks), one per job and in the same order, whose result is the dictionary of
+	results of the job (see get_results)
+	"""
+
+	semaphore = asyncio.Semaphore(max_in_flight)
+
+	return [asyncio.ensure_future(get_job_results(job, semaphore, executor)) for job in jobs]
+
+
+async def get_results_as_completed(jobs, max_in_flight=8, executor=None):
+	"""
+	This asynchronous generator submits the jobs and yields their results in the order they are completed
+	:param jobs: list of job dictionaries (see format above)
+	:param max_in_flight: maximum number of jobs solved at the same time
+	:param executor: executor where get_solution is run (by default, it depends on the solvers of the jobs, see
+	get_default_executor)
+	:return: it yields the index of the job in the list and its dictionary of results (see get_results)
+	"""
+
+	own_executor = executor is None
+	if own_executor:
+		executor = get_default_executor(jobs=jobs, max_in_flight=max_in_flight)
+
+	futures = submit_jobs(jobs=jobs, executor=executor, max_in_flight=max_in_flight)
+	index_dict = {future: index for index, future in enumerate(futures)}
+	try:
+		pending = set(futures)
+		while pending:
+			done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+			for future in sorted(done, key=lambda done_future: index_dict[done_future]):
+				yield index_dict[future], future.result()
+	finally:
+		for future in futures:
+			future.cancel()
+		if own_executor:
+			executor.shutdown(wait=False, cancel_futures=True)
+
+
+def solve_jobs(jobs, max_in_flight=8, executor=None):
+	"""
+	This function solves all the jobs concurrently and waits for their results (blocking version of
+	get_results_as_completed)
+	:param jobs: list of job dictionaries (see format above)
+	:param max_in_flight: maximum number of jobs solved at the same time
+	:param executor: executor where get_solution is run (by default, see get_default_executor)
+	:return: list with the dictionary of results of each job (see get_results), in the same order as jobs
+	"""
+
+	async def solve_all_jobs():
+		results = [None] * len(jobs)
+		async for index, data in get_results_as_completed(jobs=jobs, max_in_flight=max_in_flight, executor=executor):
+			results[index] = data
+		return results
+
+	return asyncio.run(solve_all_jobs())
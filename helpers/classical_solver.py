@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the classical solution of the system of linear equations (numeric A and b matrices), used as baseline of the
+annealer solvers (CLASSICAL).
+
+The system is solved with SciPy sparse solvers (direct LU factorization or GMRES). The solution is quantized onto the
+qubits of each variable (same encoding as the QUBO formulation), so that its results have the same format as the
+results of the annealer solvers, and the energy of the quantized solution is the energy of the QUBO.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import time
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from scipy.sparse.linalg import spsolve, gmres
+from helpers.system_reduction import get_numeric_system
+from helpers.constants import ClassicalSolver
+from helpers.variables import get_encoded_qubits, get_results_from_samples
+
+
+# Maximum number of calls to GMRES (ITERATIVE)
+ITERATIVE_MAX_CALLS = 10
+
+
+def get_classical_solution(a_matrix, b_matrix, solver=ClassicalSolver.DIRECT, tolerance=1e-10):
+	"""
+	This function solves the system A x = b with a classical sparse solver
+	:param a_matrix: A matrix (numeric, NumPy or SciPy sparse)
+	:param b_matrix: b matrix (numeric)
+	:param solver: classical solver (DIRECT or ITERATIVE)
+	:param tolerance: relative tolerance of the residual (only for ITERATIVE)
+	:return: it returns the response, a dictionary with the solution ("solution", NumPy array with the exact value of
+	each variable), A and b matrices and information of the solver ("info": solver, time in seconds and residual
+	norm(A x - b))
+	"""
+
+	if issparse(a_matrix):
+		b_matrix = np.asarray(b_matrix, dtype=float).reshape(-1)
+	else:
+		a_matrix, b_matrix = get_numeric_system(a_matrix, b_matrix)
+	a_matrix = csr_matrix(a_matrix)
+
+	time_start = time.perf_counter()
+	if solver == ClassicalSolver.DIRECT:
+		solution = spsolve(a_matrix.tocsc(), b_matrix)
+	elif solver == ClassicalSolver.ITERATIVE:
+		# GMRES is called again from its last solution until the tolerance is reached (the default relative tolerance of
+		# GMRES depends on SciPy version, so only the absolute tolerance is set)
+		target_residual = tolerance * np.linalg.norm(b_matrix)
+		solution = np.zeros(len(b_matrix))
+		for _ in range(ITERATIVE_MAX_CALLS):
+			solution, exit_code = gmres(a_matrix, b_matrix, x0=solution, atol=target_residual,
+			                            restart=a_matrix.shape[0])
+			if exit_code < 0:
+				raise Exception("GMRES failed : {}".format(exit_code))
+			if np.linalg.norm(a_matrix @ solution - b_matrix) <= target_residual:
+				break
+		else:
+			raise Exception("GMRES did not converge : {}".format(np.linalg.norm(a_matrix @ solution - b_matrix)))
+	else:
+		raise Exception("Classical solver not valid : {}".format(solver))
+	solver_time = time.perf_counter() - time_start
+
+	solution = np.atleast_1d(np.asarray(solution, dtype=float))
+	if not np.all(np.isfinite(solution)):
+		raise Exception("A matrix is singular")
+
+	return {"solution": solution, "a_matrix": a_matrix, "b_matrix": b_matrix,
+	        "info": {"solver": solver, "time": solver_time,
+	                 "residual": float(np.linalg.norm(a_matrix @ solution - b_matrix))}}
+
+
+def process_classical_results(list_of_variables, method, response, num_qubits_dict):
+	"""
+	This function quantizes the classical solution onto the qubits of each variable (closest value of the encoding,
+	saturated if it is out of range) and returns it with the format of the results of the annealer solvers. The energy is
+	the energy of the QUBO for the quantized solution: norm(A x - b)^2 - norm(b)^2.
+	:param list_of_variables: list of variables (x vector), in symbolic format
+	:param method: method used (method 1 or same number of qubits for integer and fractional parts or method 2 or one
+	qubit dedicated to the sign and the rest for the absolute value)
+	:param response: response returned by get_classical_solution
+	:param num_qubits_dict: information of number of qubits used for integer/fractional part of each variable.
+	:return: it returns a dictionary with the quantized solution (only one result):
+	Example:
+	{'result_1': {V1: 3, V2: 1, I_V1: -2, 'occurrences': 1, 'energy': -9.0}}
+	"""
+
+	qubit_values = get_encoded_qubits(list_of_variables=list_of_variables, method=method,
+	                                  num_qubits_dict=num_qubits_dict, values=response["solution"])
+	data = get_results_from_samples(list_of_variables=list_of_variables, method=method,
+	                                samples_dict={"samples": qubit_values[np.newaxis, :], "energies": [0.0],
+	                                              "num_occurrences": [1]},
+	                                num_qubits_dict=num_qubits_dict)
+
+	quantized_values = np.array([data["result_1"][variable] for variable in list_of_variables])
+	residual = response["a_matrix"] @ quantized_values - response["b_matrix"]
+	data["result_1"]["energy"] = float(residual @ residual - response["b_matrix"] @ response["b_matrix"])
+
+	return data
+
+
+def get_error_wrt_classical_solution(data_dict, classical_response, list_of_variables, solver_time=None):
+	"""
+	This function compares the result of an annealer solver with the classical solution (exact, not quantized)
+	:param data_dict: result with the format returned by function get_results (for instance, data["result_1"])
+	:param classical_response: response returned by get_classical_solution
+	:param list_of_variables: list of variables (x vector), in symbolic format
+	:param solver_time: time in seconds of the annealer solver (optional)
+	:return: it returns a dictionary with the absolute error of each variable ("absolute_error", obtained value - exact
+	value), the maximum absolute error ("max_absolute_error"), the residual norm(A x - b) of the result ("residual")
+	and, if solver_time is provided, the ratio between the time of the annealer solver and the classical solver
+	("time_ratio")
+	"""
+
+	values = np.array([data_dict[variable] for variable in list_of_variables], dtype=float)
+	errors = values - classical_response["solution"]
+
+	comparison = {"absolute_error": dict(zip(list_of_variables, errors.tolist())),
+	              "max_absolute_error": float(np.max(np.abs(errors))),
+	              "residual": float(np.linalg.norm(classical_response["a_matrix"] @ values -
+	                                               classical_response["b_matrix"]))}
+	if solver_time is not None:
+		comparison["time_ratio"] = solver_time / max(classical_response["info"]["time"], 1e-9)
+
+	return comparison
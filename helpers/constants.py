@@ -118,8 +118,86 @@ class AnnealerSolution:
 	"""
 	This class defines the constants used to select the Annealer Solver:
 	Available at the time of this work: D-Wave Simulator, Hybrid Solver and QPU, Fujitsu Digital Annealer Simulator
+	Local solvers (only NumPy/SciPy): simulated annealing, parallel tempering, tabu search, exact solver (small QUBO
+	problems, up to 32 qubits) and Digital Annealer algorithm (same parameters as FUJITSU_SIM)
+	Decomposition of large QUBO problems in subproblems solved by any of the solvers above (by default, exact solver or
+	simulated annealing)
+	Classical solution of the system of linear equations (not annealing), quantized onto the qubits, used as baseline
+	Portfolio of several of the solvers above racing on the same problem (the first one which reaches the target wins)
 	"""
 	DWAVE_SIM = "DWAVE_SIM"
 	DWAVE_HYBRID_SOLVER = "DWAVE_HYBRID_SOLVER"
 	DWAVE_QPU = "DWAVE_QPU"
 	FUJITSU_SIM = "FUJITSU_SIM"
+	LOCAL_SA = "LOCAL_SA"
+	LOCAL_PT = "LOCAL_PT"
+	LOCAL_TABU = "LOCAL_TABU"
+	LOCAL_EXACT = "LOCAL_EXACT"
+	LOCAL_DA = "LOCAL_DA"
+	DECOMPOSITION = "DECOMPOSITION"
+	CLASSICAL = "CLASSICAL"
+	PORTFOLIO = "PORTFOLIO"
+
+
+class ClassicalSolver:
+	"""
+	This class defines the constants used to select the classical solver of CLASSICAL annealer solution: Direct (sparse
+	LU factorization) or iterative (GMRES)
+	"""
+	DIRECT = "DIRECT"
+	ITERATIVE = "ITERATIVE"
+
+
+class TemperatureMode:
+	"""
+	This class defines the Temperature Mode parameter (Exponential, Inverse or Inverse Root)
+	"""
+	EXPONENTIAL = 0     # reduce temperature by factor (1-temperature_decay) every temperature_interval steps
+	INVERSE = 1         # reduce temperature by factor (1-temperature_decay*temperature) every temperature_interval steps
+	INVERSE_ROOT = 2    # reduce temperature by factor (1-temperature_decay*temperature^2) every temperature_interval steps
+
+	@staticmethod
+	def get_temperature_mode_str(temperature_mode_int):
+		"""
+		This function returns the temperature mode in string format (provided the mode in integer as parameter)
+		:param temperature_mode_int: temperature mode in integer format (0, 1 or 2)
+		:return: temperature mode in string format
+		"""
+		d = {
+			TemperatureMode.EXPONENTIAL: "EXPONENTIAL",
+			TemperatureMode.INVERSE: "INVERSE",
+			TemperatureMode.INVERSE_ROOT: "INVERSE_ROOT",
+		}
+		return d[temperature_mode_int]
+
+	@staticmethod
+	def get_temperature_mode_int(temperature_mode_str):
+		"""
+		This function returns the temperature mode in integer format (provided the mode in string as parameter)
+		:param temperature_mode_str: temperature mode in string forma
+		:return: temperature mode in integer format
+		"""
+		d = {
+			"EXPONENTIAL": TemperatureMode.EXPONENTIAL,
+			"INVERSE": TemperatureMode.INVERSE,
+			"INVERSE_ROOT": TemperatureMode.INVERSE_ROOT
+		}
+		return d[temperature_mode_str]
+
+
+class TransientMethod:
+	"""
+	This class defines the integration methods (companion models of capacitors and inductors) of transient analysis
+	"""
+	BACKWARD_EULER = "BACKWARD_EULER"   # first order, Geq = C/h and Req = L/h
+	TRAPEZOIDAL = "TRAPEZOIDAL"         # second order, Geq = 2C/h and Req = 2L/h
+
+
+class ReductionType:
+	"""
+	This class defines the types of reduction of the system of linear equations applied before QUBO formulation. The
+	eliminated variables are restored after processing the results of the annealer solver.
+	"""
+	KRON = "KRON"   # Variables eliminated by Schur complement (Kron reduction) and recovered by back substitution
+	PRESOLVE = "PRESOLVE"   # Variables fixed to a constant (or to another variable plus a constant) by one equation
+	REORDER = "REORDER"     # Variables reordered (reverse Cuthill-McKee) to get a banded QUBO matrix, none eliminated
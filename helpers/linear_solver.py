@@ -8,69 +8,280 @@ Code with upper level functions, independent of selected annealer solver
 """
 
 # Import Libraries
-from fujitsu_tools import fujitsu_tools
-from dwave_tools import dwave_tools
-from helpers.constants import AnnealerSolution
-from sympy import *
+from helpers.solver_backends import get_solver_backend, check_solver_parameters
+from helpers.system_reduction import restore_reduced_variables
+from helpers.variables import get_results_from_samples
+from helpers.anytime import get_chunked_responses, get_anytime_info, get_response_info
 from math import ceil
-import matplotlib.pyplot as plt
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from scipy.sparse import issparse, csr_matrix
 
 
-def get_solution(annealer_solution, number_qubits_used, qubo_matrix, num_reads,
-                 dwave_chain_strength=None,
-                 dwave_annealing_time_us=None,
-                 fujitsu_number_iterations=None, fujitsu_temperature_start=None, fujitsu_temperature_end=None,
-                 fujitsu_temperature_mode=None, fujitsu_temperature_interval=None, fujitsu_offset_increase_rate=None,
-                 fujitsu_scaling_bit_precision=None, fujitsu_auto_tuning=None, fujitsu_graphics=None):
+def get_solution(annealer_solution, number_qubits_used, qubo_matrix, num_reads, num_workers=None, **solver_parameters):
 	"""
-	This is an upper level function which abstracts the selected annealer solver. All the parameters are provided
-	(initialized to None) and the specific parameters for the selected annealer solver shall be passed.
-	:param annealer_solution: annealer solver (DWAVE_SIM, DWAVE_HYBRID_SOLVER, DWAVE_QPU, FUJITSU_SIM)
+	This is an upper level function which abstracts the selected annealer solver (see solver_backends). The specific
+	parameters of all the solvers can be provided, each solver only uses its own ones (parameters which are None are
+	not used, the default value of the solver is applied).
+	:param annealer_solution: annealer solver (DWAVE_SIM, DWAVE_HYBRID_SOLVER, DWAVE_QPU, FUJITSU_SIM, LOCAL_SA,
+	LOCAL_PT, LOCAL_TABU, LOCAL_EXACT, LOCAL_DA, DECOMPOSITION, CLASSICAL, PORTFOLIO or any registered solver)
 	:param number_qubits_used: number of qubits for integer and fractional parts of each variable (for all solvers)
-	:param qubo_matrix: qubo matrix (for all solvers)
-	:param num_reads: number of reads (for all solvers, although not required for DWAVE Hybrid Solver)
-	:param dwave_chain_strength: chain strength for DWAVE_QPU
-	:param dwave_annealing_time_us: annealing time for DWAVE_QPU
-	:param fujitsu_number_iterations: Number of Iterations (only for FUJITSU_SIM)
-	:param fujitsu_temperature_start: start temperature (only for FUJITSU_SIM)
-	:param fujitsu_temperature_end: end temperature (only for FUJITSU_SIM)
-	:param fujitsu_temperature_mode: temperature mode (only for FUJITSU_SIM)
-	:param fujitsu_temperature_interval: temperature interval (only for FUJITSU_SIM)
-	:param fujitsu_offset_increase_rate: offset increase rate (only for FUJITSU_SIM)
-	:param fujitsu_scaling_bit_precision: scaling bit precision (only for FUJITSU_SIM)
-	:param fujitsu_auto_tuning: auto tuning mode (only for FUJITSU_SIM)
-	:param fujitsu_graphics: graphics detail mode (only for FUJITSU_SIM)
+	:param qubo_matrix: qubo matrix, NumPy or SciPy sparse (for all solvers except CLASSICAL, which solves A and b
+	matrices)
+	:param num_reads: number of reads (for all solvers, although not required for DWAVE Hybrid Solver). For LOCAL_EXACT,
+	number of lowest energy states returned
+	:param num_workers: if greater than 1, reads are split across this number of processes and the responses are merged
+	(only for solvers with batch reads: DWAVE_SIM, LOCAL_SA, LOCAL_PT, LOCAL_TABU and LOCAL_DA)
+	:param solver_parameters: specific parameters of the solvers:
+	- dwave_chain_strength: chain strength for DWAVE_QPU (by default, calculated from the QUBO coefficients and the
+	embedding)
+	- dwave_annealing_time_us: annealing time for DWAVE_QPU
+	- dwave_sampler_config: configuration of the D-Wave sampler, for instance the solver name (DWAVE_SIM,
+	DWAVE_HYBRID_SOLVER and DWAVE_QPU). Samplers are reused across calls with the same configuration
+	- fujitsu_number_iterations, fujitsu_temperature_start, fujitsu_temperature_end, fujitsu_temperature_mode,
+	fujitsu_temperature_interval, fujitsu_offset_increase_rate: parameters of FUJITSU_SIM and LOCAL_DA
+	- fujitsu_scaling_bit_precision, fujitsu_auto_tuning, fujitsu_graphics: parameters of FUJITSU_SIM
+	- local_num_sweeps: number of sweeps of each read (LOCAL_SA and LOCAL_PT)
+	- local_beta_range: range of inverse temperatures (hot, cold) (LOCAL_SA and LOCAL_PT)
+	- local_seed: seed of the random generator (LOCAL_SA, LOCAL_PT, LOCAL_TABU, LOCAL_DA and DECOMPOSITION)
+	- local_num_replicas: number of replicas of the temperature ladder (LOCAL_PT)
+	- local_num_iterations, local_tabu_tenure, local_num_restarts: iterations of each restart, number of iterations a
+	flipped qubit is tabu and number of restarts (LOCAL_TABU)
+	- local_max_workers: number of processes used to enumerate the states (LOCAL_EXACT)
+	- decomposition_sub_solution: annealer solver of the subproblems (DECOMPOSITION). The specific parameters of this
+	solver are the ones passed to this function. By default, exact solver (small subproblems) or simulated annealing
+	- decomposition_sub_num_reads, decomposition_subproblem_size, decomposition_qubit_blocks,
+	decomposition_max_iterations, decomposition_num_workers: number of reads and maximum number of qubits of each
+	subproblem, blocks of qubits kept in the same subproblem (for instance, the qubits of each variable), maximum number
+	of iterations and number of processes to solve the subproblems (DECOMPOSITION)
+	- a_matrix, b_matrix: A matrix (numeric, NumPy or SciPy sparse) and b matrix (numeric) of the system (CLASSICAL).
+	b_matrix is also used by PORTFOLIO
+	- classical_solver_type: classical solver, DIRECT or ITERATIVE (CLASSICAL). By default, DIRECT
+	- time_budget_s: time budget in seconds (all the solvers). The reads are solved in chunks until the budget expires
+	and the best-so-far result is returned; the response is flagged as partial if not all the reads were solved (see
+	anytime and is_partial_response). D-Wave Hybrid Solver uses it as its time limit and CLASSICAL ignores it. For
+	PORTFOLIO, it is the time budget of the race: members with random reads solve the problem in rounds until the budget
+	expires (by default, one round per member)
+	- portfolio_members: solvers which race on the problem, each one an annealer solution or a dictionary with the
+	annealer solution, its number of reads and its specific parameters (PORTFOLIO, see portfolio_solver). The response
+	includes the statistics of each member ("stats")
+	- portfolio_target_residual: the race is over when a member reaches this residual norm(A x - b), obtained from the
+	energy and b_matrix (PORTFOLIO). By default, no target
 	:return: it returns the raw response provided by the annealer solver.
 	"""
 
+	backend = get_solver_backend(annealer_solution)
+	check_solver_parameters(solver_parameters)
+
+	if num_workers is not None and num_workers > 1:
+		return get_parallel_solution(annealer_solution=annealer_solution, number_qubits_used=number_qubits_used,
+		                             qubo_matrix=qubo_matrix, num_reads=num_reads, num_workers=num_workers,
+		                             **solver_parameters)
+
+	time_budget_s = solver_parameters.get("time_budget_s")
+	if time_budget_s is not None and "time_budget_s" not in backend.parameters and backend.batch_reads:
+		return get_anytime_solution(backend=backend, number_qubits_used=number_qubits_used, qubo_matrix=qubo_matrix,
+		                            num_reads=num_reads, time_budget_s=time_budget_s,
+		                            solver_parameters={name: value for name, value in solver_parameters.items()
+		                                               if name != "time_budget_s"})
+
 	# Annealer solver function is called with its specific parameters, according to selected solver
-	if annealer_solution == AnnealerSolution.FUJITSU_SIM:
-		response = fujitsu_tools.get_fujitsu_solution(annealer_solution=annealer_solution,
-		                                              total_num_qubits=number_qubits_used, qubo_matrix=qubo_matrix,
-		                                              num_reads=num_reads, number_iterations=fujitsu_number_iterations,
-		                                              temperature_start=fujitsu_temperature_start,
-		                                              temperature_end=fujitsu_temperature_end,
-		                                              temperature_mode=fujitsu_temperature_mode,
-		                                              temperature_interval=fujitsu_temperature_interval,
-		                                              offset_increase_rate=fujitsu_offset_increase_rate,
-		                                              scaling_bit_precision=fujitsu_scaling_bit_precision,
-		                                              auto_tuning=fujitsu_auto_tuning,
-		                                              graphics=fujitsu_graphics)
-
-	elif annealer_solution == AnnealerSolution.DWAVE_SIM or annealer_solution == AnnealerSolution.DWAVE_HYBRID_SOLVER or \
-			annealer_solution == AnnealerSolution.DWAVE_QPU:
-
-		response = dwave_tools.get_dwave_solution(annealer_solution=annealer_solution,
-		                                          total_num_qubits=number_qubits_used, qubo_matrix=qubo_matrix,
-		                                          num_reads=num_reads, chain_strength=dwave_chain_strength,
-		                                          annealing_time_us=dwave_annealing_time_us)
+	return backend.solve(number_qubits_used=number_qubits_used, qubo_matrix=qubo_matrix, num_reads=num_reads,
+	                     solver_parameters=solver_parameters)
+
+
+def get_anytime_solution(backend, number_qubits_used, qubo_matrix, num_reads, time_budget_s, solver_parameters):
+	"""
+	This function solves the reads in chunks until the time budget expires, for solvers without their own time budget
+	(solvers with batch reads), and merges the responses of the chunks (best-so-far result)
+	:param backend: SolverBackend
+	:param number_qubits_used: number of qubits
+	:param qubo_matrix: QUBO matrix
+	:param num_reads: total number of reads
+	:param time_budget_s: time budget in seconds
+	:param solver_parameters: specific parameters of the annealer solver (see get_solution)
+	:return: it returns the merged response, with the information of the anytime execution ("anytime", see anytime)
+	"""
+
+	# Each chunk of a solver with seeds has its own seed, derived from local_seed
+	seed_sequence = np.random.SeedSequence(solver_parameters.get("local_seed"))
+
+	def solve_chunk(chunk_reads):
+		parameters = dict(solver_parameters)
+		if backend.seeds:
+			parameters["local_seed"] = int(seed_sequence.spawn(1)[0].generate_state(1)[0])
+		return backend.solve(number_qubits_used=number_qubits_used, qubo_matrix=qubo_matrix, num_reads=chunk_reads,
+		                     solver_parameters=parameters)
+
+	responses, anytime_info = get_chunked_responses(solve_chunk=solve_chunk, num_reads=num_reads,
+	                                                time_budget_s=time_budget_s)
+	response = backend.merge_responses(responses)
+	get_response_info(response)["anytime"] = anytime_info
+
+	return response
+
+
+def get_samples(annealer_solution, response):
+	"""
+	This function converts the response of any annealer solver into samples (qubit values q1, q2, etc. of each sample,
+	energies and number of occurrences, ordered by energy)
+	:param annealer_solution: annealer solver
+	:param response: response (raw) provided by the annealer solver
+	:return: dictionary with the samples (see get_results_from_samples)
+	"""
+
+	backend = get_solver_backend(annealer_solution)
+	if backend.get_samples is None:
+		raise Exception("Annealer Solution does not return samples : {}".format(annealer_solution))
+
+	return backend.get_samples(response)
+
+
+def get_lowest_energy_qubits(annealer_solution, response, number_qubits_used):
+	"""
+	This function returns the qubit values of the minimum energy solution of the response of any annealer solver
+	:param annealer_solution: annealer solver
+	:param response: response (raw) provided by the annealer solver
+	:param number_qubits_used: number of qubits
+	:return: NumPy array with the qubit values (q1, q2, etc.)
+	"""
+
+	samples_dict = get_samples(annealer_solution, response)
+	qubit_values = samples_dict["samples"][int(np.argmin(samples_dict["energies"]))]
+
+	return np.asarray(qubit_values[:number_qubits_used], dtype=np.int8)
+
+
+class SubproblemSampler:
+	"""
+	This class solves the subproblems of the decomposition solver (DECOMPOSITION) with any annealer solver. Objects of
+	this class are picklable, so that subproblems can be solved in parallel.
+	"""
+
+	def __init__(self, annealer_solution, num_reads, **solver_parameters):
+		"""
+		:param annealer_solution: annealer solver of the subproblems
+		:param num_reads: number of reads of each subproblem
+		:param solver_parameters: specific parameters of the annealer solver (see get_solution)
+		"""
+		self.annealer_solution = annealer_solution
+		self.num_reads = num_reads
+		self.solver_parameters = solver_parameters
+
+	def __call__(self, qubo_matrix, initial_state):
+		number_qubits_used = len(qubo_matrix)
+		response = get_solution(annealer_solution=self.annealer_solution, number_qubits_used=number_qubits_used,
+		                        qubo_matrix=qubo_matrix, num_reads=self.num_reads, **self.solver_parameters)
+		qubit_values = get_lowest_energy_qubits(self.annealer_solution, response, number_qubits_used)
+
+		# The current state is kept if the solver does not improve it
+		initial_state = np.asarray(initial_state, dtype=np.int8)
+		if initial_state @ qubo_matrix @ initial_state <= qubit_values @ qubo_matrix @ qubit_values:
+			return initial_state
+
+		return qubit_values
+
+
+def get_solution_shard(annealer_solution, number_qubits_used, shared_arrays_specs, sparse_shape, num_reads, seed,
+                       solver_parameters):
+	"""
+	This function solves a part of the reads in a worker process. The QUBO matrix is read from shared memory, so that
+	it is not copied for every task.
+	:param annealer_solution: annealer solver
+	:param number_qubits_used: number of qubits
+	:param shared_arrays_specs: list with the name, shape and data type of the shared memory blocks with the arrays of
+	the QUBO matrix (the matrix itself if dense, data, indices and indptr if sparse)
+	:param sparse_shape: shape of the QUBO matrix if sparse (CSR format), None if dense
+	:param num_reads: number of reads of this part
+	:param seed: seed of the random generator of this part (solvers which accept seeds)
+	:param solver_parameters: specific parameters of the annealer solver (see get_solution)
+	:return: it returns the raw response provided by the annealer solver
+	"""
+
+	shared_arrays = [shared_memory.SharedMemory(name=name) for name, _, _ in shared_arrays_specs]
+	try:
+		arrays = [np.ndarray(shape, dtype=dtype, buffer=shared_array.buf)
+		          for (_, shape, dtype), shared_array in zip(shared_arrays_specs, shared_arrays)]
+		qubo_matrix = arrays[0] if sparse_shape is None else csr_matrix(tuple(arrays), shape=sparse_shape)
+		parameters = dict(solver_parameters)
+		if get_solver_backend(annealer_solution).seeds:
+			parameters["local_seed"] = seed
+		response = get_solution(annealer_solution=annealer_solution, number_qubits_used=number_qubits_used,
+		                        qubo_matrix=qubo_matrix, num_reads=num_reads, **parameters)
+		del qubo_matrix, arrays
+	finally:
+		for shared_array in shared_arrays:
+			shared_array.close()
+
+	return response
+
+
+def get_parallel_solution(annealer_solution, number_qubits_used, qubo_matrix, num_reads, num_workers,
+                          **solver_parameters):
+	"""
+	This function splits the reads across a pool of processes (one part per process, each one with its own seed derived
+	from local_seed) and merges the responses into one response of the annealer solver
+	:param annealer_solution: annealer solver with batch reads (DWAVE_SIM, LOCAL_SA, LOCAL_PT, LOCAL_TABU or LOCAL_DA)
+	:param number_qubits_used: number of qubits
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_reads: total number of reads
+	:param num_workers: number of processes
+	:param solver_parameters: specific parameters of the annealer solver (see get_solution)
+	:return: it returns the merged response, with the same format as the response of the annealer solver
+	"""
+
+	backend = get_solver_backend(annealer_solution)
+	if not backend.batch_reads:
+		raise Exception("Annealer Solution does not support parallel reads : {}".format(annealer_solution))
+
+	# Sparse QUBO matrices are shared in CSR format (without building the dense matrix) if the solver accepts them
+	if issparse(qubo_matrix) and backend.sparse_input:
+		qubo_matrix = csr_matrix(qubo_matrix, dtype=float, copy=True)
+		qubo_matrix.sum_duplicates()
+		sparse_shape = qubo_matrix.shape
+		qubo_arrays = [qubo_matrix.data, qubo_matrix.indices, qubo_matrix.indptr]
 	else:
-		raise Exception("Annealer Solution not found : {}".format(annealer_solution))
+		sparse_shape = None
+		qubo_arrays = [np.asarray(qubo_matrix.toarray() if issparse(qubo_matrix) else qubo_matrix, dtype=float)]
+	reads_per_worker = [len(reads) for reads in np.array_split(np.arange(num_reads), num_workers) if len(reads) > 0]
+	seeds = [int(seed_sequence.generate_state(1)[0]) for seed_sequence in
+	         np.random.SeedSequence(solver_parameters.get("local_seed")).spawn(len(reads_per_worker))]
+
+	time_start = time.perf_counter()
+	shared_arrays = []
+	try:
+		for array in qubo_arrays:
+			# Shared memory blocks can not be empty (for instance, data of a QUBO matrix without coefficients)
+			shared_arrays.append(shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1)))
+			np.ndarray(array.shape, dtype=array.dtype, buffer=shared_arrays[-1].buf)[:] = array
+		shared_arrays_specs = [(shared_array.name, array.shape, array.dtype)
+		                       for shared_array, array in zip(shared_arrays, qubo_arrays)]
+		with ProcessPoolExecutor(max_workers=len(reads_per_worker)) as executor:
+			futures = [executor.submit(get_solution_shard, annealer_solution, number_qubits_used, shared_arrays_specs,
+			                           sparse_shape, worker_reads, seed, solver_parameters)
+			           for worker_reads, seed in zip(reads_per_worker, seeds)]
+			responses = [future.result() for future in futures]
+	finally:
+		for shared_array in shared_arrays:
+			shared_array.close()
+			shared_array.unlink()
+
+	response = backend.merge_responses(responses)
+	if solver_parameters.get("time_budget_s") is not None:
+		# Each part was solved with the time budget, the merged response is partial if any part is partial
+		anytime_infos = [get_response_info(part_response)["anytime"] for part_response in responses]
+		get_response_info(response)["anytime"] = get_anytime_info(
+			partial=any(anytime_info["partial"] for anytime_info in anytime_infos),
+			reads=sum(anytime_info["reads"] for anytime_info in anytime_infos), requested_reads=num_reads,
+			chunks=sum(anytime_info["chunks"] for anytime_info in anytime_infos), time_start=time_start,
+			time_budget_s=solver_parameters["time_budget_s"])
 
 	return response
 
 
-def get_results(annealer_solution, x_matrix, method, response, num_qubits_dict):
+def get_results(annealer_solution, x_matrix, method, response, num_qubits_dict, reductions=None):
 	"""
 	This function rebuilds the values of the variables from the response provided by annealer solver. It is an upper
 	level function
@@ -79,27 +290,53 @@ def get_results(annealer_solution, x_matrix, method, response, num_qubits_dict):
 	:param method: method used (method 1/METHOD_WITHOUT_SIGN or Method 2/METHOD_WITH_SIGN)
 	:param response: response (raw) provided by the annealer solver
 	:param num_qubits_dict: number of qubits for integer and fractional parts of each variable
+	:param reductions: list of reductions (see system_reduction) applied to the system before QUBO formulation. If
+	provided, x_matrix is the list of variables of the reduced system and the eliminated variables are restored
     :return: it returns a dictionary with the processed information of the results, ordered with this format (result_1
     is the minimum energy solution obtained:
     Example:
     {'result_1': {V1: 3, V2: 1, I_V1: -2, 'occurrences': 73, 'energy': -9.0},
     'result_2': {V1: 3, V2: 1, I_V1: -1, 'occurrences': 23, 'energy': -8.0}, etc
 	"""
-	if annealer_solution == AnnealerSolution.FUJITSU_SIM:
+	backend = get_solver_backend(annealer_solution)
+	if backend.process_results is not None:
+		data = backend.process_results(list_of_variables=x_matrix, method=method, response=response,
+		                               num_qubits_dict=num_qubits_dict)
+	else:
+		# Shared decoding of all the solvers: the response is converted into samples, which are decoded at once
+		data = get_results_from_samples(list_of_variables=x_matrix, method=method,
+		                                samples_dict=backend.get_samples(response), num_qubits_dict=num_qubits_dict)
 
-		data = fujitsu_tools.process_fujitsu_results(list_of_variables=x_matrix, method=method, response=response,
-		                                             num_qubits_dict=num_qubits_dict)
+	if reductions:
+		data = restore_reduced_variables(data, reductions)
 
-	elif annealer_solution == AnnealerSolution.DWAVE_SIM or annealer_solution == AnnealerSolution.DWAVE_HYBRID_SOLVER or \
-			annealer_solution == AnnealerSolution.DWAVE_QPU:
+	return data
 
-		data = dwave_tools.process_dwave_results(annealer_solution=annealer_solution, list_of_variables=x_matrix,
-		                                         method=method, response=response,
-		                                         num_qubits_dict=num_qubits_dict)
-	else:
-		raise Exception("Annealer Solution not found : {}".format(annealer_solution))
 
-	return data
+def get_complex_results(data, list_of_variables):
+	"""
+	This function rebuilds the complex (phasor) value of each variable from the results of a complex QUBO formulation
+	(see get_complex_qubo_matrix), where real and imaginary parts are decoded as re_<variable> and im_<variable>
+	:param data: dictionary returned by get_results for the real equivalent system
+	:param list_of_variables: list of variables (complex x matrix) in symbolic format
+	:return: it returns a dictionary with the same format as get_results, but with complex values:
+	Example:
+	{'result_1': {V1: (1+0.5j), V2: (0.25-1j), 'occurrences': 73, 'energy': -9.0}, etc
+	"""
+	# Imported here, so that SymPy is only loaded when symbolic names are built
+	from sympy import Symbol
+
+	complex_data = {}
+	for result_key in data:
+		result_dict = {}
+		for variable in list_of_variables:
+			result_dict[variable] = complex(data[result_key][Symbol("re_" + str(variable))],
+			                                data[result_key][Symbol("im_" + str(variable))])
+		result_dict["occurrences"] = data[result_key]["occurrences"]
+		result_dict["energy"] = data[result_key]["energy"]
+		complex_data[result_key] = result_dict
+
+	return complex_data
 
 
 def get_expected_results_from_file(expected_results_file_path):
@@ -109,6 +346,9 @@ def get_expected_results_from_file(expected_results_file_path):
 	:return: It returns a dictionary with the expected results with this format as example:
 	{V1: 3, V2: 1, I_V1: -2}
 	"""
+	# Imported here, so that SymPy is only loaded when symbolic names are built
+	from sympy import Symbol
+
 	expected_results_dict = {}
 	expected_results_file = open(expected_results_file_path, 'r')
 
@@ -172,6 +412,9 @@ def plot_errors(error_dict, title):
 	:return:
 	"""
 
+	# Imported here, so that matplotlib is only loaded when results are plotted
+	import matplotlib.pyplot as plt
+
 	fig, ax = plt.subplots()
 
 	list_of_variable_name_str = []
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the portfolio solver (PORTFOLIO): several annealer solvers race on the same QUBO problem, each one in its own
+process, and the first one which reaches the target residual wins (the rest are cancelled).
+
+Each member of the portfolio solves the problem in rounds (one call to get_solution per round, with a new seed) and
+reports its best energy after every round. As the energy of the QUBO is norm(A x - b)^2 - norm(b)^2, the residual of
+each member is obtained from its energy and the b matrix, without decoding the variables. Only solvers with independent
+random reads (batch reads or seeds) run more than one round.
+
+Each member is an annealer solution or a dictionary with the annealer solution, its number of reads (optional) and its
+specific parameters, which replace the ones passed to get_solution:
+[AnnealerSolution.LOCAL_SA, {"annealer_solution": AnnealerSolution.LOCAL_TABU, "num_reads": 5}, ...]
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import time
+import queue
+import multiprocessing
+import numpy as np
+from helpers.anytime import get_anytime_info, ANYTIME_SAFETY_FACTOR
+
+# Time in seconds given to the members to stop after the race is over, before they are terminated
+STOP_GRACE_PERIOD_S = 1.0
+
+
+def get_member_config(member, num_reads, solver_parameters):
+	"""
+	This function returns the annealer solution, number of reads and specific parameters of a member of the portfolio
+	:param member: annealer solution or dictionary (see format above)
+	:param num_reads: number of reads of get_solution (used if the member does not set it)
+	:param solver_parameters: specific parameters of get_solution (without the ones of the portfolio)
+	:return: annealer solution, number of reads and dictionary with the specific parameters
+	"""
+
+	if not isinstance(member, dict):
+		return member, num_reads, dict(solver_parameters)
+
+	member_parameters = dict(member)
+	annealer_solution = member_parameters.pop("annealer_solution")
+	member_num_reads = member_parameters.pop("num_reads", num_reads)
+
+	return annealer_solution, member_num_reads, dict(solver_parameters, **member_parameters)
+
+
+def run_portfolio_member(index, annealer_solution, number_qubits_used, qubo_matrix, num_reads, solver_parameters,
+                         max_rounds, time_budget_s, stop_event, message_queue):
+	"""
+	This function solves the problem with one member of the portfolio (it is run in its own process), in rounds, until
+	the maximum number of rounds is reached or the race is over. After each round, it sends its best energy (and the
+	response, if it improved) to the main process.
+	:param index: index of the member in the portfolio
+	:param annealer_solution: annealer solver
+	:param number_qubits_used: number of qubits
+	:param qubo_matrix: QUBO matrix
+	:param num_reads: number of reads of each round
+	:param solver_parameters: specific parameters of the annealer solver (see get_solution)
+	:param max_rounds: maximum number of rounds (None for no limit)
+	:param time_budget_s: time budget in seconds of the race (None for no budget). Each round is solved with the time
+	left (see anytime), so that the member returns its best-so-far result before the race is over
+	:param stop_event: event set by the main process when the race is over
+	:param message_queue: queue of messages to the main process (the last one says if the time budget expired before
+	the maximum number of rounds was reached)
+	"""
+
+	# Imported here, linear_solver imports this module through the backend registry
+	from helpers.linear_solver import get_solution
+	from helpers.solver_backends import get_solver_backend
+
+	backend = get_solver_backend(annealer_solution)
+	seed_sequences = np.random.SeedSequence(solver_parameters.get("local_seed"))
+	deadline = None if time_budget_s is None else time.perf_counter() + time_budget_s
+	best_energy = None
+	round_index = 0
+	expired = False
+	try:
+		while not stop_event.is_set() and (max_rounds is None or round_index < max_rounds):
+			parameters = dict(solver_parameters)
+			if deadline is not None:
+				if round_index > 0 and time.perf_counter() >= deadline:
+					expired = True
+					break
+				parameters["time_budget_s"] = max(deadline - time.perf_counter(), 0.0)
+			if backend.seeds:
+				parameters["local_seed"] = int(seed_sequences.spawn(1)[0].generate_state(1)[0])
+			response = get_solution(annealer_solution=annealer_solution, number_qubits_used=number_qubits_used,
+			                        qubo_matrix=qubo_matrix, num_reads=num_reads, **parameters)
+			energy = float(np.min(backend.get_samples(response)["energies"]))
+			round_index += 1
+
+			if best_energy is None or energy < best_energy:
+				best_energy = energy
+				message_queue.put(("round", index, round_index, energy, response))
+			else:
+				message_queue.put(("round", index, round_index, energy, None))
+	except Exception as exception:
+		message_queue.put(("error", index, round_index, None, "{}: {}".format(type(exception).__name__, exception)))
+		return
+
+	message_queue.put(("done", index, round_index, None, expired))
+
+
+def get_residual(energy, b_norm_squared):
+	"""
+	This function returns the residual norm(A x - b) of a solution from its energy (norm(A x - b)^2 - norm(b)^2)
+	:param energy: energy of the solution
+	:param b_norm_squared: norm(b)^2 (None if the b matrix is not known)
+	:return: residual (None if the b matrix is not known)
+	"""
+
+	if b_norm_squared is None:
+		return None
+
+	return float(np.sqrt(max(energy + b_norm_squared, 0.0)))
+
+
+def get_portfolio_solution(total_num_qubits, qubo_matrix, members, num_reads=None, target_residual=None,
+                           time_budget_s=None, b_matrix=None, solver_parameters=None):
+	"""
+	This function runs the race of the portfolio: all the members solve the problem at the same time and the race is
+	over when a member reaches the target residual, the time budget expires or all the members have finished. Without
+	time budget, each member runs only one round.
+	:param total_num_qubits: number of qubits
+	:param qubo_matrix: QUBO matrix
+	:param members: list of members (see format above)
+	:param num_reads: number of reads of each round (used if the member does not set it)
+	:param target_residual: target residual norm(A x - b), it requires the b matrix (by default, no target)
+	:param time_budget_s: time budget in seconds (by default, until all the members have finished). Each round of the
+	members is solved with the time left, so members return their best-so-far result within the budget. If no member
+	has a result when the budget expires, the race is over with the first result
+	:param b_matrix: b matrix (numeric) of the system, used to obtain the residual from the energy
+	:param solver_parameters: parameters of get_solution (the ones of each member are used, portfolio_* and
+	time_budget_s are ignored)
+	:return: it returns the response of the portfolio, a dictionary with the winner ("annealer_solution", "index",
+	"energy", "residual" and its raw response "response", the one of its best round), the statistics of each member
+	("stats", list in the same order as members, with "annealer_solution", "status" (target, finished, cancelled or
+	failed), "rounds", "best_energy", "best_residual", "time_to_best" and "error") and the information of the anytime
+	execution ("info", see anytime), partial if the budget expired before the target was reached or before all the
+	members finished their rounds
+	"""
+
+	# Imported here, linear_solver imports this module through the backend registry
+	from helpers.solver_backends import get_solver_backend
+
+	if not members:
+		raise Exception("Portfolio without members : {}".format(members))
+	b_norm_squared = None
+	if b_matrix is not None:
+		b_array = np.asarray(b_matrix, dtype=float).reshape(-1)
+		b_norm_squared = float(b_array @ b_array)
+	elif target_residual is not None:
+		raise Exception("b matrix is required for target residual : {}".format(target_residual))
+
+	member_solver_parameters = {name: value for name, value in (solver_parameters or {}).items()
+	                            if not name.startswith("portfolio_") and name != "time_budget_s"}
+	# The budget of the members has a margin, so that their last round is received before the race is over
+	member_time_budget_s = None if time_budget_s is None else ANYTIME_SAFETY_FACTOR * time_budget_s
+
+	context = multiprocessing.get_context()
+	stop_event = context.Event()
+	message_queue = context.Queue()
+	processes = []
+	stats = []
+	time_start = time.perf_counter()
+	for index, member in enumerate(members):
+		annealer_solution, member_num_reads, parameters = get_member_config(member, num_reads,
+		                                                                   member_solver_parameters)
+		backend = get_solver_backend(annealer_solution)
+		if backend.get_samples is None:
+			raise Exception("Annealer Solution can not be a member of the portfolio : {}".format(annealer_solution))
+		max_rounds = None if time_budget_s is not None and (backend.batch_reads or backend.seeds) else 1
+
+		stats.append({"annealer_solution": annealer_solution, "status": "cancelled", "rounds": 0, "best_energy": None,
+		              "best_residual": None, "time_to_best": None, "error": None})
+		processes.append(context.Process(target=run_portfolio_member,
+		                                 args=(index, annealer_solution, total_num_qubits, qubo_matrix,
+		                                       member_num_reads, parameters, max_rounds, member_time_budget_s,
+		                                       stop_event, message_queue),
+		                                 daemon=True))
+	for process in processes:
+		process.start()
+
+	best_responses = [None] * len(members)
+	winner_index = None
+	expired = False
+	# The result is also partial if a member still had rounds left when its budget expired
+	member_expired = False
+	running = set(range(len(members)))
+	try:
+		while running and winner_index is None:
+			# When the budget expires, the race is over as soon as there is a result
+			expired = time_budget_s is not None and time.perf_counter() - time_start >= time_budget_s
+			if expired and any(response is not None for response in best_responses):
+				break
+			try:
+				message, index, rounds, energy, content = message_queue.get(timeout=0.05)
+			except queue.Empty:
+				# Members which exit without message (for instance, killed) are not waited for
+				running = {index for index in running if processes[index].is_alive() or not message_queue.empty()}
+				continue
+
+			stats[index]["rounds"] = rounds
+			if message == "round":
+				if content is not None:
+					best_responses[index] = content
+					stats[index]["best_energy"] = energy
+					stats[index]["best_residual"] = get_residual(energy, b_norm_squared)
+					stats[index]["time_to_best"] = time.perf_counter() - time_start
+					if target_residual is not None and stats[index]["best_residual"] <= target_residual:
+						stats[index]["status"] = "target"
+						winner_index = index
+			elif message == "done":
+				stats[index]["status"] = "finished"
+				member_expired = member_expired or content
+				running.discard(index)
+			else:
+				stats[index]["status"] = "failed"
+				stats[index]["error"] = content
+				running.discard(index)
+	finally:
+		# The rest of the members are cancelled: they are asked to stop after their current round and terminated if
+		# they do not stop within the grace period. Messages are drained, otherwise the processes can not exit
+		stop_event.set()
+		grace_deadline = time.perf_counter() + STOP_GRACE_PERIOD_S
+		while any(process.is_alive() for process in processes) and time.perf_counter() < grace_deadline:
+			try:
+				message_queue.get(timeout=0.05)
+			except queue.Empty:
+				pass
+		for process in processes:
+			if process.is_alive():
+				process.terminate()
+			process.join()
+		message_queue.close()
+
+	if winner_index is None:
+		candidates = [index for index in range(len(members)) if best_responses[index] is not None]
+		if not candidates:
+			raise Exception("Portfolio without results : {}".format([member_stats["error"] for member_stats in stats]))
+		winner_index = min(candidates, key=lambda index: stats[index]["best_energy"])
+
+	info = {}
+	if time_budget_s is not None:
+		partial = stats[winner_index]["status"] != "target" and (expired or member_expired)
+		info["anytime"] = get_anytime_info(partial=partial, reads=sum(member_stats["rounds"] for member_stats in stats),
+		                                   requested_reads=None, chunks=len(members), time_start=time_start,
+		                                   time_budget_s=time_budget_s)
+
+	return {"annealer_solution": stats[winner_index]["annealer_solution"], "index": winner_index,
+	        "energy": stats[winner_index]["best_energy"], "residual": stats[winner_index]["best_residual"],
+	        "response": best_responses[winner_index], "time": time.perf_counter() - time_start, "stats": stats,
+	        "info": info}
+
+
+def get_portfolio_samples(response):
+	"""
+	This function converts the response of the portfolio into samples (the ones of the response of the winner)
+	:param response: response of the portfolio (see get_portfolio_solution)
+	:return: dictionary with the samples (see get_results_from_samples)
+	"""
+
+	# Imported here, linear_solver imports this module through the backend registry
+	from helpers.solver_backends import get_solver_backend
+
+	return get_solver_backend(response["annealer_solution"]).get_samples(response["response"])
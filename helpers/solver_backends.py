@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the registry of annealer solvers (backends) used by the upper level functions of linear_solver (get_solution,
+get_results). Each backend describes how its function is called (parameters of get_solution passed to it, format of the
+QUBO matrix), how its response is converted into samples, and its capabilities:
+- sparse_input: the QUBO matrix is passed as it is received (NumPy or SciPy sparse), otherwise it is passed as NumPy
+- batch_reads: reads are independent, so they can be split across processes and the responses merged
+- asynchronous: the solver is remote (most of the time is spent waiting for the queue), see async_solver
+- seeds: the solver accepts the seed of the random generator (local_seed)
+
+New solvers are added with register_solver_backend, without modifying get_solution or get_results. The functions of the
+backends are given as LazyFunction, so that the module of each solver (D-Wave Ocean SDK, Fujitsu DADK, etc.) is only
+imported the first time the solver is used.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import importlib
+import numpy as np
+from scipy.sparse import issparse
+from helpers.constants import AnnealerSolution
+
+# Parameters of get_solution common to all the solvers of QUBO matrices, with the names of the solver functions
+QUBO_PARAMETERS = {"number_qubits_used": "total_num_qubits", "qubo_matrix": "qubo_matrix", "num_reads": "num_reads"}
+
+# Registered backends, key is the annealer solution
+solver_backends = {}
+
+
+class LazyFunction:
+	"""
+	This class refers to a function of a module which is imported the first time the function is called. Objects of this
+	class are picklable (only the names are stored), so that they can be sent to worker processes.
+	"""
+
+	def __init__(self, module_name, function_name):
+		"""
+		:param module_name: name of the module, for instance "dwave_tools.dwave_tools"
+		:param function_name: name of the function in the module
+		"""
+		self.module_name = module_name
+		self.function_name = function_name
+
+	def __call__(self, *args, **kwargs):
+		module = importlib.import_module(self.module_name)
+
+		return getattr(module, self.function_name)(*args, **kwargs)
+
+
+class SolverBackend:
+	"""
+	This class describes an annealer solver for get_solution and get_results
+	"""
+
+	def __init__(self, solve_function, parameters, get_samples=None, fixed_parameters=None, merge_responses=None,
+	             process_results=None, sparse_input=False, batch_reads=False, asynchronous=False, seeds=False,
+	             pass_solver_parameters=False):
+		"""
+		:param solve_function: function (or LazyFunction) which solves the problem and returns the raw response
+		:param parameters: dictionary with the parameters of get_solution accepted by the solver (key) and the name of
+		the argument of solve_function (value). Parameters which are None are not passed (default of solve_function)
+		:param get_samples: function which converts the response into samples (see get_results_from_samples)
+		:param fixed_parameters: dictionary with arguments always passed to solve_function
+		:param merge_responses: function which merges a list of responses into one (required by batch_reads)
+		:param process_results: function (list_of_variables, method, response, num_qubits_dict) which processes the
+		response, if it can not be converted into samples (by default, samples are decoded)
+		:param sparse_input: True if the solver accepts SciPy sparse QUBO matrices
+		:param batch_reads: True if reads can be split across processes
+		:param asynchronous: True if the solver is remote
+		:param seeds: True if the solver accepts the seed of the random generator (local_seed)
+		:param pass_solver_parameters: True to pass all the parameters of get_solution to solve_function as
+		solver_parameters (for instance, to configure the solver of subproblems)
+		"""
+		self.solve_function = solve_function
+		self.parameters = parameters
+		self.get_samples = get_samples
+		self.fixed_parameters = {} if fixed_parameters is None else fixed_parameters
+		self.merge_responses = merge_responses
+		self.process_results = process_results
+		self.sparse_input = sparse_input
+		self.batch_reads = batch_reads
+		self.asynchronous = asynchronous
+		self.seeds = seeds
+		self.pass_solver_parameters = pass_solver_parameters
+
+	def get_qubo(self, qubo_matrix):
+		"""
+		This function returns the QUBO matrix in the format accepted by the solver
+		:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+		:return: QUBO matrix
+		"""
+
+		if qubo_matrix is None or self.sparse_input:
+			return qubo_matrix
+		if issparse(qubo_matrix):
+			return qubo_matrix.toarray()
+
+		return np.asarray(qubo_matrix, dtype=float)
+
+	def solve(self, number_qubits_used, qubo_matrix, num_reads, solver_parameters):
+		"""
+		This function calls the solver with its parameters
+		:param number_qubits_used: number of qubits
+		:param qubo_matrix: QUBO matrix
+		:param num_reads: number of reads
+		:param solver_parameters: dictionary with the specific parameters of get_solution
+		:return: it returns the raw response provided by the solver
+		"""
+
+		parameters = dict(solver_parameters, number_qubits_used=number_qubits_used,
+		                  qubo_matrix=self.get_qubo(qubo_matrix), num_reads=num_reads)
+		arguments = dict(self.fixed_parameters)
+		for name, argument in self.parameters.items():
+			if parameters.get(name) is not None:
+				arguments[argument] = parameters[name]
+		if self.pass_solver_parameters:
+			arguments["solver_parameters"] = solver_parameters
+
+		return self.solve_function(**arguments)
+
+
+def register_solver_backend(annealer_solution, backend):
+	"""
+	This function registers (or replaces) the backend of an annealer solution
+	:param annealer_solution: name of the annealer solution (for instance, one of AnnealerSolution constants)
+	:param backend: SolverBackend
+	"""
+
+	solver_backends[annealer_solution] = backend
+
+
+def get_solver_backend(annealer_solution):
+	"""
+	This function returns the backend of an annealer solution
+	:param annealer_solution: name of the annealer solution
+	:return: SolverBackend
+	"""
+
+	if annealer_solution not in solver_backends:
+		raise Exception("Annealer Solution not found : {}".format(annealer_solution))
+
+	return solver_backends[annealer_solution]
+
+
+def check_solver_parameters(solver_parameters):
+	"""
+	This function checks that all the parameters are accepted by at least one of the registered backends (parameters of
+	other solvers are ignored by each solver, so that the same parameters can be passed to all of them)
+	:param solver_parameters: dictionary with the specific parameters of get_solution
+	"""
+
+	known_parameters = set()
+	for backend in solver_backends.values():
+		known_parameters.update(backend.parameters)
+	for name in solver_parameters:
+		if name not in known_parameters:
+			raise Exception("Solver parameter not found : {}".format(name))
+
+
+def get_local_samples(response):
+	"""
+	This function returns the samples of the response of the local solvers (already in samples format)
+	:param response: response of the local solver
+	:return: response
+	"""
+
+	return response
+
+
+def get_decomposition_solution(total_num_qubits, qubo_matrix, num_reads=None, sub_solution=None, sub_num_reads=None,
+                               subproblem_size=None, qubit_blocks=None, max_iterations=None, num_workers=None,
+                               seed=None, time_budget_s=None, solver_parameters=None):
+	"""
+	This function solves the QUBO matrix with the decomposition solver (DECOMPOSITION). The subproblems are solved by
+	the default solver (see get_default_subproblem_sample) or, if sub_solution is provided, by any registered solver
+	with the rest of the parameters
+	:param total_num_qubits: number of qubits
+	:param qubo_matrix: QUBO matrix
+	:param num_reads: number of reads
+	:param sub_solution: annealer solution of the subproblems (by default, see get_default_subproblem_sample)
+	:param sub_num_reads: number of reads of each subproblem
+	:param subproblem_size: maximum number of qubits of each subproblem
+	:param qubit_blocks: blocks of qubits kept in the same subproblem
+	:param max_iterations: maximum number of iterations
+	:param num_workers: number of processes to solve the subproblems
+	:param seed: seed of the random generator
+	:param time_budget_s: time budget in seconds (see get_local_decomposition_solution)
+	:param solver_parameters: parameters of get_solution (the ones of the solver of the subproblems are used)
+	:return: it returns the response (samples format of local solvers)
+	"""
+
+	sub_sampler = None
+	if sub_solution is not None:
+		# Imported here, linear_solver imports this module
+		from helpers.linear_solver import SubproblemSampler
+		sub_solver_parameters = {name: value for name, value in (solver_parameters or {}).items()
+		                         if not name.startswith("decomposition_") and name != "time_budget_s"}
+		sub_sampler = SubproblemSampler(annealer_solution=sub_solution, num_reads=sub_num_reads,
+		                                **sub_solver_parameters)
+
+	return get_local_decomposition_solution(total_num_qubits=total_num_qubits, qubo_matrix=qubo_matrix,
+	                                        num_reads=num_reads, sub_sampler=sub_sampler, subproblem_size=subproblem_size,
+	                                        qubit_blocks=qubit_blocks, max_iterations=max_iterations,
+	                                        num_workers=num_workers, seed=seed, time_budget_s=time_budget_s)
+
+
+# Functions of the modules of the solvers, imported when they are first called
+get_dwave_solution = LazyFunction("dwave_tools.dwave_tools", "get_dwave_solution")
+get_dwave_samples = LazyFunction("dwave_tools.dwave_tools", "get_dwave_samples")
+get_merged_dwave_response = LazyFunction("dwave_tools.dwave_tools", "get_merged_dwave_response")
+get_fujitsu_solution = LazyFunction("fujitsu_tools.fujitsu_tools", "get_fujitsu_solution")
+get_da_samples = LazyFunction("local_tools.local_tools", "get_da_samples")
+get_merged_response = LazyFunction("local_tools.local_tools", "get_merged_response")
+get_merged_da_response = LazyFunction("local_tools.local_tools", "get_merged_da_response")
+get_local_decomposition_solution = LazyFunction("local_tools.local_tools", "get_local_decomposition_solution")
+get_local_sa_solution = LazyFunction("local_tools.local_tools", "get_local_sa_solution")
+get_local_pt_solution = LazyFunction("local_tools.local_tools", "get_local_pt_solution")
+get_local_tabu_solution = LazyFunction("local_tools.local_tools", "get_local_tabu_solution")
+get_local_exact_solution = LazyFunction("local_tools.local_tools", "get_local_exact_solution")
+get_local_da_solution = LazyFunction("local_tools.local_tools", "get_local_da_solution")
+get_classical_solution = LazyFunction("helpers.classical_solver", "get_classical_solution")
+process_classical_results = LazyFunction("helpers.classical_solver", "process_classical_results")
+get_portfolio_solution = LazyFunction("helpers.portfolio_solver", "get_portfolio_solution")
+get_portfolio_samples = LazyFunction("helpers.portfolio_solver", "get_portfolio_samples")
+
+# Parameters of each group of solvers
+DWAVE_PARAMETERS = dict(QUBO_PARAMETERS, dwave_sampler_config="sampler_config", time_budget_s="time_budget_s")
+FUJITSU_PARAMETERS = dict(QUBO_PARAMETERS, fujitsu_number_iterations="number_iterations",
+                          fujitsu_temperature_start="temperature_start", fujitsu_temperature_end="temperature_end",
+                          fujitsu_temperature_mode="temperature_mode",
+                          fujitsu_temperature_interval="temperature_interval",
+                          fujitsu_offset_increase_rate="offset_increase_rate")
+
+register_solver_backend(AnnealerSolution.DWAVE_SIM, SolverBackend(
+	solve_function=get_dwave_solution, parameters=DWAVE_PARAMETERS,
+	fixed_parameters={"annealer_solution": AnnealerSolution.DWAVE_SIM}, get_samples=get_dwave_samples,
+	merge_responses=get_merged_dwave_response, sparse_input=True, batch_reads=True))
+
+register_solver_backend(AnnealerSolution.DWAVE_HYBRID_SOLVER, SolverBackend(
+	solve_function=get_dwave_solution, parameters=DWAVE_PARAMETERS,
+	fixed_parameters={"annealer_solution": AnnealerSolution.DWAVE_HYBRID_SOLVER},
+	get_samples=get_dwave_samples, sparse_input=True, asynchronous=True))
+
+register_solver_backend(AnnealerSolution.DWAVE_QPU, SolverBackend(
+	solve_function=get_dwave_solution,
+	parameters=dict(DWAVE_PARAMETERS, dwave_chain_strength="chain_strength",
+	                dwave_annealing_time_us="annealing_time_us"),
+	fixed_parameters={"annealer_solution": AnnealerSolution.DWAVE_QPU}, get_samples=get_dwave_samples,
+	sparse_input=True, asynchronous=True))
+
+# The reads of FUJITSU_SIM are not split across processes (no batch_reads): dadk already solves all the runs in one
+# call, and its graphics and solver times refer to that call. With time budget, the responses of the chunks are merged
+# by get_fujitsu_solution (get_merged_da_response), keeping the graphs of each chunk
+register_solver_backend(AnnealerSolution.FUJITSU_SIM, SolverBackend(
+	solve_function=get_fujitsu_solution,
+	parameters=dict(FUJITSU_PARAMETERS, fujitsu_scaling_bit_precision="scaling_bit_precision",
+	                fujitsu_auto_tuning="auto_tuning", fujitsu_graphics="graphics", time_budget_s="time_budget_s"),
+	fixed_parameters={"annealer_solution": AnnealerSolution.FUJITSU_SIM}, get_samples=get_da_samples,
+	sparse_input=True))
+
+register_solver_backend(AnnealerSolution.LOCAL_SA, SolverBackend(
+	solve_function=get_local_sa_solution,
+	parameters=dict(QUBO_PARAMETERS, local_num_sweeps="num_sweeps", local_beta_range="beta_range", local_seed="seed"),
+	get_samples=get_local_samples, merge_responses=get_merged_response, sparse_input=True, batch_reads=True,
+	seeds=True))
+
+register_solver_backend(AnnealerSolution.LOCAL_PT, SolverBackend(
+	solve_function=get_local_pt_solution,
+	parameters=dict(QUBO_PARAMETERS, local_num_sweeps="num_sweeps", local_num_replicas="num_replicas",
+	                local_beta_range="beta_range", local_seed="seed"),
+	get_samples=get_local_samples, merge_responses=get_merged_response, sparse_input=True, batch_reads=True,
+	seeds=True))
+
+register_solver_backend(AnnealerSolution.LOCAL_TABU, SolverBackend(
+	solve_function=get_local_tabu_solution,
+	parameters=dict(QUBO_PARAMETERS, local_num_iterations="num_iterations", local_tabu_tenure="tenure",
+	                local_num_restarts="num_restarts", local_seed="seed"),
+	get_samples=get_local_samples, merge_responses=get_merged_response, sparse_input=True, batch_reads=True,
+	seeds=True))
+
+register_solver_backend(AnnealerSolution.LOCAL_EXACT, SolverBackend(
+	solve_function=get_local_exact_solution,
+	parameters=dict(QUBO_PARAMETERS, num_reads="num_states", local_max_workers="max_workers",
+	                time_budget_s="time_budget_s"),
+	get_samples=get_local_samples))
+
+register_solver_backend(AnnealerSolution.LOCAL_DA, SolverBackend(
+	solve_function=get_local_da_solution, parameters=dict(FUJITSU_PARAMETERS, local_seed="seed"),
+	fixed_parameters={"annealer_solution": AnnealerSolution.LOCAL_DA}, get_samples=get_da_samples,
+	merge_responses=get_merged_da_response, batch_reads=True, seeds=True))
+
+register_solver_backend(AnnealerSolution.DECOMPOSITION, SolverBackend(
+	solve_function=get_decomposition_solution,
+	parameters=dict(QUBO_PARAMETERS, decomposition_sub_solution="sub_solution",
+	                decomposition_sub_num_reads="sub_num_reads", decomposition_subproblem_size="subproblem_size",
+	                decomposition_qubit_blocks="qubit_blocks", decomposition_max_iterations="max_iterations",
+	                decomposition_num_workers="num_workers", local_seed="seed", time_budget_s="time_budget_s"),
+	get_samples=get_local_samples, sparse_input=True, seeds=True, pass_solver_parameters=True))
+
+register_solver_backend(AnnealerSolution.CLASSICAL, SolverBackend(
+	solve_function=get_classical_solution,
+	parameters={"a_matrix": "a_matrix", "b_matrix": "b_matrix", "classical_solver_type": "solver"},
+	process_results=process_classical_results, sparse_input=True))
+
+register_solver_backend(AnnealerSolution.PORTFOLIO, SolverBackend(
+	solve_function=get_portfolio_solution,
+	parameters=dict(QUBO_PARAMETERS, portfolio_members="members", portfolio_target_residual="target_residual",
+	                time_budget_s="time_budget_s", b_matrix="b_matrix"),
+	get_samples=get_portfolio_samples, sparse_input=True, pass_solver_parameters=True))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with functions to decompose the system of linear equations (numeric A and b matrices) in smaller subsystems, which
+are formulated as QUBO problems and solved separately (and in parallel when they are independent).
+
+The sparsity pattern of A is analyzed as a graph:
+- Connected components: subcircuits electrically independent (only coupled through ground), fully independent
+subsystems.
+- Block triangular form: each equation is matched to one variable (maximum transversal) and the strongly connected
+components of the resulting directed graph are the diagonal blocks. A block only depends on the variables of the blocks
+solved before it (for instance, the controlling side of a controlled source). Blocks are grouped in levels: all the
+blocks of a level only depend on blocks of previous levels, so they are solved in parallel.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, maximum_bipartite_matching
+from helpers.system_reduction import get_numeric_system
+
+
+def get_connected_components(a_matrix, tolerance=1e-12):
+	"""
+	This function returns the independent subsystems (connected components of the graph of A)
+	:param a_matrix: A matrix (numeric)
+	:param tolerance: coefficients with absolute value below tolerance are considered zero
+	:return: list of blocks, each block is a dictionary with the rows and variable indexes of the subsystem, its
+	dependencies (none) and its level (0)
+	"""
+
+	dimension = len(a_matrix)
+	pattern = csr_matrix(np.abs(a_matrix) > tolerance)
+	# Rows and variables are the nodes of a bipartite graph: row i is node i, variable j is node dimension + j
+	graph = csr_matrix((np.ones(pattern.nnz), (pattern.nonzero()[0], dimension + pattern.nonzero()[1])),
+	                   shape=(2 * dimension, 2 * dimension))
+	number_components, labels = connected_components(graph, directed=False)
+
+	blocks = []
+	for component in range(number_components):
+		rows = [index for index in range(dimension) if labels[index] == component]
+		variables_index = [index for index in range(dimension) if labels[dimension + index] == component]
+		if len(rows) != len(variables_index):
+			raise Exception("A matrix is structurally singular")
+		blocks.append({"rows": rows, "variables_index": variables_index, "dependencies": set(), "level": 0})
+
+	return blocks
+
+
+def get_block_triangular_form(a_matrix, tolerance=1e-12):
+	"""
+	This function returns the diagonal blocks of the block triangular form of A, in solving order
+	:param a_matrix: A matrix (numeric)
+	:param tolerance: coefficients with absolute value below tolerance are considered zero
+	:return: list of blocks, each block is a dictionary with the rows and variable indexes of the subsystem, the blocks
+	it depends on (indexes in the list) and its level (blocks of the same level are independent)
+	"""
+
+	dimension = len(a_matrix)
+	pattern = csr_matrix(np.abs(a_matrix) > tolerance)
+
+	# Maximum transversal: each row (equation) is matched to one variable
+	row_variable = maximum_bipartite_matching(pattern, perm_type='column')
+	if np.any(row_variable < 0):
+		raise Exception("A matrix is structurally singular")
+	variable_row = np.empty(dimension, dtype=int)
+	variable_row[row_variable] = np.arange(dimension)
+
+	# Directed graph: variable j -> variable k if the equation matched to j contains k
+	rows, columns = pattern.nonzero()
+	graph = csr_matrix((np.ones(len(rows)), (row_variable[rows], columns)), shape=(dimension, dimension))
+	number_components, labels = connected_components(graph, directed=True, connection='strong')
+
+	# Dependencies between strongly connected components (condensation graph, acyclic)
+	dependencies = [set() for _ in range(number_components)]
+	for row, column in zip(rows, columns):
+		block, dependency = labels[row_variable[row]], labels[column]
+		if block != dependency:
+			dependencies[block].add(dependency)
+
+	# Level of each component: 0 if it has no dependencies, otherwise 1 + maximum level of its dependencies
+	levels = [None] * number_components
+	pending = list(range(number_components))
+	while pending:
+		for component in list(pending):
+			if all(levels[dependency] is not None for dependency in dependencies[component]):
+				levels[component] = max([levels[dependency] + 1 for dependency in dependencies[component]], default=0)
+				pending.remove(component)
+
+	order = sorted(range(number_components), key=lambda component: levels[component])
+	new_index = {component: index for index, component in enumerate(order)}
+
+	blocks = []
+	for component in order:
+		variables_index = [index for index in range(dimension) if labels[index] == component]
+		blocks.append({"rows": [int(variable_row[index]) for index in variables_index],
+		               "variables_index": variables_index,
+		               "dependencies": {new_index[dependency] for dependency in dependencies[component]},
+		               "level": levels[component]})
+
+	return blocks
+
+
+def get_subsystem(a_matrix, b_matrix, block, x_values, tolerance=1e-12):
+	"""
+	This function returns A and b matrices of the subsystem of one block. The variables of other blocks already solved
+	are moved to the b matrix.
+	:param a_matrix: A matrix (numeric)
+	:param b_matrix: b matrix (numeric)
+	:param block: block dictionary (see get_block_triangular_form)
+	:param x_values: NumPy array with the values of the variables already solved (nan if not solved)
+	:param tolerance: coefficients with absolute value below tolerance are considered zero (same tolerance as the
+	decomposition, so that the block only depends on the variables of the blocks solved before it)
+	:return: A and b matrices of the subsystem
+	"""
+
+	rows = block["rows"]
+	variables_index = block["variables_index"]
+	external_index = [index for index in range(len(x_values)) if index not in variables_index and
+	                  np.any(np.abs(a_matrix[rows, index]) > tolerance)]
+	if np.any(np.isnan(x_values[external_index])):
+		raise Exception("Subsystem depends on variables not solved : {}".format(
+			[index for index in external_index if np.isnan(x_values[index])]))
+
+	sub_a_matrix = a_matrix[np.ix_(rows, variables_index)]
+	sub_b_matrix = b_matrix[rows] - a_matrix[np.ix_(rows, external_index)] @ x_values[external_index]
+
+	return sub_a_matrix, sub_b_matrix
+
+
+def solve_decomposed_system(a_matrix, b_matrix, list_of_variables, solve_subsystem, block_triangular=True,
+                            max_workers=None, tolerance=1e-12):
+	"""
+	This function decomposes the system in subsystems, solves each subsystem separately with the function provided and
+	stitches the results in the order of list_of_variables. The subsystems of the same level are solved in parallel in
+	a process pool.
+	:param a_matrix: A matrix (numeric)
+	:param b_matrix: b matrix (numeric)
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param solve_subsystem: function (a_matrix, b_matrix, list_of_variables) which formulates and solves a subsystem
+	and returns the results with the format of get_results (for instance, SubsystemSolver). It must be picklable (defined
+	at module level) to be run in the process pool
+	:param block_triangular: True to decompose in the blocks of block triangular form, False to decompose only in
+	independent subsystems (connected components)
+	:param max_workers: number of processes of the pool (by default, number of CPUs). If 1, subsystems are solved
+	sequentially in this process
+	:param tolerance: coefficients with absolute value below tolerance are considered zero
+	:return: it returns a dictionary with the format of get_results, with the best result of each subsystem (energy is
+	the sum of energies of the subsystems), and the list of results of each subsystem:
+	Example:
+	{'result_1': {V1: 3, V2: 1, I_V1: -2, 'occurrences': 73, 'energy': -9.0}}, [{'result_1': {V1: 3, ...}}, ...]
+	"""
+
+	a_matrix, b_matrix = get_numeric_system(a_matrix, b_matrix)
+
+	if block_triangular:
+		blocks = get_block_triangular_form(a_matrix, tolerance=tolerance)
+	else:
+		blocks = get_connected_components(a_matrix, tolerance=tolerance)
+
+	x_values = np.full(len(list_of_variables), np.nan)
+	block_data_list = [None] * len(blocks)
+
+	executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else None
+	try:
+		for level in sorted(set(block["level"] for block in blocks)):
+			level_blocks = [index for index, block in enumerate(blocks) if block["level"] == level]
+			arguments = []
+			for index in level_blocks:
+				sub_a_matrix, sub_b_matrix = get_subsystem(a_matrix, b_matrix, blocks[index], x_values,
+				                                           tolerance=tolerance)
+				sub_variables = [list_of_variables[variable_index] for variable_index in blocks[index]["variables_index"]]
+				arguments.append((sub_a_matrix, sub_b_matrix, sub_variables))
+
+			if executor is None:
+				level_data_list = [solve_subsystem(*argument) for argument in arguments]
+			else:
+				futures = [executor.submit(solve_subsystem, *argument) for argument in arguments]
+				level_data_list = [future.result() for future in futures]
+
+			# Best result of each block is used for the blocks of the next levels
+			for index, block_data in zip(level_blocks, level_data_list):
+				block_data_list[index] = block_data
+				for variable_index in blocks[index]["variables_index"]:
+					x_values[variable_index] = block_data["result_1"][list_of_variables[variable_index]]
+	finally:
+		if executor is not None:
+			executor.shutdown()
+
+	result_dict = {variable: x_values[index] for index, variable in enumerate(list_of_variables)}
+	result_dict["occurrences"] = min(block_data["result_1"]["occurrences"] for block_data in block_data_list)
+	result_dict["energy"] = sum(block_data["result_1"]["energy"] for block_data in block_data_list)
+
+	return {"result_1": result_dict}, block_data_list
+
+
+class SubsystemSolver:
+	"""
+	This class formulates a subsystem as QUBO problem and solves it with the selected annealer solver (same parameters
+	for all the subsystems). Objects of this class are picklable, so they can be used as solve_subsystem function in
+	solve_decomposed_system.
+	"""
+
+	def __init__(self, method, annealer_solution, number_of_integer_qubits, number_of_fractional_qubits, num_reads,
+	             **solver_parameters):
+		"""
+		:param method: Method 1 (METHOD_WITHOUT_SIGN) or Method 2 (METHOD_WITH_SIGN)
+		:param annealer_solution: annealer solver
+		:param number_of_integer_qubits: number of qubits for integer part of each variable
+		:param number_of_fractional_qubits: number of qubits for fractional part of each variable
+		:param num_reads: number of reads
+		:param solver_parameters: specific parameters of the annealer solver (see get_solution)
+		"""
+		self.method = method
+		self.annealer_solution = annealer_solution
+		self.number_of_integer_qubits = number_of_integer_qubits
+		self.number_of_fractional_qubits = number_of_fractional_qubits
+		self.num_reads = num_reads
+		self.solver_parameters = solver_parameters
+
+	def __call__(self, a_matrix, b_matrix, list_of_variables):
+		# Libraries of the annealer solvers are imported in the worker process
+		from qubo_formulation.qubo_formulation import get_qubo_matrix
+		from helpers.variables import get_qubits_per_variable
+		from helpers.linear_solver import get_solution, get_results
+
+		num_qubits_dict = {}
+		for variable in list_of_variables:
+			num_qubits_dict[variable] = {"INTEGER": self.number_of_integer_qubits,
+			                             "FRACTIONAL": self.number_of_fractional_qubits}
+
+		qubit_list_per_variable_dict, number_qubits_used = \
+			get_qubits_per_variable(list_of_variables=list_of_variables, method=self.method,
+			                        num_qubits_dict=num_qubits_dict)
+		qubo_matrix = get_qubo_matrix(method=self.method, list_of_variables=list_of_variables,
+		                              num_qubits_dict=num_qubits_dict, a_matrix=a_matrix, b_matrix=b_matrix)
+		response = get_solution(annealer_solution=self.annealer_solution, number_qubits_used=number_qubits_used,
+		                        qubo_matrix=qubo_matrix, num_reads=self.num_reads, **self.solver_parameters)
+
+		return get_results(annealer_solution=self.annealer_solution, x_matrix=list_of_variables, method=self.method,
+		                   response=response, num_qubits_dict=num_qubits_dict)
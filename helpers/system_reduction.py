@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with functions to reduce the system of linear equations (numeric A and b matrices) before QUBO formulation, so
+that fewer variables (and qubits) are encoded, and to restore the eliminated variables in the processed results.
+
+Each reduction returns a dictionary (reduction_dict) with the information required to restore the eliminated
+variables. Reductions can be chained; restore_reduced_variables applies them in reverse order.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from helpers.constants import ReductionType
+
+
+def get_numeric_system(a_matrix, b_matrix):
+	"""
+	This function returns A and b matrices in NumPy (float) format. Matrices obtained after the substitution of the
+	symbol values (sympy numbers) are accepted.
+	:param a_matrix: A matrix
+	:param b_matrix: b matrix
+	:return: A and b matrices (NumPy)
+	"""
+
+	return np.asarray(a_matrix, dtype=float), np.asarray(b_matrix, dtype=float).reshape(-1)
+
+
+def get_kron_reduced_system(a_matrix, b_matrix, list_of_variables, variables_to_eliminate):
+	"""
+	This function eliminates the selected variables (for instance, internal nodes) by Schur complement (Kron
+	reduction). Being k the kept variables and e the eliminated ones:
+		(Akk - Ake Aee^-1 Aek) xk = bk - Ake Aee^-1 be
+		xe = Aee^-1 be - Aee^-1 Aek xk  (back substitution)
+	Rows of the eliminated variables are the rows with the same index in A (diagonal block Aee must be nonsingular).
+	:param a_matrix: A matrix (numeric)
+	:param b_matrix: b matrix (numeric)
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param variables_to_eliminate: list of variables to eliminate
+	:return: reduced A and b matrices, list of kept variables and reduction dictionary
+	"""
+
+	a_matrix, b_matrix = get_numeric_system(a_matrix, b_matrix)
+
+	eliminated_index = [list_of_variables.index(variable) for variable in variables_to_eliminate]
+	kept_index = [index for index in range(len(list_of_variables)) if index not in eliminated_index]
+
+	a_ee_matrix = a_matrix[np.ix_(eliminated_index, eliminated_index)]
+	a_ek_matrix = a_matrix[np.ix_(eliminated_index, kept_index)]
+	a_ke_matrix = a_matrix[np.ix_(kept_index, eliminated_index)]
+	a_kk_matrix = a_matrix[np.ix_(kept_index, kept_index)]
+
+	# The rank of an empty block is not defined in all NumPy versions (nothing to eliminate)
+	if eliminated_index and np.linalg.matrix_rank(a_ee_matrix) < len(eliminated_index):
+		raise Exception("Variables can not be eliminated (singular block) : {}".format(variables_to_eliminate))
+
+	# Aee is factorized once and used for both terms
+	lu_piv = lu_factor(a_ee_matrix)
+	back_substitution_matrix = lu_solve(lu_piv, a_ek_matrix)      # Aee^-1 Aek
+	back_substitution_vector = lu_solve(lu_piv, b_matrix[eliminated_index])     # Aee^-1 be
+
+	reduced_a_matrix = a_kk_matrix - a_ke_matrix @ back_substitution_matrix
+	reduced_b_matrix = b_matrix[kept_index] - a_ke_matrix @ back_substitution_vector
+	kept_variables = [list_of_variables[index] for index in kept_index]
+
+	reduction_dict = {"type": ReductionType.KRON,
+	                  "list_of_variables": list(list_of_variables),
+	                  "kept_variables": kept_variables,
+	                  "eliminated_variables": [list_of_variables[index] for index in eliminated_index],
+	                  "back_substitution_matrix": back_substitution_matrix,
+	                  "back_substitution_vector": back_substitution_vector}
+
+	return reduced_a_matrix, reduced_b_matrix, kept_variables, reduction_dict
+
+
+def get_presolved_system(a_matrix, b_matrix, list_of_variables, tolerance=1e-12):
+	"""
+	This function removes the variables which are trivially known from the system:
+	- Rows with only one nonzero coefficient fix the variable to a constant: a * xj = b (for instance, a voltage source
+	connected to ground, V1 = 2).
+	- Rows with two opposite coefficients fix the difference of two variables: a * (xp - xq) = b (for instance, a
+	floating voltage source, supernode). xp is substituted by xq + b/a.
+	Each known variable is substituted in the rest of the equations, removing one row and one column. The process is
+	repeated until no more rows are found, as substitutions can leave new rows with one or two coefficients.
+	:param a_matrix: A matrix (numeric)
+	:param b_matrix: b matrix (numeric)
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param tolerance: coefficients with absolute value below tolerance are considered zero
+	:return: reduced A and b matrices, list of kept variables and reduction dictionary
+	"""
+
+	a_matrix, b_matrix = get_numeric_system(a_matrix, b_matrix)
+	a_matrix = a_matrix.copy()
+	b_matrix = b_matrix.copy()
+
+	active_rows = list(range(len(b_matrix)))
+	active_columns = list(range(len(list_of_variables)))
+	operations = []     # in the order they are applied, to be restored in reverse order
+
+	found = True
+	while found:
+		found = False
+		for row in active_rows:
+			columns = [column for column in active_columns if abs(a_matrix[row, column]) > tolerance]
+
+			if len(columns) == 1:
+				# a * xj = b
+				column = columns[0]
+				value = b_matrix[row] / a_matrix[row, column]
+				b_matrix -= a_matrix[:, column] * value
+				operations.append({"variable": list_of_variables[column], "value": value, "reference": None})
+			elif len(columns) == 2 and abs(a_matrix[row, columns[0]] + a_matrix[row, columns[1]]) <= tolerance:
+				# a * (xp - xq) = b -> xp = xq + b/a, column of xp is added to column of xq
+				column, reference_column = columns
+				value = b_matrix[row] / a_matrix[row, column]
+				b_matrix -= a_matrix[:, column] * value
+				a_matrix[:, reference_column] += a_matrix[:, column]
+				operations.append({"variable": list_of_variables[column], "value": value,
+				                   "reference": list_of_variables[reference_column]})
+			else:
+				continue
+
+			active_rows.remove(row)
+			active_columns.remove(column)
+			found = True
+			break
+
+	kept_variables = [list_of_variables[column] for column in active_columns]
+	reduction_dict = {"type": ReductionType.PRESOLVE,
+	                  "list_of_variables": list(list_of_variables),
+	                  "kept_variables": kept_variables,
+	                  "operations": operations}
+
+	return a_matrix[np.ix_(active_rows, active_columns)], b_matrix[active_rows], kept_variables, reduction_dict
+
+
+def get_bandwidth(a_matrix, tolerance=1e-12):
+	"""
+	This function returns the bandwidth of the couplings between variables in the QUBO problem, i.e. the maximum distance
+	|i - j| between two variables which appear in the same equation (nonzero entries of A^T A)
+	:param a_matrix: A matrix (numeric)
+	:param tolerance: coefficients with absolute value below tolerance are considered zero
+	:return: bandwidth
+	"""
+
+	pattern = (np.abs(np.asarray(a_matrix, dtype=float)) > tolerance).astype(int)
+	rows, columns = np.nonzero(pattern.T @ pattern)
+
+	return int(np.max(np.abs(rows - columns), initial=0))
+
+
+def get_reordered_system(a_matrix, b_matrix, list_of_variables, tolerance=1e-12):
+	"""
+	This function reorders the variables (columns of A) by reverse Cuthill-McKee on the graph of couplings between
+	variables (A^T A, two variables are coupled in the QUBO problem if they appear in the same equation), so that the
+	qubits of coupled variables are close and the QUBO matrix is banded. No variable is eliminated, the original order
+	is restored in the processed results. A system without variables is returned unchanged.
+	:param a_matrix: A matrix (numeric)
+	:param b_matrix: b matrix (numeric)
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param tolerance: coefficients with absolute value below tolerance are considered zero
+	:return: reordered A and b matrices, list of reordered variables and reduction dictionary
+	"""
+
+	a_matrix, b_matrix = get_numeric_system(a_matrix, b_matrix)
+
+	if len(list_of_variables) == 0:
+		# Nothing to reorder (for instance, all the variables were removed by get_presolved_system)
+		order = np.arange(0)
+	else:
+		pattern = csr_matrix(np.abs(a_matrix) > tolerance, dtype=float)
+		order = reverse_cuthill_mckee((pattern.T @ pattern).tocsr(), symmetric_mode=True)
+	reordered_variables = [list_of_variables[index] for index in order]
+
+	reduction_dict = {"type": ReductionType.REORDER,
+	                  "list_of_variables": list(list_of_variables),
+	                  "kept_variables": reordered_variables}
+
+	return a_matrix[:, order], b_matrix, reordered_variables, reduction_dict
+
+
+def restore_variables(reduction_dict, result_dict):
+	"""
+	This function restores the variables eliminated by one reduction in the result of one solution
+	:param reduction_dict: reduction dictionary returned by the reduction function
+	:param result_dict: result of one solution ({V1: 3, V2: 1, 'occurrences': 73, 'energy': -9.0})
+	:return: result of the solution with all the variables of the system before the reduction (same order)
+	"""
+
+	values_dict = dict(result_dict)
+
+	if reduction_dict["type"] == ReductionType.KRON:
+		kept_values = np.array([result_dict[variable] for variable in reduction_dict["kept_variables"]], dtype=float)
+		eliminated_values = reduction_dict["back_substitution_vector"] - \
+			reduction_dict["back_substitution_matrix"] @ kept_values
+		for variable, value in zip(reduction_dict["eliminated_variables"], eliminated_values):
+			values_dict[variable] = value
+	elif reduction_dict["type"] == ReductionType.PRESOLVE:
+		# Operations are restored in reverse order, so that the reference variable is always known
+		for operation in reversed(reduction_dict["operations"]):
+			values_dict[operation["variable"]] = operation["value"]
+			if operation["reference"] is not None:
+				values_dict[operation["variable"]] += values_dict[operation["reference"]]
+	elif reduction_dict["type"] == ReductionType.REORDER:
+		# Only the order of the variables is restored
+		pass
+	else:
+		raise Exception("Reduction type not valid : {}".format(reduction_dict["type"]))
+
+	restored_dict = {variable: values_dict[variable] for variable in reduction_dict["list_of_variables"]}
+	for key in result_dict:
+		if key not in restored_dict and key not in reduction_dict["list_of_variables"]:
+			restored_dict[key] = result_dict[key]     # occurrences, energy, etc.
+
+	return restored_dict
+
+
+def restore_reduced_variables(data, reductions):
+	"""
+	This function restores the eliminated variables in all the results returned by get_results, applying the
+	reductions in reverse order
+	:param data: dictionary returned by get_results, with the values of the variables of the reduced system
+	:param reductions: list of reduction dictionaries, in the order they were applied
+	:return: dictionary with the same format as get_results, with all the variables of the original system
+	"""
+
+	restored_data = {}
+	for result_key in data:
+		result_dict = data[result_key]
+		for reduction_dict in reversed(reductions):
+			result_dict = restore_variables(reduction_dict, result_dict)
+		restored_data[result_key] = result_dict
+
+	return restored_data
@@ -8,6 +8,7 @@ Code with functions to handle variables (x vector)
 """
 
 # Import Libraries
+import numpy as np
 from helpers.constants import LinearCircuitSolver
 
 
@@ -130,3 +131,129 @@ def get_value(method, raw_values_dict, num_qubits_dict, list_of_qubits):
 		raise Exception("Method not valid : " + str(method))
 
 	return value
+
+
+def get_encoding_matrix(list_of_variables, method, num_qubits_dict):
+	"""
+	This function returns the encoding matrix E of the qubits, so that the values of the variables are x = E q, where q
+	is the vector of qubit values ordered as returned by get_qubits_per_variable (q1, q2, etc.). It is the matrix form
+	of get_value for all the variables at once.
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param method: Method 1 or same number of qubits for positive and negative values, Method 2 or one qubit for the
+	sign and the rest of qubits for absolute value
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable.
+	:return: NumPy array with the encoding matrix (number of variables x total number of qubits)
+	"""
+
+	qubit_list_per_variable_dict, number_qubits_used = get_qubits_per_variable(list_of_variables=list_of_variables,
+	                                                                           method=method,
+	                                                                           num_qubits_dict=num_qubits_dict)
+	encoding_matrix = np.zeros((len(list_of_variables), number_qubits_used))
+
+	for variable_index in range(0, len(list_of_variables)):
+		variable = list_of_variables[variable_index]
+		num_qubits_int = num_qubits_dict[variable]["INTEGER"]
+		num_qubits_fract = num_qubits_dict[variable]["FRACTIONAL"]
+		# qubits are named q1, q2, etc. (index = number - 1)
+		first_qubit = int(qubit_list_per_variable_dict[variable][0][1:]) - 1
+
+		# weights of fractional and integer parts (fractional LSB first), as in get_value
+		weights = [pow(2, index) for index in range((-1) * num_qubits_fract, num_qubits_int)]
+
+		if method == LinearCircuitSolver.Method.METHOD_WITHOUT_SIGN:
+			encoding_matrix[variable_index, first_qubit:first_qubit + len(weights)] = weights
+			encoding_matrix[variable_index, first_qubit + len(weights):first_qubit + 2 * len(weights)] = \
+				[-weight for weight in weights]
+		elif method == LinearCircuitSolver.Method.METHOD_WITH_SIGN:
+			encoding_matrix[variable_index, first_qubit] = -pow(2, num_qubits_int)     # Sign
+			encoding_matrix[variable_index, first_qubit + 1:first_qubit + 1 + len(weights)] = weights
+		else:
+			raise Exception("Method not valid : " + str(method))
+
+	return encoding_matrix
+
+
+def get_qubit_values(method, value, num_qubits_dict):
+	"""
+	This function returns the qubit values which represent the closest value to the one provided (inverse function of
+	get_value). Values out of the range of the encoding are saturated.
+	:param method: Method 1 (METHOD_WITHOUT_SIGN) or Method 2 (METHOD_WITH_SIGN)
+	:param value: value of the variable to encode
+	:param num_qubits_dict: dictionary with number of qubits for integer and fractional parts of the variable
+	:return: list of qubit values (0 or 1), ordered as the list of qubits of the variable
+	"""
+
+	num_qubits_int = num_qubits_dict["INTEGER"]
+	num_qubits_fract = num_qubits_dict["FRACTIONAL"]
+	num_qubits_abs = num_qubits_int + num_qubits_fract
+	max_code = pow(2, num_qubits_abs) - 1
+
+	if method == LinearCircuitSolver.Method.METHOD_WITHOUT_SIGN:
+		code = min(int(round(abs(value) * pow(2, num_qubits_fract))), max_code)
+		bits = [(code >> index) & 1 for index in range(num_qubits_abs)]
+		if value >= 0:
+			return bits + [0] * num_qubits_abs     # Positive part
+		return [0] * num_qubits_abs + bits         # Negative part
+
+	elif method == LinearCircuitSolver.Method.METHOD_WITH_SIGN:
+		sign = 1 if value < 0 else 0
+		# For negative values, the absolute part is added to -2^m (sign qubit)
+		code = int(round((value + sign * pow(2, num_qubits_int)) * pow(2, num_qubits_fract)))
+		code = min(max(code, 0), max_code)
+		return [sign] + [(code >> index) & 1 for index in range(num_qubits_abs)]
+
+	else:
+		raise Exception("Method not valid : " + str(method))
+
+
+def get_encoded_qubits(list_of_variables, method, num_qubits_dict, values):
+	"""
+	This function returns the vector of qubit values (q1, q2, etc.) which encodes the values of all the variables
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param method: Method 1 (METHOD_WITHOUT_SIGN) or Method 2 (METHOD_WITH_SIGN)
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable.
+	:param values: list of values of the variables (same order as list_of_variables)
+	:return: NumPy array with the qubit values
+	"""
+
+	qubit_values = []
+	for variable, value in zip(list_of_variables, values):
+		qubit_values += get_qubit_values(method, value, num_qubits_dict[variable])
+
+	return np.array(qubit_values, dtype=np.int8)
+
+
+def get_results_from_samples(list_of_variables, method, samples_dict, num_qubits_dict):
+	"""
+	This function rebuilds the values of the variables from the qubit values of each sample (all the samples at once,
+	with the encoding matrix). It is used to process the response of all the annealer solvers, once converted to samples.
+	:param list_of_variables: list of variables (x vector), in symbolic format
+	:param method: Method 1 (METHOD_WITHOUT_SIGN) or Method 2 (METHOD_WITH_SIGN)
+	:param samples_dict: dictionary with the samples ("samples", NumPy array with the qubit values q1, q2, etc. of each
+	sample), their energies ("energies") and number of occurrences ("num_occurrences"), ordered by energy. Optionally,
+	the fraction of broken chains of each sample ("chain_break_fraction", D-Wave QPU)
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable.
+	:return: it returns a dictionary with the processed information of the results, ordered with this format (result_1
+	is the minimum energy solution obtained:
+	Example:
+	{'result_1': {V1: 3, V2: 1, I_V1: -2, 'occurrences': 73, 'energy': -9.0},
+	'result_2': {V1: 3, V2: 1, I_V1: -1, 'occurrences': 23, 'energy': -8.0}, etc
+	"""
+
+	encoding_matrix = get_encoding_matrix(list_of_variables, method, num_qubits_dict)
+	values = np.asarray(samples_dict["samples"], dtype=float) @ encoding_matrix.T
+
+	variable_value_dict = {}
+	for result_index in range(len(values)):
+		result_dict = {}
+		for variable_index, variable in enumerate(list_of_variables):
+			result_dict[variable] = float(values[result_index, variable_index])
+
+		result_dict["occurrences"] = int(samples_dict["num_occurrences"][result_index])
+		result_dict["energy"] = float(samples_dict["energies"][result_index])
+		if "chain_break_fraction" in samples_dict:
+			result_dict["chain_break_fraction"] = float(samples_dict["chain_break_fraction"][result_index])
+
+		variable_value_dict["result_" + str(result_index + 1)] = result_dict
+
+	return variable_value_dict
@@ -12,6 +12,7 @@ from qubo_formulation import qubo_formulation
 from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
 from helpers.constants import LinearCircuitSolver, AnnealerSolution
 from helpers.linear_solver import get_solution, get_results
+from helpers.classical_solver import get_error_wrt_classical_solution
 from helpers.variables import get_qubits_per_variable
 from fujitsu_tools.fujitsu_tools import TemperatureMode
 from dadk.QUBOSolverCPU import *
@@ -47,6 +48,9 @@ fujitsu_graphics = GraphicsDetail.ALL
 dwave_chain_strength = 700
 dwave_annealing_time_us = 20
 
+# Comparison with the classical solution (error and time ratio)
+compare_with_classical = True
+
 """
 ######################## Modified Nodal Analysis ######################################################################
 """
@@ -107,6 +111,15 @@ time_4 = time.time()
 print("Overall Time: " + str(time_4-time_1))
 print("Solver processing Time: " + str(time_3-time_2))
 
+if compare_with_classical:
+    classical_response = get_solution(annealer_solution=AnnealerSolution.CLASSICAL, number_qubits_used=number_qubits_used,
+                                      qubo_matrix=qubo_matrix, num_reads=1, a_matrix=A_matrix, b_matrix=b_matrix)
+    comparison = get_error_wrt_classical_solution(data_dict=data["result_1"], classical_response=classical_response,
+                                                  list_of_variables=x_matrix, solver_time=time_3-time_2)
+    print("Error with respect to classical solution: " + str(comparison["absolute_error"]))
+    print("Maximum error: " + str(comparison["max_absolute_error"]) + " Residual: " + str(comparison["residual"]))
+    print("Time ratio (annealer / classical): " + str(comparison["time_ratio"]))
+
 
 if annealer_solution == AnnealerSolution.FUJITSU_SIM:
     response.display_graphs()
@@ -0,0 +1,1104 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with local solvers of the QUBO matrix, implemented only with NumPy/SciPy (no annealer SDK is required). The QUBO
+matrix (NumPy or SciPy sparse) is used directly, without conversion to dictionaries.
+
+The energy of the QUBO is E(q) = q^T Q q. Writing h as the diagonal of Q and W = Q + Q^T without diagonal, the local
+field of each qubit is f = h + W q, and the energy change when qubit i is flipped is (1 - 2 q_i) f_i. The local fields
+of all the reads are kept as an array and updated with the couplings of the flipped qubits (W dense or sparse,
+depending on its density).
+Solvers: simulated annealing, parallel tempering, tabu search, exact enumeration (small QUBO problems), Digital
+Annealer algorithm (response with the format of the Fujitsu Digital Annealer Simulator) and decomposition of large QUBO
+problems in subproblems solved by any other solver.
+
+Responses are dictionaries with the unique samples (NumPy array of qubit values), their energies and number of
+occurrences, ordered by energy.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from scipy.sparse import csr_matrix, issparse
+from helpers.variables import get_results_from_samples
+from helpers.constants import AnnealerSolution, TemperatureMode
+from helpers.anytime import get_anytime_info
+
+# Minimum density of the couplings to store them as a dense matrix (faster products than SciPy sparse)
+DENSE_COUPLINGS_DENSITY = 0.1
+
+# Default solver of the subproblems of the decomposition: exact up to this number of qubits, simulated annealing with
+# these reads and sweeps for larger subproblems
+EXACT_SUBPROBLEM_QUBITS = 16
+SUBPROBLEM_SA_READS = 8
+SUBPROBLEM_SA_SWEEPS = 100
+
+# Default maximum number of iterations of each run of the decomposition
+DECOMPOSITION_MAX_ITERATIONS = 50
+
+# Number of highest qubits fixed in each chunk of the exact solver (2^this number of chunks), without and with time
+# budget (smaller chunks, so that the states enumerated are spread among the chunks when the budget expires)
+EXACT_PREFIX_QUBITS = 6
+EXACT_BUDGET_PREFIX_QUBITS = 10
+
+# Energies of all the states of the inner qubits of the exact solver (the same for all the chunks of a QUBO matrix),
+# key is the QUBO matrix of the inner qubits. Only the last one is kept (in each process of the pool)
+exact_inner_energies_cache = {}
+
+
+def get_qubo_couplings(qubo_matrix):
+	"""
+	This function returns the linear terms and the couplings between qubits of the QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:return: linear terms (NumPy array) and matrix W = Q + Q^T without diagonal (NumPy if the density of the couplings
+	is at least DENSE_COUPLINGS_DENSITY, SciPy CSR otherwise)
+	"""
+
+	qubo_matrix = csr_matrix(qubo_matrix, dtype=float)
+	linear = qubo_matrix.diagonal()
+	couplings = (qubo_matrix + qubo_matrix.T).tolil()
+	couplings.setdiag(0)
+	couplings = couplings.tocsr()
+	couplings.eliminate_zeros()
+
+	if couplings.nnz >= DENSE_COUPLINGS_DENSITY * len(linear) ** 2:
+		return linear, couplings.toarray()
+
+	return linear, couplings
+
+
+def get_coupling_rows(couplings, qubits):
+	"""
+	This function returns the rows of the couplings of the qubits as a dense block
+	:param couplings: matrix W (see get_qubo_couplings)
+	:param qubits: NumPy array with the indexes of the qubits
+	:return: NumPy array (number of qubits x total number of qubits)
+	"""
+
+	if issparse(couplings):
+		return couplings[qubits].toarray()
+
+	return couplings[qubits]
+
+
+def get_lower_couplings(couplings):
+	"""
+	This function returns the couplings of each qubit with the previous qubits (row i of W up to column i), used by the
+	Metropolis sweep to obtain the local field of qubit i with the flips already done in the sweep
+	:param couplings: matrix W (see get_qubo_couplings)
+	:return: list with a dense row (NumPy view) or a tuple (indexes, values) for each qubit
+	"""
+
+	if not issparse(couplings):
+		return [couplings[i, :i] for i in range(len(couplings))]
+
+	lower_couplings = []
+	for i in range(couplings.shape[0]):
+		indexes = couplings.indices[couplings.indptr[i]:couplings.indptr[i + 1]]
+		values = couplings.data[couplings.indptr[i]:couplings.indptr[i + 1]]
+		lower_couplings.append((indexes[indexes < i], values[indexes < i]))
+
+	return lower_couplings
+
+
+def get_qubo_energies(qubo_matrix, samples):
+	"""
+	This function returns the energy of each sample
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param samples: NumPy array with the qubit values of each sample (number of samples x number of qubits)
+	:return: NumPy array with the energies
+	"""
+
+	samples = np.asarray(samples, dtype=float)
+	if issparse(qubo_matrix):
+		return np.asarray((csr_matrix(samples) @ qubo_matrix).multiply(samples).sum(axis=1)).reshape(-1)
+
+	return np.einsum('ri,ij,rj->r', samples, np.asarray(qubo_matrix, dtype=float), samples)
+
+
+def get_local_fields(linear, couplings, states):
+	"""
+	This function returns the local field f = h + W q of each qubit for each state
+	:param linear: linear terms
+	:param couplings: matrix W (see get_qubo_couplings)
+	:param states: NumPy array with the qubit values of each state (number of states x number of qubits)
+	:return: NumPy array with the local fields (number of states x number of qubits)
+	"""
+
+	return np.asarray(linear, dtype=float) + np.asarray(couplings @ np.asarray(states, dtype=float).T).T
+
+
+def get_default_beta_range(linear, couplings):
+	"""
+	This function returns the default range of inverse temperatures (hot, cold): at the hottest temperature, the largest
+	energy change is accepted with probability 50% and, at the coldest, the smallest energy change with probability 1%
+	:param linear: linear terms
+	:param couplings: matrix W (see get_qubo_couplings)
+	:return: tuple (hot, cold) of inverse temperatures
+	"""
+
+	max_delta = np.abs(linear) + np.asarray(abs(couplings).sum(axis=1)).reshape(-1)
+	coupling_values = couplings.data if issparse(couplings) else couplings.reshape(-1)
+	coefficients = np.abs(np.concatenate((linear, coupling_values)))
+	coefficients = coefficients[coefficients > 0]
+	if len(coefficients) == 0:
+		return 1.0, 1.0
+
+	return np.log(2) / max_delta.max(), np.log(100) / coefficients.min()
+
+
+def metropolis_sweep(directions, local_fields, beta_values, couplings, lower_couplings, rng):
+	"""
+	This function performs one Metropolis sweep (one flip attempt per qubit, in order) on all the states at once. The
+	arrays are stored by qubit (number of qubits x number of states), so that each qubit is a contiguous row, and the
+	local fields are updated lazily: the field of qubit i is its field at the beginning of the sweep plus the couplings
+	with the flips of the previous qubits (one product of the lower couplings and the flips, for all the states), and
+	all the fields are updated at the end of the sweep with one product W x flips.
+	Directions and local fields are updated in place.
+	:param directions: NumPy array (float) with 1 - 2 q of each qubit and state (+1 if the qubit can go 0 -> 1, -1 if it
+	can go 1 -> 0)
+	:param local_fields: NumPy array with the local fields of each qubit and state
+	:param beta_values: inverse temperature (scalar or NumPy array with the one of each state)
+	:param couplings: matrix W (see get_qubo_couplings)
+	:param lower_couplings: couplings with the previous qubits (see get_lower_couplings)
+	:param rng: NumPy random generator
+	:return: NumPy array with the number of accepted flips of each state
+	"""
+
+	# Thresholds of the energy changes accepted: delta < -log(u) / beta
+	thresholds = rng.standard_exponential(directions.shape)
+	thresholds /= beta_values
+	flips = np.zeros_like(directions)     # change of q of each qubit and state (0, +1 or -1)
+	deltas = np.empty(directions.shape[1])
+	accepted = np.empty(directions.shape[1], dtype=bool)
+
+	for i, lower in enumerate(lower_couplings):
+		if isinstance(lower, tuple):
+			indexes, values = lower
+			np.dot(values, flips[indexes], out=deltas)
+		else:
+			np.dot(lower, flips[:i], out=deltas)
+		deltas += local_fields[i]
+		deltas *= directions[i]
+		np.less_equal(deltas, thresholds[i], out=accepted)
+		np.multiply(directions[i], accepted, out=flips[i])
+
+	# The direction of each qubit is only used by its own flip attempt, so all of them are updated at the end
+	directions -= 2 * flips
+	local_fields += couplings @ flips
+
+	return np.abs(flips).sum(axis=0)
+
+
+def get_sweep_arrays(linear, couplings, states):
+	"""
+	This function returns the arrays of the Metropolis sweep (stored by qubit) of the states
+	:param linear: linear terms
+	:param couplings: matrix W (see get_qubo_couplings)
+	:param states: NumPy array with the qubit values of each state (number of states x number of qubits)
+	:return: NumPy arrays with the directions and the local fields (see metropolis_sweep)
+	"""
+
+	# Contiguous by qubit (C order), the transpose of the states is not
+	states = np.ascontiguousarray(np.asarray(states, dtype=float).T)
+
+	return 1 - 2 * states, np.asarray(linear, dtype=float)[:, None] + np.asarray(couplings @ states)
+
+
+def get_sweep_states(directions):
+	"""
+	This function returns the qubit values of the states from the directions of the Metropolis sweep
+	:param directions: NumPy array with the directions (see metropolis_sweep)
+	:return: NumPy array (int8) with the qubit values of each state (number of states x number of qubits)
+	"""
+
+	return ((1 - directions.T) / 2).astype(np.int8)
+
+
+def get_aggregated_response(samples, energies, info=None):
+	"""
+	This function aggregates the samples (unique samples with their number of occurrences), ordered by energy
+	:param samples: NumPy array with the qubit values of each sample
+	:param energies: NumPy array with the energy of each sample
+	:param info: dictionary with additional information of the solver (optional)
+	:return: response dictionary {'samples', 'energies', 'num_occurrences', 'info'}
+	"""
+
+	unique_samples, first_index, num_occurrences = np.unique(samples, axis=0, return_index=True, return_counts=True)
+	unique_energies = np.asarray(energies)[first_index]
+	order = np.argsort(unique_energies, kind='stable')
+
+	return {"samples": unique_samples[order].astype(np.int8),
+	        "energies": unique_energies[order],
+	        "num_occurrences": num_occurrences[order],
+	        "info": info if info is not None else {}}
+
+
+def get_merged_response(responses):
+	"""
+	This function merges the responses of several executions of a local solver (for instance, parts of the reads run
+	in parallel) into one response
+	:param responses: list of responses (see get_aggregated_response)
+	:return: merged response, the number of occurrences of the same sample are added
+	"""
+
+	samples = np.concatenate([response["samples"] for response in responses])
+	energies = np.concatenate([response["energies"] for response in responses])
+	num_occurrences = np.concatenate([response["num_occurrences"] for response in responses])
+
+	unique_samples, first_index, inverse = np.unique(samples, axis=0, return_index=True, return_inverse=True)
+	unique_occurrences = np.bincount(inverse.reshape(-1), weights=num_occurrences).astype(int)
+	unique_energies = energies[first_index]
+	order = np.argsort(unique_energies, kind='stable')
+
+	return {"samples": unique_samples[order].astype(np.int8),
+	        "energies": unique_energies[order],
+	        "num_occurrences": unique_occurrences[order],
+	        "info": {"merged_info": [response["info"] for response in responses]}}
+
+
+def get_local_sa_solution(total_num_qubits, qubo_matrix, num_reads=100, num_sweeps=1000, beta_range=None,
+                          seed=None, initial_states=None):
+	"""
+	This function solves the QUBO matrix by simulated annealing, running all the reads at once as a batch (vectorized
+	with NumPy, see metropolis_sweep). Inverse temperature is increased geometrically from hot to cold along the sweeps.
+	:param total_num_qubits: total number of qubits used in QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_reads: number of reads (by default, 100)
+	:param num_sweeps: number of sweeps of each read (by default, 1000)
+	:param beta_range: range of inverse temperatures (hot, cold). By default, see get_default_beta_range
+	:param seed: seed of the random generator
+	:param initial_states: NumPy array with the initial qubit values of each read (by default, random)
+	:return: it returns the response (see get_aggregated_response)
+	"""
+
+	num_reads = 100 if num_reads is None else num_reads
+	num_sweeps = 1000 if num_sweeps is None else num_sweeps
+	rng = np.random.default_rng(seed)
+
+	linear, couplings = get_qubo_couplings(qubo_matrix)
+	if len(linear) != total_num_qubits:
+		raise Exception("Number of qubits not valid : {}".format(total_num_qubits))
+	if beta_range is None:
+		beta_range = get_default_beta_range(linear, couplings)
+	lower_couplings = get_lower_couplings(couplings)
+
+	if initial_states is None:
+		states = rng.integers(0, 2, size=(num_reads, total_num_qubits), dtype=np.int8)
+	else:
+		states = np.array(initial_states, dtype=np.int8).reshape(-1, total_num_qubits)
+	directions, local_fields = get_sweep_arrays(linear, couplings, states)
+
+	for beta in np.geomspace(beta_range[0], beta_range[1], num_sweeps):
+		metropolis_sweep(directions, local_fields, beta, couplings, lower_couplings, rng)
+
+	states = get_sweep_states(directions)
+	energies = get_qubo_energies(qubo_matrix, states)
+
+	return get_aggregated_response(states, energies, info={"beta_range": beta_range, "num_sweeps": num_sweeps})
+
+
+def get_local_pt_solution(total_num_qubits, qubo_matrix, num_reads=10, num_sweeps=1000, num_replicas=8,
+                          beta_range=None, adaptive=True, seed=None):
+	"""
+	This function solves the QUBO matrix by parallel tempering (replica exchange). Each read runs a ladder of replicas
+	at fixed inverse temperatures; after every sweep, neighbour replicas exchange their states with probability
+	min(1, exp((beta_k - beta_k+1) * (E_k - E_k+1))). All the replicas of all the reads are vectorized as one batch
+	(one call of metropolis_sweep per sweep).
+	If adaptive, during the first half of the sweeps the inner inverse temperatures of the ladder are moved so that
+	the swap acceptance rate is similar for all the pairs of neighbour replicas. The best state found by each read
+	(any replica) is returned.
+	:param total_num_qubits: total number of qubits used in QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_reads: number of reads, i.e. independent ladders (by default, 10)
+	:param num_sweeps: number of sweeps (by default, 1000)
+	:param num_replicas: number of replicas of the ladder (by default, 8)
+	:param beta_range: inverse temperatures of the hottest and coldest replicas. By default, see get_default_beta_range
+	:param adaptive: True to adapt the inverse temperatures of the ladder
+	:param seed: seed of the random generator
+	:return: it returns the response (see get_aggregated_response). Its info includes the final ladder of inverse
+	temperatures, the flip acceptance rate of each replica and the swap acceptance rate of each pair of neighbour
+	replicas (measured once the ladder is fixed)
+	"""
+
+	num_reads = 10 if num_reads is None else num_reads
+	num_sweeps = 1000 if num_sweeps is None else num_sweeps
+	num_replicas = 8 if num_replicas is None else num_replicas
+	if num_replicas < 2:
+		raise Exception("Number of replicas not valid : {}".format(num_replicas))
+	rng = np.random.default_rng(seed)
+
+	linear, couplings = get_qubo_couplings(qubo_matrix)
+	if len(linear) != total_num_qubits:
+		raise Exception("Number of qubits not valid : {}".format(total_num_qubits))
+	if beta_range is None:
+		beta_range = get_default_beta_range(linear, couplings)
+	lower_couplings = get_lower_couplings(couplings)
+	ladder = np.geomspace(beta_range[0], beta_range[1], num_replicas)
+
+	# Column r * num_replicas + k of the batch is the replica k (inverse temperature ladder[k]) of the read r
+	states = rng.integers(0, 2, size=(num_reads * num_replicas, total_num_qubits), dtype=np.int8)
+	directions, local_fields = get_sweep_arrays(linear, couplings, states)
+	best_states = states.reshape(num_reads, num_replicas, -1)[:, 0].copy()
+	best_energies = np.full(num_reads, np.inf)
+
+	adaptation_sweeps = num_sweeps // 2 if adaptive else 0
+	adaptation_interval = max(1, adaptation_sweeps // 10)
+	accepted_flips = np.zeros(num_replicas)
+	accepted_swaps = np.zeros(num_replicas - 1)
+	attempted_swaps = np.zeros(num_replicas - 1)
+
+	for sweep in range(num_sweeps):
+		if sweep == adaptation_sweeps:
+			# Rates are measured from here, with the ladder fixed
+			accepted_swaps[:] = 0
+			attempted_swaps[:] = 0
+
+		flips = metropolis_sweep(directions, local_fields, np.tile(ladder, num_reads), couplings, lower_couplings, rng)
+		energies = ((1 - directions) * (linear[:, None] + local_fields)).sum(axis=0) / 4    # E = q^T (h + f) / 2
+
+		# Best state of each read
+		read_energies = energies.reshape(num_reads, num_replicas)
+		best_replica = read_energies.argmin(axis=1)
+		improved = read_energies[np.arange(num_reads), best_replica] < best_energies
+		if improved.any():
+			columns = np.flatnonzero(improved) * num_replicas + best_replica[improved]
+			best_states[improved] = get_sweep_states(directions[:, columns])
+			best_energies[improved] = energies[columns]
+
+		# Swaps between neighbour replicas, even and odd pairs alternately
+		pairs = np.arange(sweep % 2, num_replicas - 1, 2)
+		low_columns = (np.arange(num_reads)[:, None] * num_replicas + pairs[None, :]).reshape(-1)
+		high_columns = low_columns + 1
+		exponent = np.minimum(0, np.tile(ladder[pairs + 1] - ladder[pairs], num_reads) *
+		                      (energies[high_columns] - energies[low_columns]))
+		swapped = rng.random(len(low_columns)) < np.exp(exponent)
+		source_columns = np.concatenate((high_columns[swapped], low_columns[swapped]))
+		target_columns = np.concatenate((low_columns[swapped], high_columns[swapped]))
+		directions[:, target_columns] = directions[:, source_columns]
+		local_fields[:, target_columns] = local_fields[:, source_columns]
+
+		attempted_swaps[pairs] += num_reads
+		accepted_swaps[pairs] += swapped.reshape(num_reads, len(pairs)).sum(axis=0)
+		if sweep >= adaptation_sweeps:
+			accepted_flips += flips.reshape(num_reads, num_replicas).sum(axis=0)
+		elif (sweep + 1) % adaptation_interval == 0:
+			# Intervals (in log beta) of pairs with low acceptance are shortened, and the ones with high acceptance are
+			# enlarged, keeping the hottest and coldest replicas
+			swap_rates = accepted_swaps / np.maximum(attempted_swaps, 1)
+			intervals = np.diff(np.log(ladder)) * (swap_rates + 0.05)
+			intervals *= np.log(ladder[-1] / ladder[0]) / intervals.sum()
+			ladder = ladder[0] * np.exp(np.concatenate(([0], np.cumsum(intervals))))
+			accepted_swaps[:] = 0
+			attempted_swaps[:] = 0
+
+	measured_sweeps = num_sweeps - adaptation_sweeps
+	info = {"beta_ladder": ladder,
+	        "acceptance_rates": accepted_flips / max(1, measured_sweeps * num_reads * total_num_qubits),
+	        "swap_rates": accepted_swaps / np.maximum(attempted_swaps, 1),
+	        "num_sweeps": num_sweeps}
+
+	return get_aggregated_response(best_states, get_qubo_energies(qubo_matrix, best_states), info=info)
+
+
+def get_local_tabu_solution(total_num_qubits, qubo_matrix, num_reads=10, num_iterations=None, tenure=None,
+                            num_restarts=10, restart_perturbation=0.25, seed=None):
+	"""
+	This function solves the QUBO matrix by tabu search. In each iteration, the best flip (minimum energy change) not
+	forbidden is done, even if the energy increases, and the flipped qubit is forbidden (tabu) for the next tenure
+	iterations, unless the flip gives a state better than the best one found (aspiration). The energy change of every
+	flip, delta_j = (1 - 2 q_j) f_j, is kept as a vector and, after flipping qubit i, only the deltas of qubit i and its
+	neighbours change. The reads run as a batch: the flips of all the reads are done at once, and the deltas are
+	updated with the block of rows of W of the flipped qubits. After the first run (random states), each restart begins
+	from the best state of the read with a fraction of its qubits flipped.
+	:param total_num_qubits: total number of qubits used in QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_reads: number of reads (by default, 10)
+	:param num_iterations: number of iterations of each restart (by default, 20 times the number of qubits)
+	:param tenure: number of iterations a flipped qubit is tabu (by default, a quarter of the number of qubits, between
+	1 and 20)
+	:param num_restarts: number of restarts (by default, 10)
+	:param restart_perturbation: fraction of qubits of the best state flipped at each restart (1 for random restarts)
+	:param seed: seed of the random generator
+	:return: it returns the response (see get_aggregated_response) with the best state of each read
+	"""
+
+	num_reads = 10 if num_reads is None else num_reads
+	num_iterations = 20 * total_num_qubits if num_iterations is None else num_iterations
+	tenure = max(1, min(20, total_num_qubits // 4)) if tenure is None else tenure
+	num_restarts = 10 if num_restarts is None else num_restarts
+	rng = np.random.default_rng(seed)
+
+	linear, couplings = get_qubo_couplings(qubo_matrix)
+	if len(linear) != total_num_qubits:
+		raise Exception("Number of qubits not valid : {}".format(total_num_qubits))
+
+	reads = np.arange(num_reads)
+	best_states = np.zeros((num_reads, total_num_qubits), dtype=np.int8)
+	best_energies = np.full(num_reads, np.inf)
+
+	for restart in range(num_restarts):
+		if restart == 0:
+			states = rng.integers(0, 2, size=(num_reads, total_num_qubits), dtype=np.int8)
+		else:
+			states = best_states ^ (rng.random(best_states.shape) < restart_perturbation).astype(np.int8)
+
+		local_fields = get_local_fields(linear, couplings, states)
+		energies = (states * (linear + local_fields)).sum(axis=1) / 2
+		deltas = (1 - 2 * states) * local_fields
+		tabu_until = np.zeros((num_reads, total_num_qubits), dtype=int)
+
+		improved = energies < best_energies
+		best_states[improved] = states[improved]
+		best_energies[improved] = energies[improved]
+
+		for iteration in range(num_iterations):
+			allowed = (tabu_until <= iteration) | (energies[:, None] + deltas < best_energies[:, None])
+			masked_deltas = np.where(allowed, deltas, np.inf)
+			flips = masked_deltas.argmin(axis=1)
+			flip_deltas = masked_deltas[reads, flips]
+
+			# Reads with all the flips forbidden (only with tenure close to the number of qubits) do not move
+			moving = np.isfinite(flip_deltas)
+			moving_reads = reads if moving.all() else reads[moving]
+			flips, flip_deltas = flips[moving_reads], flip_deltas[moving_reads]
+
+			# f_j changes by W_ji * direction of qubit i, so delta_j by (1 - 2 q_j) W_ji direction (0 for j = i, W_ii = 0)
+			directions = 1 - 2 * states[moving_reads, flips]
+			states[moving_reads, flips] ^= 1
+			deltas[moving_reads] += (1 - 2 * states[moving_reads]) * directions[:, None] * \
+				get_coupling_rows(couplings, flips)
+			deltas[moving_reads, flips] = -flip_deltas
+			energies[moving_reads] += flip_deltas
+			tabu_until[moving_reads, flips] = iteration + 1 + tenure
+
+			improved = energies < best_energies
+			if improved.any():
+				best_states[improved] = states[improved]
+				best_energies[improved] = energies[improved]
+
+	info = {"num_iterations": num_iterations, "tenure": tenure, "num_restarts": num_restarts}
+
+	return get_aggregated_response(best_states, get_qubo_energies(qubo_matrix, best_states), info=info)
+
+
+def get_gray_code_flips(num_bits):
+	"""
+	This function returns the sequence of bits flipped to enumerate all the states of num_bits bits in Gray code order,
+	starting from all zeros. In step t (t = 1, 2, etc.), the flipped bit is the number of trailing zeros of t.
+	:param num_bits: number of bits
+	:return: NumPy array with the flipped bit of each step (2^num_bits - 1 steps)
+	"""
+
+	steps = np.arange(1, 2 ** num_bits)
+
+	return np.log2(steps & -steps).astype(int)
+
+
+def get_exact_inner_energies(inner_qubo_matrix):
+	"""
+	This function returns all the states of the inner qubits of the exact solver and their energies. They are the same
+	for all the chunks, so they are cached (see exact_inner_energies_cache)
+	:param inner_qubo_matrix: QUBO matrix of the inner qubits (NumPy)
+	:return: NumPy arrays with the states (integers), their qubit values (states x qubits) and their energies
+	"""
+
+	key = (inner_qubo_matrix.shape, inner_qubo_matrix.tobytes())
+	if key not in exact_inner_energies_cache:
+		inner_codes = np.arange(2 ** len(inner_qubo_matrix), dtype=np.int64)
+		inner_bits = ((inner_codes[:, None] >> np.arange(len(inner_qubo_matrix))) & 1).astype(float)
+		inner_energies = ((inner_bits @ inner_qubo_matrix) * inner_bits).sum(axis=1)
+		exact_inner_energies_cache.clear()
+		exact_inner_energies_cache[key] = (inner_codes, inner_bits, inner_energies)
+
+	return exact_inner_energies_cache[key]
+
+
+def get_exact_chunk_states(qubo_matrix, num_inner_qubits, num_prefix_qubits, prefix, num_states, deadline=None):
+	"""
+	This function enumerates all the states of one chunk (the highest num_prefix_qubits qubits fixed to prefix) and
+	returns the num_states lowest ones. All the states of the lowest num_inner_qubits qubits are evaluated at once as a
+	vector: their energies are the precalculated energies of the inner qubits plus the linear term given by the rest of
+	qubits. The rest of qubits (middle qubits) are enumerated in Gray code order, so that only one qubit changes between
+	consecutive vectors and the energy and fields are updated incrementally (O(number of qubits)).
+	:param qubo_matrix: QUBO matrix (NumPy)
+	:param num_inner_qubits: number of qubits enumerated as a vector
+	:param num_prefix_qubits: number of highest qubits fixed in the chunk
+	:param prefix: value of the highest qubits (integer)
+	:param num_states: number of lowest energy states returned
+	:param deadline: deadline (time.perf_counter, system-wide clock, so that it is valid in the processes of a pool).
+	When it expires, the enumeration of the chunk stops (at least the first vector of the inner qubits is evaluated)
+	:return: NumPy arrays with the energies and the states (integers, qubit i is bit i) of the lowest states, and the
+	number of states enumerated
+	"""
+
+	total_num_qubits = len(qubo_matrix)
+	couplings = qubo_matrix + qubo_matrix.T
+	linear = np.diag(qubo_matrix).copy()
+	np.fill_diagonal(couplings, 0)
+	inner = np.arange(num_inner_qubits)
+	outer = np.arange(num_inner_qubits, total_num_qubits)
+	num_middle_qubits = total_num_qubits - num_inner_qubits - num_prefix_qubits
+
+	# Energies of all the states of the inner qubits (outer qubits at zero)
+	inner_codes, inner_bits, inner_energies = get_exact_inner_energies(qubo_matrix[np.ix_(inner, inner)])
+
+	# Outer qubits: middle qubits at zero and prefix
+	outer_state = np.zeros(len(outer))
+	outer_state[num_middle_qubits:] = (prefix >> np.arange(num_prefix_qubits)) & 1
+	outer_fields = linear[outer] + couplings[np.ix_(outer, outer)] @ outer_state
+	outer_energy = outer_state @ (linear[outer] + outer_fields) / 2
+	inner_linear = couplings[np.ix_(inner, outer)] @ outer_state      # linear term of the inner qubits
+	outer_code = int(prefix) << num_middle_qubits
+
+	best_energies = np.empty(0)
+	best_states = np.empty(0, dtype=np.int64)
+	middle_flips = get_gray_code_flips(num_middle_qubits)
+
+	num_steps = 2 ** num_middle_qubits
+	for step in range(num_steps):
+		if step > 0:
+			if deadline is not None and time.perf_counter() >= deadline:
+				num_steps = step
+				break
+			qubit = middle_flips[step - 1]
+			direction = 1 - 2 * outer_state[qubit]
+			outer_energy += direction * outer_fields[qubit]
+			outer_state[qubit] += direction
+			outer_fields += direction * couplings[outer, outer[qubit]]
+			inner_linear += direction * couplings[inner, outer[qubit]]
+			outer_code ^= 1 << qubit
+
+		energies = inner_energies + inner_bits @ inner_linear + outer_energy
+
+		# Only the states lower than the highest of the best states found are kept
+		if len(best_energies) == num_states:
+			candidates = np.flatnonzero(energies < best_energies.max())
+			if len(candidates) == 0:
+				continue
+		else:
+			candidates = np.arange(len(energies))
+		energies = np.concatenate((best_energies, energies[candidates]))
+		states = np.concatenate((best_states, (outer_code << num_inner_qubits) | inner_codes[candidates]))
+		if len(energies) > num_states:
+			lowest = np.argpartition(energies, num_states - 1)[:num_states]
+			energies, states = energies[lowest], states[lowest]
+		best_energies, best_states = energies, states
+
+	return best_energies, best_states, num_steps * len(inner_codes)
+
+
+def get_exact_chunk_results_with_budget(arguments, max_workers, deadline):
+	"""
+	This function enumerates the chunks of the exact solver until the deadline. The chunks being enumerated stop at the
+	deadline (partially enumerated) and the chunks not started yet are skipped; the processes of the pool are finished
+	before returning, so that they do not compete with the next solvers. At least one chunk is (partially) enumerated.
+	:param arguments: list of arguments of get_exact_chunk_states of each chunk (without deadline)
+	:param max_workers: number of processes of the pool (if 1, chunks are enumerated sequentially in this process)
+	:param deadline: deadline (time.perf_counter)
+	:return: list of results of the chunks enumerated (see get_exact_chunk_states)
+	"""
+
+	if max_workers == 1 or len(arguments) == 1:
+		chunk_results = []
+		for argument in arguments:
+			if chunk_results and time.perf_counter() >= deadline:
+				break
+			chunk_results.append(get_exact_chunk_states(*argument, deadline=deadline))
+		return chunk_results
+
+	executor = ProcessPoolExecutor(max_workers=max_workers)
+	try:
+		futures = [executor.submit(get_exact_chunk_states, *argument, deadline=deadline) for argument in arguments]
+		wait(futures, timeout=max(deadline - time.perf_counter(), 0))
+	finally:
+		# The chunks not started are cancelled and the running ones stop at the deadline, the processes are joined
+		executor.shutdown(wait=True, cancel_futures=True)
+
+	chunk_results = [future.result() for future in futures if future.done() and not future.cancelled()]
+	if not chunk_results:
+		chunk_results.append(get_exact_chunk_states(*arguments[0], deadline=deadline))
+
+	return chunk_results
+
+
+def get_local_exact_solution(total_num_qubits, qubo_matrix, num_states=10, max_workers=None, max_num_qubits=32,
+                             time_budget_s=None):
+	"""
+	This function finds the exact minimum of the QUBO matrix (and the lowest energy states) by enumerating all the
+	states in Gray code order. The states are split in chunks (highest qubits fixed) solved in a process pool. It is
+	intended to validate the results of the annealer solvers (encoding error vs. sampling error), as its time grows
+	as 2^number of qubits.
+	:param total_num_qubits: total number of qubits used in QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_states: number of lowest energy states returned (by default, 10)
+	:param max_workers: number of processes of the pool (by default, number of CPUs). If 1, chunks are enumerated
+	sequentially in this process
+	:param max_num_qubits: maximum number of qubits allowed (by default, 32)
+	:param time_budget_s: time budget in seconds (by default, no budget). The states are split in smaller chunks and,
+	when the budget expires, the enumeration stops (see get_exact_chunk_results_with_budget); the lowest energy states
+	found are returned as partial result (not necessarily the exact minimum)
+	:return: it returns the response (see get_aggregated_response) with the lowest energy states, one occurrence each
+	"""
+
+	num_states = 10 if num_states is None else num_states
+	if total_num_qubits > max_num_qubits:
+		raise Exception("Number of qubits too large for exact solver : {}".format(total_num_qubits))
+
+	qubo_matrix = csr_matrix(qubo_matrix, dtype=float).toarray()
+	if len(qubo_matrix) != total_num_qubits:
+		raise Exception("Number of qubits not valid : {}".format(total_num_qubits))
+	num_states = min(num_states, 2 ** total_num_qubits)
+
+	num_inner_qubits = min(total_num_qubits, 16)
+	num_prefix_qubits = min(total_num_qubits - num_inner_qubits,
+	                        EXACT_PREFIX_QUBITS if time_budget_s is None else EXACT_BUDGET_PREFIX_QUBITS)
+	arguments = [(qubo_matrix, num_inner_qubits, num_prefix_qubits, prefix, num_states)
+	             for prefix in range(2 ** num_prefix_qubits)]
+
+	time_start = time.perf_counter()
+	if time_budget_s is not None:
+		chunk_results = get_exact_chunk_results_with_budget(arguments, max_workers, time_start + time_budget_s)
+	elif max_workers == 1 or len(arguments) == 1:
+		chunk_results = [get_exact_chunk_states(*argument) for argument in arguments]
+	else:
+		with ProcessPoolExecutor(max_workers=max_workers) as executor:
+			chunk_results = list(executor.map(get_exact_chunk_states, *zip(*arguments)))
+
+	energies = np.concatenate([chunk_energies for chunk_energies, _, _ in chunk_results])
+	states = np.concatenate([chunk_states for _, chunk_states, _ in chunk_results])
+	num_states_enumerated = sum(chunk_num_states for _, _, chunk_num_states in chunk_results)
+	lowest = np.argsort(energies, kind='stable')[:num_states]
+	samples = ((states[lowest][:, None] >> np.arange(total_num_qubits)) & 1).astype(np.int8)
+
+	# With time budget, the reads of the anytime information are the states enumerated
+	info = {"num_states_enumerated": num_states_enumerated}
+	if time_budget_s is not None:
+		info["anytime"] = get_anytime_info(partial=num_states_enumerated < 2 ** total_num_qubits,
+		                                   reads=num_states_enumerated, requested_reads=2 ** total_num_qubits,
+		                                   chunks=len(chunk_results), time_start=time_start,
+		                                   time_budget_s=time_budget_s)
+
+	return get_aggregated_response(samples, get_qubo_energies(qubo_matrix, samples), info=info)
+
+
+class DigitalAnnealerSolution:
+	"""
+	This class stores one solution of the local digital annealer, with the same attributes as the solutions of the
+	Fujitsu Digital Annealer Simulator (configuration, energy and frequency), so that both responses are converted into
+	samples by get_da_samples (without importing Fujitsu DADK)
+	"""
+
+	def __init__(self, configuration, energy, frequency):
+		self.configuration = configuration
+		self.energy = energy
+		self.frequency = frequency
+
+
+class DigitalAnnealerSolutionList:
+	"""
+	This class stores the solutions of the local digital annealer, ordered by energy (same attribute solutions as the
+	response of the Fujitsu Digital Annealer Simulator). It also stores the merged responses, if any (see
+	get_merged_da_response)
+	"""
+
+	def __init__(self, solutions, info, responses=None):
+		self.solutions = solutions
+		self.info = info
+		self.responses = [] if responses is None else responses
+
+	def display_graphs(self):
+		"""
+		This function displays the graphs of the merged responses of the Fujitsu Digital Annealer Simulator (the local
+		digital annealer has no graphs)
+		"""
+
+		for response in self.responses:
+			if hasattr(response, "display_graphs"):
+				response.display_graphs()
+
+	def __str__(self):
+		return "\n".join("{:4d} occurrences: energy {}".format(solution.frequency, solution.energy)
+		                 for solution in self.solutions)
+
+
+def get_temperature_schedule(temperature_start, temperature_end, temperature_mode, number_steps):
+	"""
+	This function returns the temperature of each temperature step, from temperature_start to temperature_end, with
+	the cooling curve of the temperature mode (continuous form of the temperature reduction of each mode):
+		EXPONENTIAL: T(k+1) = T(k) * (1 - decay)             -> T(k) = T0 * (Tend / T0)^(k / n)
+		INVERSE: T(k+1) = T(k) * (1 - decay * T(k))          -> 1 / T(k) = 1 / T0 + k / n * (1 / Tend - 1 / T0)
+		INVERSE_ROOT: T(k+1) = T(k) * (1 - decay * T(k)^2)   -> 1 / T(k)^2 = 1 / T0^2 + k / n * (1 / Tend^2 - 1 / T0^2)
+	:param temperature_start: start temperature
+	:param temperature_end: end temperature
+	:param temperature_mode: temperature mode (EXPONENTIAL, INVERSE or INVERSE_ROOT)
+	:param number_steps: number of temperature steps
+	:return: NumPy array with the temperature of each step
+	"""
+
+	fraction = np.arange(number_steps) / max(1, number_steps - 1)
+	if temperature_mode == TemperatureMode.EXPONENTIAL:
+		return temperature_start * (temperature_end / temperature_start) ** fraction
+	if temperature_mode == TemperatureMode.INVERSE:
+		return 1 / (1 / temperature_start + fraction * (1 / temperature_end - 1 / temperature_start))
+	if temperature_mode == TemperatureMode.INVERSE_ROOT:
+		return 1 / np.sqrt(1 / temperature_start ** 2 + fraction * (1 / temperature_end ** 2 -
+		                                                           1 / temperature_start ** 2))
+	raise Exception("Temperature mode not valid : {}".format(temperature_mode))
+
+
+def get_local_da_solution(annealer_solution, total_num_qubits, qubo_matrix, num_reads=125, number_iterations=500,
+                          temperature_start=0.01, temperature_end=0.00001, temperature_mode=TemperatureMode.EXPONENTIAL,
+                          temperature_interval=1, offset_increase_rate=0.0005, scaling_bit_precision=None,
+                          auto_tuning=None, graphics=None, seed=None):
+	"""
+	This function solves the QUBO matrix with the algorithm of the Digital Annealer, with the same parameters as
+	get_fujitsu_solution. In each iteration, the flip of every qubit is tried in parallel, with acceptance probability
+	min(1, exp(-(delta - offset) / T)), and one of the accepted flips is chosen randomly. If no flip is accepted, the
+	dynamic offset is increased by offset_increase_rate (escape from local minima); it is reset to 0 after a flip.
+	Temperature is reduced every temperature_interval iterations. All the runs are vectorized with NumPy. The best state
+	of each run is returned.
+	:param annealer_solution: annealer solver (LOCAL_DA)
+	:param total_num_qubits: total number of qubits used in QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_reads: number of runs (by default, 125)
+	:param number_iterations: number of iterations of each run (by default, 500)
+	:param temperature_start: temperature start (by default 0.01)
+	:param temperature_end: temperature end (by default 0.00001)
+	:param temperature_mode: how the temperature drops (by default, EXPONENTIAL)
+	:param temperature_interval: number of iterations keeping the temperature constant (by default, 1)
+	:param offset_increase_rate: offset increase rate (by default 0.0005, if 0, not used)
+	:param scaling_bit_precision: not used (the QUBO matrix is not scaled to integer values), kept for compatibility
+	:param auto_tuning: not used, kept for compatibility
+	:param graphics: not used, kept for compatibility
+	:param seed: seed of the random generator
+	:return: it returns the response (DigitalAnnealerSolutionList), which is converted into samples by get_da_samples
+	"""
+
+	if annealer_solution != AnnealerSolution.LOCAL_DA:
+		raise Exception("Annealer not found : {}".format(annealer_solution))
+
+	num_reads = 125 if num_reads is None else num_reads
+	number_iterations = 500 if number_iterations is None else number_iterations
+	temperature_start = 0.01 if temperature_start is None else temperature_start
+	temperature_end = 0.00001 if temperature_end is None else temperature_end
+	temperature_mode = TemperatureMode.EXPONENTIAL if temperature_mode is None else temperature_mode
+	temperature_interval = 1 if temperature_interval is None else temperature_interval
+	offset_increase_rate = 0.0005 if offset_increase_rate is None else offset_increase_rate
+	rng = np.random.default_rng(seed)
+
+	qubo_matrix = csr_matrix(qubo_matrix, dtype=float).toarray()
+	if len(qubo_matrix) != total_num_qubits:
+		raise Exception("Number of qubits not valid : {}".format(total_num_qubits))
+	# Digital Annealer is fully connected: dense couplings W = Q + Q^T without diagonal
+	linear = np.diag(qubo_matrix).copy()
+	couplings = qubo_matrix + qubo_matrix.T
+	np.fill_diagonal(couplings, 0)
+
+	number_steps = -(-number_iterations // temperature_interval)
+	temperatures = get_temperature_schedule(temperature_start, temperature_end, temperature_mode, number_steps)
+
+	runs = np.arange(num_reads)
+	states = np.zeros((num_reads, total_num_qubits), dtype=np.int8)
+	local_fields = np.tile(linear, (num_reads, 1))
+	energies = np.zeros(num_reads)
+	offsets = np.zeros(num_reads)
+	best_states = states.copy()
+	best_energies = energies.copy()
+
+	for iteration in range(number_iterations):
+		temperature = temperatures[iteration // temperature_interval]
+		deltas = (1 - 2 * states) * local_fields
+
+		# Parallel trial: all the flips are evaluated at once, delta - offset < -T log(u)
+		accepted = deltas - offsets[:, None] <= -temperature * np.log(1.0 - rng.random(deltas.shape))
+		any_accepted = accepted.any(axis=1)
+		offsets = np.where(any_accepted, 0, offsets + offset_increase_rate)
+
+		# One of the accepted flips of each run is chosen randomly
+		flips = np.where(accepted, rng.random(deltas.shape), -1).argmax(axis=1)
+		flipping_runs = runs[any_accepted]
+		flipping_qubits = flips[any_accepted]
+		directions = 1 - 2 * states[flipping_runs, flipping_qubits]
+		energies[flipping_runs] += deltas[flipping_runs, flipping_qubits]
+		states[flipping_runs, flipping_qubits] ^= 1
+		local_fields[flipping_runs] += directions[:, None] * couplings[flipping_qubits]
+
+		improved = energies < best_energies
+		best_states[improved] = states[improved]
+		best_energies[improved] = energies[improved]
+
+	response = get_aggregated_response(best_states, get_qubo_energies(qubo_matrix, best_states))
+	solutions = [DigitalAnnealerSolution(list(sample), float(energy), int(frequency)) for sample, energy, frequency
+	             in zip(response["samples"], response["energies"], response["num_occurrences"])]
+	info = {"temperatures": temperatures, "number_iterations": number_iterations}
+
+	return DigitalAnnealerSolutionList(solutions, info)
+
+
+def get_merged_da_response(responses):
+	"""
+	This function merges the responses of several executions of the local Digital Annealer (for instance, parts of the
+	runs executed in parallel) into one response
+	:param responses: list of responses (DigitalAnnealerSolutionList or SolutionList of Fujitsu)
+	:return: merged response (DigitalAnnealerSolutionList), the frequencies of the same configuration are added. The
+	responses are kept in it, so that the graphs of Fujitsu are still displayed with display_graphs
+	"""
+
+	solution_dict = {}
+	for response in responses:
+		for solution in response.solutions:
+			key = tuple(solution.configuration)
+			if key in solution_dict:
+				solution_dict[key].frequency += solution.frequency
+			else:
+				solution_dict[key] = DigitalAnnealerSolution(list(solution.configuration), solution.energy,
+				                                             solution.frequency)
+
+	solutions = sorted(solution_dict.values(), key=lambda solution: solution.energy)
+
+	return DigitalAnnealerSolutionList(solutions, {"merged_info": [getattr(response, "info", None)
+	                                                                for response in responses]}, responses=responses)
+
+
+def get_da_samples(response):
+	"""
+	This function converts the response of the Digital Annealer (local Digital Annealer or Fujitsu Digital Annealer
+	Simulator, same attributes) into samples, in the order of the response
+	:param response: response (DigitalAnnealerSolutionList or SolutionList of Fujitsu)
+	:return: dictionary with the samples (NumPy array with the qubit values), their energies and number of occurrences
+	"""
+
+	solutions = response.solutions
+
+	return {"samples": np.array([np.asarray(solution.configuration, dtype=np.int8) for solution in solutions]),
+	        "energies": np.array([solution.energy for solution in solutions], dtype=float),
+	        "num_occurrences": np.array([solution.frequency for solution in solutions], dtype=int)}
+
+
+def get_default_subproblem_sample(qubo_matrix, initial_state):
+	"""
+	This function is the default solver of the subproblems of get_local_decomposition_solution: exact enumeration for
+	subproblems up to EXACT_SUBPROBLEM_QUBITS qubits and a short batch of simulated annealing reads for larger ones.
+	The random generator is seeded with the initial state, so that the same subproblem gives the same solution.
+	:param qubo_matrix: QUBO matrix of the subproblem
+	:param initial_state: current qubit values of the subproblem
+	:return: NumPy array with the qubit values of the best solution (the initial state if it is not improved)
+	"""
+
+	num_qubits = len(qubo_matrix)
+	initial_state = np.asarray(initial_state, dtype=np.int8)
+	if num_qubits <= EXACT_SUBPROBLEM_QUBITS:
+		energies, states, _ = get_exact_chunk_states(np.asarray(qubo_matrix, dtype=float), num_qubits, 0, 0, 1)
+		energy, sample = energies[0], ((states[0] >> np.arange(num_qubits)) & 1).astype(np.int8)
+	else:
+		response = get_local_sa_solution(num_qubits, qubo_matrix, num_reads=SUBPROBLEM_SA_READS,
+		                                 num_sweeps=SUBPROBLEM_SA_SWEEPS, seed=np.packbits(initial_state))
+		energy, sample = response["energies"][0], response["samples"][0]
+
+	if get_qubo_energies(qubo_matrix, initial_state[None, :])[0] <= energy:
+		return initial_state
+
+	return sample
+
+
+def get_subproblem_qubo(couplings, linear, local_fields, state, qubits):
+	"""
+	This function returns the QUBO matrix of the subproblem of the selected qubits, with the rest of qubits clamped to
+	their current values: the couplings with the clamped qubits are added to the linear terms
+	(h'_i = h_i + sum of W_ij q_j for the clamped qubits j = f_i - sum of W_ij q_j for the qubits j of the subproblem)
+	:param couplings: matrix W = Q + Q^T without diagonal (SciPy sparse)
+	:param linear: linear terms
+	:param local_fields: current local fields of all the qubits
+	:param state: current qubit values
+	:param qubits: indexes of the qubits of the subproblem
+	:return: QUBO matrix of the subproblem (NumPy, upper triangular)
+	"""
+
+	sub_couplings = couplings[qubits][:, qubits].toarray()
+	sub_linear = local_fields[qubits] - sub_couplings @ state[qubits]
+	sub_qubo_matrix = np.triu(sub_couplings, 1)
+	sub_qubo_matrix[np.diag_indices(len(qubits))] = sub_linear
+
+	return sub_qubo_matrix
+
+
+def get_subproblems(deltas, couplings, subproblem_size, qubit_blocks=None, rng=None):
+	"""
+	This function splits the qubits in subproblems ordered by energy impact: qubits (or blocks of qubits) whose flip
+	changes the energy the least are the ones most likely to be wrong, so they are selected first. Each subproblem
+	starts with the first block not selected yet and grows with the blocks coupled to it (breadth first search on the
+	couplings), so that strongly related qubits are solved together.
+	:param deltas: energy change of the flip of each qubit
+	:param couplings: matrix W = Q + Q^T without diagonal (SciPy sparse)
+	:param subproblem_size: maximum number of qubits of each subproblem
+	:param qubit_blocks: list of blocks of qubits kept together in the same subproblem (for instance, the qubits of each
+	variable, see get_qubits_per_variable). By default, each qubit is one block
+	:param rng: NumPy random generator. If provided, blocks are selected in random order instead of energy impact order
+	(different split of the qubits, used when the previous iteration did not improve the solution)
+	:return: list of subproblems (NumPy arrays of qubit indexes)
+	"""
+
+	if qubit_blocks is None:
+		qubit_blocks = [[qubit] for qubit in range(len(deltas))]
+	block_of_qubit = np.empty(len(deltas), dtype=int)
+	for block_index, block in enumerate(qubit_blocks):
+		block_of_qubit[block] = block_index
+	if rng is None:
+		order = sorted(range(len(qubit_blocks)), key=lambda block_index: np.min(deltas[qubit_blocks[block_index]]))
+	else:
+		order = rng.permutation(len(qubit_blocks))
+
+	selected = np.zeros(len(qubit_blocks), dtype=bool)
+	subproblems = []
+	for first_block in order:
+		if selected[first_block]:
+			continue
+		current = []
+		queue = [first_block]
+		selected[first_block] = True
+		while queue:
+			block_index = queue.pop(0)
+			if current and len(current) + len(qubit_blocks[block_index]) > subproblem_size:
+				selected[block_index] = False
+				continue
+			current.extend(qubit_blocks[block_index])
+			for qubit in qubit_blocks[block_index]:
+				neighbours = couplings.indices[couplings.indptr[qubit]:couplings.indptr[qubit + 1]]
+				for neighbour_block in block_of_qubit[neighbours]:
+					if not selected[neighbour_block]:
+						selected[neighbour_block] = True
+						queue.append(neighbour_block)
+		subproblems.append(np.array(current))
+
+	return subproblems
+
+
+def get_local_decomposition_solution(total_num_qubits, qubo_matrix, num_reads=1, sub_sampler=None, subproblem_size=50,
+                                     qubit_blocks=None, max_iterations=None, convergence_iterations=3, num_workers=None,
+                                     seed=None, time_budget_s=None):
+	"""
+	This function solves QUBO problems larger than the solvers can handle at once, by decomposition (as qbsolv). In
+	each iteration, the qubits are split in subproblems ordered by energy impact (random order if the previous iteration
+	did not improve); each subproblem is solved with the rest of qubits clamped to their current values, and its
+	solution is accepted if the energy of the whole problem decreases. Iterations are repeated until the energy does not
+	decrease in convergence_iterations iterations.
+	The subproblems of one iteration are solved from the same state, in parallel if num_workers is greater than 1, and
+	their solutions are accepted one by one, checking the energy change with the state already updated.
+	:param total_num_qubits: total number of qubits used in QUBO matrix
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:param num_reads: number of independent runs, from random states (by default, 1)
+	:param sub_sampler: function (qubo_matrix, initial_state) which returns the qubit values (NumPy array) of the
+	solution of a subproblem. It must be picklable to be run in parallel. By default, see get_default_subproblem_sample
+	:param subproblem_size: maximum number of qubits of each subproblem (by default, 50)
+	:param qubit_blocks: list of blocks of qubits kept in the same subproblem (for instance, the qubits of each
+	variable). By default, qubits are selected individually
+	:param max_iterations: maximum number of iterations of each run (by default, DECOMPOSITION_MAX_ITERATIONS)
+	:param convergence_iterations: number of iterations without improvement to stop (by default, 3)
+	:param num_workers: number of processes to solve the subproblems (by default, 1)
+	:param seed: seed of the random generator
+	:param time_budget_s: time budget in seconds (by default, no budget). When it expires, the current run stops after
+	its iteration and the next runs are skipped (at least one iteration is solved); the best states found are returned
+	as partial result
+	:return: it returns the response (see get_aggregated_response) with the best state of each run
+	"""
+
+	num_reads = 1 if num_reads is None else num_reads
+	sub_sampler = get_default_subproblem_sample if sub_sampler is None else sub_sampler
+	subproblem_size = 50 if subproblem_size is None else subproblem_size
+	max_iterations = DECOMPOSITION_MAX_ITERATIONS if max_iterations is None else max_iterations
+	rng = np.random.default_rng(seed)
+
+	qubo_matrix = csr_matrix(qubo_matrix, dtype=float)
+	if qubo_matrix.shape[0] != total_num_qubits:
+		raise Exception("Number of qubits not valid : {}".format(total_num_qubits))
+	linear = qubo_matrix.diagonal()
+	couplings = (qubo_matrix + qubo_matrix.T).tolil()
+	couplings.setdiag(0)
+	couplings = couplings.tocsr()
+
+	executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers is not None and num_workers > 1 else None
+	states = np.zeros((num_reads, total_num_qubits), dtype=np.int8)
+	iterations = []
+	time_start = time.perf_counter()
+	deadline = None if time_budget_s is None else time_start + time_budget_s
+	partial = False
+	try:
+		for read in range(num_reads):
+			if deadline is not None and read > 0 and time.perf_counter() >= deadline:
+				partial = True
+				break
+			state = rng.integers(0, 2, size=total_num_qubits, dtype=np.int8)
+			local_fields = get_local_fields(linear, couplings, state[None, :])[0]
+
+			iterations_without_improvement = 0
+			iteration = 0
+			while iteration < max_iterations and iterations_without_improvement < convergence_iterations:
+				iteration += 1
+				subproblems = get_subproblems((1 - 2 * state) * local_fields, couplings, subproblem_size, qubit_blocks,
+				                              rng if iterations_without_improvement > 0 else None)
+				sub_qubo_matrices = [get_subproblem_qubo(couplings, linear, local_fields, state, qubits)
+				                     for qubits in subproblems]
+				initial_states = [state[qubits] for qubits in subproblems]
+				if executor is None:
+					sub_states = [sub_sampler(*argument) for argument in zip(sub_qubo_matrices, initial_states)]
+				else:
+					sub_states = list(executor.map(sub_sampler, sub_qubo_matrices, initial_states))
+
+				improved = False
+				for qubits, sub_state in zip(subproblems, sub_states):
+					sub_state = np.asarray(sub_state, dtype=np.int8)
+					changes = sub_state.astype(float) - state[qubits]
+					if not changes.any():
+						continue
+					# Energy change with the current state (it may have changed with previous subproblems)
+					sub_qubo_matrix = get_subproblem_qubo(couplings, linear, local_fields, state, qubits)
+					energy_change = get_qubo_energies(sub_qubo_matrix, np.array([sub_state, state[qubits]]))
+					if energy_change[0] < energy_change[1] - 1e-12:
+						state[qubits] = sub_state
+						local_fields += couplings[:, qubits] @ changes
+						improved = True
+
+				iterations_without_improvement = 0 if improved else iterations_without_improvement + 1
+				if deadline is not None and time.perf_counter() >= deadline and \
+						iteration < max_iterations and iterations_without_improvement < convergence_iterations:
+					partial = True
+					break
+
+			states[read] = state
+			iterations.append(iteration)
+	finally:
+		if executor is not None:
+			executor.shutdown()
+
+	states = states[:len(iterations)]
+	info = {"iterations": iterations, "subproblem_size": subproblem_size}
+	if time_budget_s is not None:
+		info["anytime"] = get_anytime_info(partial=partial, reads=len(iterations), requested_reads=num_reads,
+		                                   chunks=len(iterations), time_start=time_start, time_budget_s=time_budget_s)
+
+	return get_aggregated_response(states, get_qubo_energies(qubo_matrix, states), info=info)
+
+
+def process_local_results(list_of_variables, method, response, num_qubits_dict):
+	"""
+	This function processes the response of the local solvers and rebuilds the values of the variables from the qubit
+	values of each sample
+	:param list_of_variables: list of variables (x vector), in symbolic format
+	:param method: method used (method 1 or same number of qubits for integer and fractional parts or method 2 or one
+	qubit dedicated to the sign and the rest for the absolute value)
+	:param response: response provided by the local solver
+	:param num_qubits_dict: information of number of qubits used for integer/fractional part of each variable.
+	:return: it returns a dictionary with the processed information of the results, ordered with this format (result_1
+	is the minimum energy solution obtained:
+	Example:
+	{'result_1': {V1: 3, V2: 1, I_V1: -2, 'occurrences': 73, 'energy': -9.0},
+	'result_2': {V1: 3, V2: 1, I_V1: -1, 'occurrences': 23, 'energy': -8.0}, etc
+	"""
+
+	return get_results_from_samples(list_of_variables=list_of_variables, method=method, samples_dict=response,
+	                                num_qubits_dict=num_qubits_dict)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with AC small-signal analysis (frequency sweep) of the circuit described by Modified Nodal Analysis. A(s) is
+compiled once in its numeric terms A0 + s * A1 and evaluated at s = j*w for all the frequencies as a vectorized batch.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import splu
+from modified_nodal_analysis.mna_numeric import get_numeric_a_b_s_terms
+
+
+def get_ac_solution(a0_matrix, a1_matrix, b_matrix, frequencies, sparse=False, chunk_size=1024):
+	"""
+	This function solves A(s) x = b at s = j*2*pi*f for every frequency f provided
+	:param a0_matrix: A0 matrix (NumPy), terms of A(s) independent of s
+	:param a1_matrix: A1 matrix (NumPy), terms of A(s) multiplied by s
+	:param b_matrix: b matrix (NumPy). Source values are used as AC amplitudes (phase 0)
+	:param frequencies: list/array of frequencies in Hz
+	:param sparse: if True, each point is solved by sparse LU reusing the sparsity pattern and the column ordering of
+	the first point. If False, the points are solved in batches of dense systems
+	:param chunk_size: number of frequencies solved in each dense batch (limits memory usage)
+	:return: complex NumPy array with the solution x of each frequency (number of frequencies x number of variables)
+	"""
+
+	s_values = 2j * np.pi * np.asarray(frequencies, dtype=float)
+	b_vector = np.asarray(b_matrix, dtype=complex)
+	dimension = len(b_vector)
+	x_values = np.empty((len(s_values), dimension), dtype=complex)
+
+	if not sparse:
+		for start in range(0, len(s_values), chunk_size):
+			s_chunk = s_values[start:start + chunk_size]
+			a_batch = a0_matrix[None, :, :] + s_chunk[:, None, None] * a1_matrix[None, :, :]
+			b_batch = np.broadcast_to(b_vector, (len(s_chunk), dimension))
+			x_values[start:start + chunk_size] = np.linalg.solve(a_batch, b_batch[:, :, None])[:, :, 0]
+		return x_values
+
+	# Sparsity pattern shared by all the frequencies (union of nonzero entries of A0 and A1)
+	rows, columns = np.nonzero((a0_matrix != 0) | (a1_matrix != 0))
+	pattern = coo_matrix((np.ones(len(rows)), (rows, columns)), shape=(dimension, dimension)).tocsc()
+	# position of each (row, column) of the pattern in the data array of the CSC matrix
+	data_index = coo_matrix((np.arange(1, len(rows) + 1), (rows, columns)), shape=(dimension, dimension)).tocsc()
+	data_index = data_index.data.astype(int) - 1
+	a0_data = a0_matrix[rows, columns][data_index]
+	a1_data = a1_matrix[rows, columns][data_index]
+
+	a_sparse = pattern.astype(complex)
+	column_order = None
+	for index, s_value in enumerate(s_values):
+		a_sparse.data = a0_data + s_value * a1_data
+		if column_order is None:
+			lu = splu(a_sparse)
+			column_order = lu.perm_c
+			inverse_order = np.argsort(column_order)
+			x_values[index] = lu.solve(b_vector)
+		else:
+			# the column ordering of the first point is reused, so that only the numeric factorization is repeated
+			lu = splu(a_sparse[:, column_order], permc_spec='NATURAL')
+			x_values[index] = lu.solve(b_vector)[inverse_order]
+
+	return x_values
+
+
+def get_ac_sweep(mna_matrix_gen, frequencies, sparse=False, chunk_size=1024, print_info=False):
+	"""
+	This function performs the AC sweep of a circuit already processed by MnaMatrixGenerator (get_a_b_x_matrix)
+	:param mna_matrix_gen: MnaMatrixGenerator object, once get_a_b_x_matrix has been called
+	:param frequencies: list/array of frequencies in Hz
+	:param sparse: True to solve each point with sparse LU (large circuits), False for dense batches
+	:param chunk_size: number of frequencies solved in each dense batch
+	:param print_info: True or False
+	:return: it returns a dictionary with the frequencies, the complex solution and the magnitude/phase of each
+	variable of x matrix with this format:
+	Example:
+	{'frequency': array([...]), 'x': array([[...]]),
+	V1: {'magnitude': array([...]), 'magnitude_db': array([...]), 'phase': array([...])}, etc
+	Phase is returned in degrees.
+	"""
+
+	a0_matrix, a1_matrix, b_matrix = get_numeric_a_b_s_terms(mna_matrix_gen)
+	frequencies = np.asarray(frequencies, dtype=float)
+
+	x_values = get_ac_solution(a0_matrix, a1_matrix, b_matrix, frequencies, sparse=sparse, chunk_size=chunk_size)
+
+	magnitude = np.abs(x_values)
+	with np.errstate(divide='ignore'):
+		magnitude_db = 20 * np.log10(magnitude)
+	phase = np.angle(x_values, deg=True)
+
+	ac_sweep_dict = {"frequency": frequencies, "x": x_values}
+	for variable_index, variable in enumerate(mna_matrix_gen.x_matrix):
+		ac_sweep_dict[variable] = {"magnitude": magnitude[:, variable_index],
+		                           "magnitude_db": magnitude_db[:, variable_index],
+		                           "phase": phase[:, variable_index]}
+
+	if print_info:
+		print(ac_sweep_dict)
+
+	return ac_sweep_dict
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with functions to turn the symbolic Modified Nodal Analysis matrices into numeric (NumPy) matrices, keeping the
+Laplace variable s apart so that the numeric matrices are built only once and reused by the analyses.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from sympy import Symbol, sqrt, diff
+
+
+def get_numeric_symbol_value_dict(mna_matrix_gen):
+	"""
+	This function returns the dictionary of symbol values of the circuit, adding the mutual inductance symbols (Mxx) of
+	the coupled inductors (Kxx), which are stamped in D matrix as s*Mxx but are not part of the netlist values
+	:param mna_matrix_gen: MnaMatrixGenerator object, once get_a_b_x_matrix has been called
+	:return: dictionary with the value of each symbol of the circuit
+	"""
+
+	symbol_value_dict = dict(mna_matrix_gen.get_symbol_value_dict())
+
+	# Mxx = k * sqrt(Lyy * Lzz), where k is the coupling coefficient provided in the netlist
+	for i in range(len(mna_matrix_gen.df)):
+		element = mna_matrix_gen.df.loc[i, 'element']
+		if element[0] == 'K':
+			l1_value = symbol_value_dict[Symbol(mna_matrix_gen.df.loc[i, 'Lname1'])]
+			l2_value = symbol_value_dict[Symbol(mna_matrix_gen.df.loc[i, 'Lname2'])]
+			symbol_value_dict[Symbol('M{:s}'.format(element[1:]))] = \
+				float(mna_matrix_gen.df.loc[i, 'value'] * sqrt(l1_value * l2_value))
+
+	return symbol_value_dict
+
+
+def get_numeric_matrix(symbolic_matrix, symbol_value_dict):
+	"""
+	This function substitutes the values of the symbols in a symbolic matrix and returns it in NumPy format
+	:param symbolic_matrix: sympy matrix (or list of expressions for a vector)
+	:param symbol_value_dict: dictionary with the value of each symbol
+	:return: NumPy array (float)
+	"""
+
+	if hasattr(symbolic_matrix, 'tolist'):
+		# sympy matrix
+		numeric_matrix = np.array(symbolic_matrix.subs(symbol_value_dict).tolist(), dtype=object)
+	else:
+		# list of expressions (b or x matrices are handled as lists in MnaMatrixGenerator)
+		numeric_matrix = np.array([expr.subs(symbol_value_dict) if hasattr(expr, 'subs') else expr
+		                           for expr in symbolic_matrix], dtype=object)
+
+	free_symbols = set()
+	for expr in numeric_matrix.flat:
+		if hasattr(expr, 'free_symbols'):
+			free_symbols |= expr.free_symbols
+	if free_symbols:
+		raise Exception("Symbols without value : {}".format(sorted(free_symbols, key=str)))
+
+	return numeric_matrix.astype(float)
+
+
+def get_a_matrix_s_terms(a_matrix, s, symbol_value_dict):
+	"""
+	This function splits the A matrix returned by Modified Nodal Analysis in its numeric terms A(s) = A0 + s * A1. The
+	stamps of the passive elements are at most linear in s (s*C for capacitors, -s*L for inductors and -s*M for coupled
+	inductors), so A0 and A1 fully describe A(s).
+	:param a_matrix: A matrix (symbolic) returned by Modified Nodal Analysis
+	:param s: Laplace variable (symbol) used in A matrix
+	:param symbol_value_dict: dictionary with the value of each symbol of the circuit
+	:return: A0 and A1 matrices in NumPy format
+	"""
+
+	a_matrix_values = a_matrix.subs(symbol_value_dict)
+	a1_matrix = a_matrix_values.applyfunc(lambda expr: diff(expr, s))
+
+	if any(diff(expr, s) != 0 for expr in a1_matrix):
+		raise Exception("A matrix is not linear in {}".format(s))
+
+	a0_matrix = get_numeric_matrix(a_matrix_values.subs(s, 0), {})
+	a1_matrix = get_numeric_matrix(a1_matrix, {})
+
+	return a0_matrix, a1_matrix
+
+
+def get_numeric_a_b_s_terms(mna_matrix_gen):
+	"""
+	This function returns the numeric A0, A1 (A(s) = A0 + s * A1) and b matrices of a circuit already processed by
+	MnaMatrixGenerator (get_a_b_x_matrix)
+	:param mna_matrix_gen: MnaMatrixGenerator object, once get_a_b_x_matrix has been called
+	:return: A0, A1 and b matrices in NumPy format
+	"""
+
+	symbol_value_dict = get_numeric_symbol_value_dict(mna_matrix_gen)
+	a0_matrix, a1_matrix = get_a_matrix_s_terms(mna_matrix_gen.a_matrix, mna_matrix_gen.s, symbol_value_dict)
+	b_matrix = get_numeric_matrix(mna_matrix_gen.z_matrix, symbol_value_dict)
+
+	return a0_matrix, a1_matrix, b_matrix
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with sensitivity analysis (adjoint method) of the variables of the circuit with respect to all the component
+values of the netlist.
+
+Given A x = b, the sensitivity of an output y = x[o] with respect to a component value p is:
+	dy/dp = lambda^T (db/dp - dA/dp x), where A^T lambda = e_o (adjoint system)
+so, for each output, only one forward solve (shared by all outputs) and one adjoint solve are required, independently
+of the number of components. A is factorized only once.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from sympy import Symbol, sqrt, diff
+from modified_nodal_analysis.mna_numeric import get_numeric_symbol_value_dict, get_a_matrix_s_terms, \
+	get_numeric_matrix
+
+
+def get_element_symbols(mna_matrix_gen):
+	"""
+	This function returns the symbols of all the elements of the netlist (rows of the data frame) and the substitution
+	of the mutual inductance symbols (Mxx) by the coupling coefficient and inductances, Mxx = Kxx * sqrt(Lyy * Lzz),
+	so that the sensitivity with respect to Kxx, Lyy and Lzz includes the mutual inductance
+	:param mna_matrix_gen: MnaMatrixGenerator object, once get_a_b_x_matrix has been called
+	:return: list of element symbols and dictionary with the substitution of mutual inductance symbols
+	"""
+
+	element_symbols = []
+	mutual_inductance_dict = {}
+	for i in range(len(mna_matrix_gen.df)):
+		element = mna_matrix_gen.df.loc[i, 'element']
+		element_symbols.append(Symbol(element))
+		if element[0] == 'K':
+			mutual_inductance_dict[Symbol('M{:s}'.format(element[1:]))] = \
+				Symbol(element) * sqrt(Symbol(mna_matrix_gen.df.loc[i, 'Lname1']) *
+				                       Symbol(mna_matrix_gen.df.loc[i, 'Lname2']))
+
+	return element_symbols, mutual_inductance_dict
+
+
+def get_derivative_entries(symbolic_entries, element_symbols, symbol_value_dict):
+	"""
+	This function returns the numeric derivative of the nonzero entries of a symbolic matrix with respect to each
+	element symbol. Only the entries which depend on the element are returned (stamps are sparse).
+	:param symbolic_entries: dictionary {index: symbolic expression} with the nonzero entries
+	:param element_symbols: list of element symbols
+	:param symbol_value_dict: dictionary with the value of each symbol (including s)
+	:return: dictionary {element symbol: list of (index, derivative value)}
+	"""
+
+	derivative_dict = {element_symbol: [] for element_symbol in element_symbols}
+	for index, expr in symbolic_entries.items():
+		for element_symbol in expr.free_symbols & set(element_symbols):
+			derivative_dict[element_symbol].append(
+				(index, complex(diff(expr, element_symbol).subs(symbol_value_dict))))
+
+	return derivative_dict
+
+
+def get_sensitivities(mna_matrix_gen, output_variables=None, s_value=0, normalized=False, print_info=False):
+	"""
+	This function returns the sensitivities of the output variables with respect to every element of the netlist,
+	using the numeric A matrix (factorized once), one forward solve and one adjoint solve per output variable
+	:param mna_matrix_gen: MnaMatrixGenerator object, once get_a_b_x_matrix has been called
+	:param output_variables: list of variables of x matrix (symbolic). By default, all the variables
+	:param s_value: value of the Laplace variable s (by default, 0, DC operating point). For AC sensitivities,
+	s = j*2*pi*f and the returned sensitivities are complex
+	:param normalized: if True, normalized sensitivities (p / y) * dy/dp are returned (N/A if y is 0)
+	:param print_info: True or False
+	:return: it returns a dictionary with the sensitivity of each output variable with respect to each element with
+	numeric value (elements without value, such as op amps, are not included):
+	Example:
+	{V2: {R1: -0.5, R2: 0.5, V1: 0.5}, I_V1: {R1: 0.25, R2: -0.25, V1: -0.5}}
+	"""
+
+	if output_variables is None:
+		output_variables = mna_matrix_gen.x_matrix
+
+	symbol_value_dict = get_numeric_symbol_value_dict(mna_matrix_gen)
+	element_symbols, mutual_inductance_dict = get_element_symbols(mna_matrix_gen)
+	# Elements without numeric value (op amps) have no parameter, so there is no sensitivity with respect to them
+	element_symbols = [element_symbol for element_symbol in element_symbols
+	                   if np.isfinite(symbol_value_dict[element_symbol])]
+
+	# Numeric A and b matrices
+	a0_matrix, a1_matrix = get_a_matrix_s_terms(mna_matrix_gen.a_matrix, mna_matrix_gen.s, symbol_value_dict)
+	a_matrix = a0_matrix + s_value * a1_matrix
+	b_matrix = get_numeric_matrix(mna_matrix_gen.z_matrix, symbol_value_dict)
+	is_complex = np.iscomplexobj(a_matrix)
+
+	# Derivatives of the stamps of A and b with respect to every element
+	evaluation_dict = dict(symbol_value_dict)
+	evaluation_dict[mna_matrix_gen.s] = s_value
+	a_symbolic_matrix = mna_matrix_gen.a_matrix.subs(mutual_inductance_dict)
+	a_entries = {(i, j): a_symbolic_matrix[i, j] for i in range(a_symbolic_matrix.rows)
+	             for j in range(a_symbolic_matrix.cols) if a_symbolic_matrix[i, j] != 0}
+	b_entries = {i: expr for i, expr in enumerate(mna_matrix_gen.z_matrix) if expr != 0}
+	a_derivative_dict = get_derivative_entries(a_entries, element_symbols, evaluation_dict)
+	b_derivative_dict = get_derivative_entries(b_entries, element_symbols, evaluation_dict)
+
+	# A is factorized once: forward solve (x) and one adjoint solve per output (lambda)
+	lu_piv = lu_factor(a_matrix)
+	x_values = lu_solve(lu_piv, b_matrix)
+
+	sensitivity_dict = {}
+	for output_variable in output_variables:
+		output_index = mna_matrix_gen.x_matrix.index(output_variable)
+		unit_vector = np.zeros(len(b_matrix))
+		unit_vector[output_index] = 1
+		adjoint_values = lu_solve(lu_piv, unit_vector, trans=1)
+
+		sensitivity_dict[output_variable] = {}
+		for element_symbol in element_symbols:
+			# lambda^T (db/dp - dA/dp x)
+			sensitivity = 0j
+			for index, derivative in b_derivative_dict[element_symbol]:
+				sensitivity += adjoint_values[index] * derivative
+			for (i, j), derivative in a_derivative_dict[element_symbol]:
+				sensitivity -= adjoint_values[i] * derivative * x_values[j]
+
+			if not is_complex:
+				sensitivity = sensitivity.real
+
+			if normalized:
+				if x_values[output_index] != 0:
+					sensitivity = sensitivity * symbol_value_dict[element_symbol] / x_values[output_index]
+				else:
+					# if output value is 0, normalized sensitivity is N/A
+					sensitivity = "N/A"
+
+			sensitivity_dict[output_variable][element_symbol] = sensitivity
+
+	if print_info:
+		print(sensitivity_dict)
+
+	return sensitivity_dict
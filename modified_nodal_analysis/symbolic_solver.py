@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the exact symbolic solution of the Modified Nodal Analysis system A x = b, returning each variable as a
+rational function of the component symbols and the Laplace variable s.
+
+The system is solved by fraction-free (Bareiss) elimination on the sparse rows of A, choosing the pivots by the
+Markowitz criterion to keep the fill-in low, and fraction-free back substitution. All the divisions are exact
+polynomial divisions on sparse multivariate polynomials, so that expressions do not grow as with generic rational
+Gaussian elimination. Solutions are cached per netlist structure (A and b matrices).
+
+The expanded solution has as many terms as the determinant of A, which grows exponentially with the size of the
+circuit (for instance, spanning trees of the circuit graph), so that no method can expand it for large circuits. For
+a fully symbolic RC ladder, the determinant has 89 terms with 6 nodes, 610 with 8 nodes and 1597 with 9 nodes (about
+2.6 times more for each node), which takes 0.1 s, 1.2 s and 10 s. Fully symbolic circuits larger than about 9 nodes
+require the nested solution or replacing part of the symbols by their values (symbol_value_dict).
+
+The nested solution (nested=True) does not expand the expressions: it is obtained by sparse rational elimination
+with the same pivot order, where each entry of the eliminated matrix is simplified (cancel) and replaced by a new
+symbol when it grows, and by back substitution. The solution is returned as a list of replacements (symbol,
+expression), in evaluation order, and the expression of each variable, in the same format as the common subexpression
+elimination (cse) of SymPy. Its size grows with the fill-in of the elimination, not with the number of terms of the
+determinant, so that circuits with tens of nodes are solved in seconds.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+from sympy import ImmutableMatrix, sympify, together, fraction, cancel, cse, diff, lcm_list, count_ops, \
+	numbered_symbols, Rational, ZZ, QQ
+from sympy.polys.rings import ring
+from sympy.polys.polyerrors import ExactQuotientFailed, CoercionFailed
+
+# Solutions already calculated, key is the netlist structure (A and b matrices) and the type of solution
+symbolic_solution_cache = {}
+
+# Maximum number of operations of an entry of the nested solution, larger entries are replaced by a new symbol
+NESTED_MAX_OPERATIONS = 16
+
+
+def get_polynomial_rows(a_matrix, b_matrix, gens):
+	"""
+	This function returns the rows of the augmented matrix [A | b] as dictionaries {column: polynomial} with only the
+	nonzero entries. Each row is multiplied by the lcm of the denominators of its entries (for instance, 1/R of the
+	conductance stamps), which does not change the solution of the system.
+	:param a_matrix: A matrix (symbolic)
+	:param b_matrix: b matrix (list of symbolic expressions)
+	:param gens: symbols of the system (generators of the polynomials)
+	:return: list of rows (b is stored as column len(b_matrix)) and polynomial ring of the entries
+	"""
+
+	dimension = len(b_matrix)
+	scaled_rows = []
+	for i in range(dimension):
+		entries = {j: together(a_matrix[i, j]) for j in range(dimension) if a_matrix[i, j] != 0}
+		if b_matrix[i] != 0:
+			entries[dimension] = together(b_matrix[i])
+
+		denominator = lcm_list([fraction(expr)[1] for expr in entries.values()], *gens)
+		scaled_rows.append({j: cancel(expr * denominator) for j, expr in entries.items()})
+
+	# Sparse polynomial ring, with integer coefficients if possible
+	try:
+		polynomial_ring = ring(gens, ZZ)[0]
+		rows = [{j: polynomial_ring.from_expr(expr) for j, expr in row.items()} for row in scaled_rows]
+	except CoercionFailed:
+		polynomial_ring = ring(gens, QQ)[0]
+		rows = [{j: polynomial_ring.from_expr(expr) for j, expr in row.items()} for row in scaled_rows]
+
+	return rows, polynomial_ring
+
+
+def get_markowitz_pivot(rows, active_rows, active_columns, entry_size=len):
+	"""
+	This function selects the pivot with the minimum Markowitz cost (r - 1) * (c - 1), where r and c are the number of
+	nonzero entries in the row and column of the pivot. Ties are broken by the size of the pivot.
+	:param rows: rows of the augmented matrix
+	:param active_rows: rows not eliminated yet
+	:param active_columns: columns not eliminated yet
+	:param entry_size: function which returns the size of an entry (by default, number of terms of the polynomial)
+	:return: row and column of the pivot
+	"""
+
+	column_count = {column: 0 for column in active_columns}
+	for i in active_rows:
+		for j in rows[i]:
+			if j in column_count:
+				column_count[j] += 1
+
+	best_pivot = None
+	best_cost = None
+	for i in active_rows:
+		row_count = sum(1 for j in rows[i] if j in column_count)
+		for j, entry in rows[i].items():
+			if j in column_count:
+				cost = ((row_count - 1) * (column_count[j] - 1), entry_size(entry))
+				if best_cost is None or cost < best_cost:
+					best_cost = cost
+					best_pivot = (i, j)
+
+	if best_pivot is None:
+		raise Exception("A matrix is singular")
+
+	return best_pivot
+
+
+def exact_quotient(numerator, denominator):
+	"""
+	This function returns the exact polynomial quotient numerator / denominator
+	:param numerator: polynomial
+	:param denominator: polynomial
+	:return: polynomial
+	"""
+
+	try:
+		return numerator.exquo(denominator)
+	except ExactQuotientFailed:
+		raise Exception("Fraction-free elimination failed: division is not exact")
+
+
+def get_fraction_free_solution(a_matrix, b_matrix, gens):
+	"""
+	This function solves A x = b by sparse fraction-free (Bareiss) elimination and fraction-free back substitution.
+	In Bareiss elimination, a row without entry in the pivot column is only scaled by pivot / previous pivot. This
+	scaling is applied lazily: each row keeps the pivot of the step it was last updated, and it is brought up to date
+	(multiplied by the current pivot and divided by that one) only when the row has to be combined with a pivot row.
+	:param a_matrix: A matrix (symbolic)
+	:param b_matrix: b matrix (list of symbolic expressions)
+	:param gens: symbols of the system
+	:return: list of numerators (polynomials) of each variable and the common denominator (polynomial, determinant of
+	the scaled A)
+	"""
+
+	dimension = len(b_matrix)
+	rows, polynomial_ring = get_polynomial_rows(a_matrix, b_matrix, gens)
+
+	active_rows = set(range(dimension))
+	active_columns = set(range(dimension))
+	pivot_rows = []     # (column of the pivot, row) in elimination order
+	previous_pivot = polynomial_ring.one
+	row_scale = {i: polynomial_ring.one for i in range(dimension)}     # pivot of the last update of each row
+
+	while active_rows:
+		pivot_row_index, pivot_column = get_markowitz_pivot(rows, active_rows, active_columns)
+		active_rows.remove(pivot_row_index)
+		active_columns.remove(pivot_column)
+
+		pivot_row = rows[pivot_row_index]
+		if row_scale[pivot_row_index] != previous_pivot:
+			pivot_row = {j: exact_quotient(entry * previous_pivot, row_scale[pivot_row_index])
+			             for j, entry in pivot_row.items()}
+		pivot = pivot_row[pivot_column]
+
+		# Bareiss update: a_ij = (p * a_ij - a_ic * a_rj) / previous pivot, for the rows with entry in pivot column
+		for i in active_rows:
+			row = rows[i]
+			if pivot_column not in row:
+				continue
+			if row_scale[i] != previous_pivot:
+				row = {j: exact_quotient(entry * previous_pivot, row_scale[i]) for j, entry in row.items()}
+			factor = row.pop(pivot_column)
+			new_row = {}
+			for j in set(row) | set(pivot_row):
+				if j == pivot_column:
+					continue
+				entry = pivot * row[j] if j in row else polynomial_ring.zero
+				if j in pivot_row:
+					entry = entry - factor * pivot_row[j]
+				if entry:
+					new_row[j] = exact_quotient(entry, previous_pivot)
+			rows[i] = new_row
+			row_scale[i] = pivot
+
+		pivot_rows.append((pivot_column, pivot_row))
+		previous_pivot = pivot
+
+	# The last pivot is the determinant of the (row scaled) A matrix
+	determinant = previous_pivot
+
+	# Fraction-free back substitution: N_c = (det * b_r - sum(a_rj * N_j)) / p, where x_j = N_j / det
+	numerators = [None] * dimension
+	for pivot_column, pivot_row in reversed(pivot_rows):
+		entry = determinant * pivot_row[dimension] if dimension in pivot_row else polynomial_ring.zero
+		for j, a_entry in pivot_row.items():
+			if j != pivot_column and j != dimension:
+				entry = entry - a_entry * numerators[j]
+		numerators[pivot_column] = exact_quotient(entry, pivot_row[pivot_column])
+
+	return numerators, determinant
+
+
+def get_nested_entry(expr, replacements, intermediate_symbols):
+	"""
+	This function simplifies an entry of the nested solution and replaces it by a new symbol if it is still large
+	:param expr: expression of the entry
+	:param replacements: list of replacements (symbol, expression), the new one is appended
+	:param intermediate_symbols: generator of the new symbols
+	:return: expression or symbol of the entry
+	"""
+
+	expr = cancel(expr)
+	if count_ops(expr) <= NESTED_MAX_OPERATIONS:
+		return expr
+
+	symbol = next(intermediate_symbols)
+	replacements.append((symbol, expr))
+
+	return symbol
+
+
+def get_nested_solution(a_matrix, b_matrix, gens):
+	"""
+	This function solves A x = b by sparse rational elimination and back substitution without expanding the
+	expressions (see nested solution above)
+	:param a_matrix: A matrix (symbolic)
+	:param b_matrix: b matrix (list of symbolic expressions)
+	:param gens: symbols of the system (the new symbols are different from them)
+	:return: list of replacements (symbol, expression) in evaluation order and list of expressions of each variable
+	"""
+
+	dimension = len(b_matrix)
+	rows = []
+	for i in range(dimension):
+		rows.append({j: a_matrix[i, j] for j in range(dimension) if a_matrix[i, j] != 0})
+		if b_matrix[i] != 0:
+			rows[i][dimension] = b_matrix[i]
+
+	replacements = []
+	intermediate_symbols = numbered_symbols("t", exclude=gens)
+	active_rows = set(range(dimension))
+	active_columns = set(range(dimension))
+	pivot_rows = []     # (column of the pivot, row) in elimination order
+	while active_rows:
+		pivot_row_index, pivot_column = get_markowitz_pivot(rows, active_rows, active_columns, entry_size=count_ops)
+		active_rows.remove(pivot_row_index)
+		active_columns.remove(pivot_column)
+		pivot_row = rows[pivot_row_index]
+		pivot = pivot_row[pivot_column]
+
+		# Rational update: a_ij = a_ij - a_ic * a_rj / p, for the rows with entry in pivot column
+		for i in active_rows:
+			row = rows[i]
+			if pivot_column not in row:
+				continue
+			factor = get_nested_entry(row.pop(pivot_column) / pivot, replacements, intermediate_symbols)
+			for j, pivot_entry in pivot_row.items():
+				if j == pivot_column:
+					continue
+				entry = get_nested_entry(row.get(j, 0) - factor * pivot_entry, replacements, intermediate_symbols)
+				if entry == 0:
+					row.pop(j, None)
+				else:
+					row[j] = entry
+
+		pivot_rows.append((pivot_column, pivot_row))
+
+	solution = [None] * dimension
+	for pivot_column, pivot_row in reversed(pivot_rows):
+		entry = pivot_row.get(dimension, 0)
+		for j, a_entry in pivot_row.items():
+			if j != pivot_column and j != dimension:
+				entry = entry - a_entry * solution[j]
+		solution[pivot_column] = get_nested_entry(entry / pivot_row[pivot_column], replacements, intermediate_symbols)
+
+	return replacements, solution
+
+
+def get_symbolic_solution(a_matrix, b_matrix, x_matrix, symbol_value_dict=None, use_cache=True, nested=False,
+                          print_info=False):
+	"""
+	This function returns the exact symbolic solution of A x = b (Modified Nodal Analysis) as rational functions of
+	the component symbols and s
+	:param a_matrix: A matrix (symbolic) returned by Modified Nodal Analysis
+	:param b_matrix: b matrix (symbolic, called z_matrix in MnaMatrixGenerator) returned by Modified Nodal Analysis
+	:param x_matrix: x matrix (list of variables in symbolic format)
+	:param symbol_value_dict: dictionary with the values of the symbols to be replaced by their (exact) values before
+	solving. The size of the fully symbolic solution grows exponentially with the number of components (see above), so
+	that keeping symbolic only the components of interest (and s) reduces the solving time of large circuits. By
+	default, all the symbols are kept
+	:param use_cache: True to reuse the solution of a netlist with the same structure (A and b matrices)
+	:param nested: True to return the nested solution (see above), which is not expanded and scales to large circuits
+	:param print_info: True or False
+	:return: it returns a dictionary with the rational function of each variable:
+	Example:
+	{V1: V1, V2: R2*V1/(R1 + R2), I_V1: -V1/(R1 + R2)}
+	With nested=True, it returns the list of replacements (symbol, expression) and that dictionary, whose expressions
+	depend on the symbols of the replacements (see get_expanded_solution)
+	"""
+
+	b_matrix = [sympify(expr) for expr in b_matrix]
+	if symbol_value_dict:
+		rational_value_dict = {symbol: Rational(str(value)) for symbol, value in symbol_value_dict.items()}
+		a_matrix = a_matrix.subs(rational_value_dict)
+		b_matrix = [expr.subs(rational_value_dict) for expr in b_matrix]
+
+	cache_key = (ImmutableMatrix(a_matrix), tuple(b_matrix), nested)
+	if use_cache and cache_key in symbolic_solution_cache:
+		replacements, solution = symbolic_solution_cache[cache_key]
+		solution_dict = dict(zip(x_matrix, solution))
+		return (list(replacements), solution_dict) if nested else solution_dict
+
+	gens = set(ImmutableMatrix(a_matrix).free_symbols)
+	for expr in b_matrix:
+		gens |= expr.free_symbols
+	gens = sorted(gens, key=str)
+
+	if nested:
+		replacements, solution = get_nested_solution(a_matrix, b_matrix, gens)
+	else:
+		replacements = []
+		numerators, determinant = get_fraction_free_solution(a_matrix, b_matrix, gens)
+
+		solution = []
+		for numerator in numerators:
+			# common factors of numerator and determinant are removed
+			common_factor = numerator.gcd(determinant)
+			solution.append(exact_quotient(numerator, common_factor).as_expr(*gens) /
+			                exact_quotient(determinant, common_factor).as_expr(*gens))
+
+	if use_cache:
+		symbolic_solution_cache[cache_key] = (tuple(replacements), tuple(solution))
+
+	solution_dict = dict(zip(x_matrix, solution))
+	if print_info:
+		if nested:
+			print(replacements)
+		print(solution_dict)
+
+	return (replacements, solution_dict) if nested else solution_dict
+
+
+def get_expanded_solution(replacements, solution_dict):
+	"""
+	This function replaces the symbols of the nested solution by their expressions and simplifies the rational
+	function of each variable (only for small circuits, see above)
+	:param replacements: list of replacements (symbol, expression) returned by get_symbolic_solution (nested=True)
+	:param solution_dict: dictionary returned by get_symbolic_solution (nested=True)
+	:return: dictionary with the rational function of each variable
+	"""
+
+	expressions = {}
+	for symbol, expr in replacements:
+		expressions[symbol] = cancel(expr.xreplace(expressions))
+
+	return {variable: cancel(expr.xreplace(expressions)) for variable, expr in solution_dict.items()}
+
+
+def get_common_subexpressions(solution_dict):
+	"""
+	This function extracts the common subexpressions of the symbolic solutions (for instance, the determinant shared by
+	all the denominators), so that all the variables can be evaluated without repeating operations
+	:param solution_dict: dictionary returned by get_symbolic_solution
+	:return: list of replacements (symbol, subexpression) and dictionary with the reduced expression of each variable
+	"""
+
+	variables = list(solution_dict.keys())
+	replacements, reduced_expressions = cse([solution_dict[variable] for variable in variables])
+
+	return replacements, dict(zip(variables, reduced_expressions))
+
+
+def get_transfer_function(solution_dict, output_variable, input_symbol, replacements=None):
+	"""
+	This function returns the transfer function H(s) = output / input, as the system is linear in the sources
+	:param solution_dict: dictionary returned by get_symbolic_solution
+	:param output_variable: variable of x matrix (for instance, V2)
+	:param input_symbol: symbol of the source (for instance, V1 or I1)
+	:param replacements: list of replacements of the nested solution (None if the solution is not nested)
+	:return: transfer function (symbolic). For the nested solution, the list of replacements (the ones of the solution
+	and the ones of the derivatives) and the transfer function
+	"""
+
+	if replacements is None:
+		return cancel(diff(solution_dict[output_variable], input_symbol))
+
+	# Chain rule through the replacements: each symbol which depends on the input gets a new symbol for its derivative
+	transfer_replacements = list(replacements)
+	gens = {input_symbol}
+	for symbol, expr in replacements:
+		gens |= expr.free_symbols | {symbol}
+	for expr in solution_dict.values():
+		gens |= expr.free_symbols
+	derivative_symbols = numbered_symbols("dt", exclude=gens)
+	derivatives = {input_symbol: 1}
+
+	def get_derivative(expr):
+		return cancel(sum(diff(expr, symbol) * derivatives[symbol] for symbol in expr.free_symbols
+		                  if symbol in derivatives))
+
+	for symbol, expr in replacements:
+		derivative = get_derivative(expr)
+		if derivative != 0:
+			derivatives[symbol] = next(derivative_symbols)
+			transfer_replacements.append((derivatives[symbol], derivative))
+
+	return transfer_replacements, get_derivative(solution_dict[output_variable])
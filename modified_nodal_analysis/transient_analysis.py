@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with transient (time domain) analysis of the circuit described by Modified Nodal Analysis.
+
+In time domain, A(s) = A0 + s * A1 turns into A0 x + A1 dx/dt = b(t). Capacitors and inductors are replaced by their
+companion models (Backward Euler: Geq = C/h, Req = L/h; Trapezoidal: Geq = 2C/h, Req = 2L/h), which in matrix form is:
+	Backward Euler: (A0 + A1/h) x[n+1] = b[n+1] + (A1/h) x[n]
+	Trapezoidal:    (A0 + 2*A1/h) x[n+1] = b[n+1] + b[n] + (2*A1/h - A0) x[n]
+With a fixed step size h, the matrix of the left side is constant, so it is factorized once and every step only
+requires the update of the right side and the triangular solves.
+
+The rows of A1 which are zero are algebraic equations (A0 x = b, i.e. sources and resistive KCL). If the initial value
+of x does not satisfy them (for instance, x = 0 with a voltage source), the trapezoidal rule keeps the error of x[0] in
+every later step (the solution oscillates around the right one). In that case, x[0] is replaced by the consistent one
+with the same charges and fluxes (A1 x) which satisfies the algebraic equations. If there is not such a value (for
+instance, a capacitor in parallel with a voltage source), the first step is solved with Backward Euler, which only uses
+x[0] through the capacitors and inductors, and the trapezoidal rule is used from there on.
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from modified_nodal_analysis.mna_numeric import get_numeric_a_b_s_terms
+from qubo_formulation.qubo_formulation import get_qubo_matrix
+from helpers.variables import get_encoding_matrix, get_encoded_qubits
+from helpers.constants import TransientMethod
+
+
+def get_companion_matrices(a0_matrix, a1_matrix, time_step, transient_method):
+	"""
+	This function returns the matrices of the companion model system for the selected integration method
+	:param a0_matrix: A0 matrix (NumPy), terms of A(s) independent of s
+	:param a1_matrix: A1 matrix (NumPy), terms of A(s) multiplied by s
+	:param time_step: step size h in seconds
+	:param transient_method: integration method (BACKWARD_EULER or TRAPEZOIDAL)
+	:return: matrix of the left side (constant) and matrix which multiplies x[n] in the right side
+	"""
+
+	if transient_method == TransientMethod.BACKWARD_EULER:
+		a_step_matrix = a0_matrix + a1_matrix / time_step
+		x_step_matrix = a1_matrix / time_step
+	elif transient_method == TransientMethod.TRAPEZOIDAL:
+		a_step_matrix = a0_matrix + 2 * a1_matrix / time_step
+		x_step_matrix = 2 * a1_matrix / time_step - a0_matrix
+	else:
+		raise Exception("Transient method not valid : {}".format(transient_method))
+
+	return a_step_matrix, x_step_matrix
+
+
+def get_initial_condition(a0_matrix, b_matrix, initial_condition):
+	"""
+	This function returns the initial value of x
+	:param a0_matrix: A0 matrix (NumPy)
+	:param b_matrix: b matrix at t = 0 (NumPy)
+	:param initial_condition: None (all capacitors and inductors discharged, x = 0), "DC" (operating point, A0 x = b)
+	or list/array with the value of each variable
+	:return: NumPy array with the initial value of x
+	"""
+
+	if initial_condition is None:
+		return np.zeros(len(b_matrix))
+	if isinstance(initial_condition, str) and initial_condition == "DC":
+		return np.linalg.solve(a0_matrix, b_matrix)
+	return np.asarray(initial_condition, dtype=float)
+
+
+def is_consistent_initial_condition(a0_matrix, a1_matrix, b_matrix, x_matrix):
+	"""
+	This function checks if the initial value of x satisfies the algebraic equations of the system (rows of A1 which are
+	zero, their equations do not depend on the derivative of x)
+	:param a0_matrix: A0 matrix (NumPy)
+	:param a1_matrix: A1 matrix (NumPy)
+	:param b_matrix: b matrix at t = 0 (NumPy)
+	:param x_matrix: initial value of x (NumPy)
+	:return: True if the algebraic equations are satisfied
+	"""
+
+	algebraic_rows = ~np.any(a1_matrix != 0, axis=1)
+	residual = a0_matrix[algebraic_rows] @ x_matrix - b_matrix[algebraic_rows]
+	tolerance = 1e-9 * max(np.abs(b_matrix).max(initial=0.0), np.abs(a0_matrix).max(initial=0.0) *
+	                       np.abs(x_matrix).max(initial=0.0), 1.0)
+
+	return bool(np.all(np.abs(residual) <= tolerance))
+
+
+def get_consistent_initial_condition(a0_matrix, a1_matrix, b_matrix, x_matrix):
+	"""
+	This function returns the initial value of x which satisfies the algebraic equations of the system and keeps the
+	charges and fluxes (A1 x) of the initial value provided
+	:param a0_matrix: A0 matrix (NumPy)
+	:param a1_matrix: A1 matrix (NumPy)
+	:param b_matrix: b matrix at t = 0 (NumPy)
+	:param x_matrix: initial value of x (NumPy)
+	:return: NumPy array with the consistent initial value of x (None if there is not such a value)
+	"""
+
+	algebraic_rows = ~np.any(a1_matrix != 0, axis=1)
+	consistent_matrix = np.vstack((a0_matrix[algebraic_rows], a1_matrix[~algebraic_rows]))
+	consistent_b_matrix = np.concatenate((b_matrix[algebraic_rows], a1_matrix[~algebraic_rows] @ x_matrix))
+	consistent_x_matrix = np.linalg.lstsq(consistent_matrix, consistent_b_matrix, rcond=None)[0]
+
+	if not is_consistent_initial_condition(a0_matrix, a1_matrix, b_matrix, consistent_x_matrix) or \
+			not np.allclose(a1_matrix @ consistent_x_matrix, a1_matrix @ x_matrix):
+		return None
+
+	return consistent_x_matrix
+
+
+def get_transient_solution(mna_matrix_gen, time_step, number_of_steps, transient_method=TransientMethod.TRAPEZOIDAL,
+                           initial_condition=None, b_function=None, method=None, num_qubits_dict=None,
+                           qubo_sampler=None, print_info=False):
+	"""
+	This function performs the transient analysis of a circuit already processed by MnaMatrixGenerator
+	(get_a_b_x_matrix). The matrix of the companion model system is factorized only once.
+	Optionally (method provided), each step is formulated as a QUBO problem. All the QUBO matrices share the same
+	quadratic terms (they only depend on the constant matrix of the left side), so that only the linear terms are
+	updated in each step and the sampler is warm-started from the solution of the previous step.
+	:param mna_matrix_gen: MnaMatrixGenerator object, once get_a_b_x_matrix has been called
+	:param time_step: step size h in seconds
+	:param number_of_steps: number of steps
+	:param transient_method: integration method (BACKWARD_EULER or TRAPEZOIDAL)
+	:param initial_condition: None (x = 0), "DC" (operating point) or list/array with the value of each variable. If
+	it does not satisfy the algebraic equations, it is replaced by the consistent one or the first step is solved with
+	Backward Euler (see above)
+	:param b_function: function of time which returns the b matrix (NumPy) at that time. By default, b is constant
+	(values of the sources in the netlist, i.e. step response when initial_condition is None)
+	:param method: QUBO method (METHOD_WITHOUT_SIGN or METHOD_WITH_SIGN). If None, steps are solved classically
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable
+	(only for QUBO steps)
+	:param qubo_sampler: function (qubo_matrix, initial_state) which returns the qubit values (NumPy array) of the
+	solution of the QUBO, starting from initial_state (only for QUBO steps). By default, D-Wave Simulator warm-started
+	from the previous step (get_dwave_warm_started_sample)
+	:param print_info: True or False
+	:return: it returns a dictionary with the time values, the solution x of each step and the evolution of each
+	variable of x matrix with this format:
+	Example:
+	{'time': array([...]), 'x': array([[...]]), V1: array([...]), V2: array([...]), etc
+	"""
+
+	a0_matrix, a1_matrix, b_matrix = get_numeric_a_b_s_terms(mna_matrix_gen)
+	list_of_variables = mna_matrix_gen.x_matrix
+	time_values = time_step * np.arange(number_of_steps + 1)
+
+	if b_function is None:
+		b_values = np.broadcast_to(b_matrix, (number_of_steps + 1, len(b_matrix)))
+	else:
+		b_values = np.array([b_function(time_value) for time_value in time_values], dtype=float)
+
+	a_step_matrix, x_step_matrix = get_companion_matrices(a0_matrix, a1_matrix, time_step, transient_method)
+	# Right side of each step without the term of x[n], it is calculated for all the steps at once
+	if transient_method == TransientMethod.TRAPEZOIDAL:
+		b_step_values = b_values[1:] + b_values[:-1]
+	else:
+		b_step_values = b_values[1:]
+
+	x_values = np.empty((number_of_steps + 1, len(b_matrix)))
+	x_values[0] = get_initial_condition(a0_matrix, b_values[0], initial_condition)
+
+	# Consistent x[0] or first step solved with Backward Euler when x[0] does not satisfy the algebraic equations
+	first_step = 0
+	a_first_step_matrix = x_first_step_matrix = None
+	if transient_method == TransientMethod.TRAPEZOIDAL and \
+			not is_consistent_initial_condition(a0_matrix, a1_matrix, b_values[0], x_values[0]):
+		consistent_x_matrix = get_consistent_initial_condition(a0_matrix, a1_matrix, b_values[0], x_values[0])
+		if consistent_x_matrix is not None:
+			x_values[0] = consistent_x_matrix
+		elif number_of_steps > 0:
+			a_first_step_matrix, x_first_step_matrix = get_companion_matrices(a0_matrix, a1_matrix, time_step,
+			                                                                  TransientMethod.BACKWARD_EULER)
+			first_step = 1
+
+	if method is None:
+		if first_step:
+			x_values[1] = np.linalg.solve(a_first_step_matrix, b_values[1] + x_first_step_matrix @ x_values[0])
+		# Factorization is done only once, each step is a forward and backward triangular solve
+		lu_piv = lu_factor(a_step_matrix, check_finite=False)
+		for step in range(first_step, number_of_steps):
+			x_values[step + 1] = lu_solve(lu_piv, b_step_values[step] + x_step_matrix @ x_values[step],
+			                             check_finite=False)
+	else:
+		if qubo_sampler is None:
+			from dwave_tools.dwave_tools import get_dwave_warm_started_sample
+			qubo_sampler = get_dwave_warm_started_sample
+
+		# Quadratic terms (and the linear terms which only depend on A) are shared by all the steps, b = 0
+		qubo_quadratic_matrix = get_qubo_matrix(method, list_of_variables, num_qubits_dict, a_step_matrix,
+		                                        np.zeros(len(b_matrix)))
+		encoding_matrix = get_encoding_matrix(list_of_variables, method, num_qubits_dict)
+		# The linear terms of each step are -2 E^T A^T b
+		linear_term_matrix = -2 * encoding_matrix.T @ a_step_matrix.T
+		diagonal_index = np.diag_indices(len(qubo_quadratic_matrix))
+
+		qubit_values = get_encoded_qubits(list_of_variables, method, num_qubits_dict, x_values[0])
+		x_values[0] = encoding_matrix @ qubit_values
+		if first_step:
+			# Only the first step has its own QUBO matrix (Backward Euler matrix of the left side)
+			qubit_values = qubo_sampler(get_qubo_matrix(method, list_of_variables, num_qubits_dict, a_first_step_matrix,
+			                                            b_values[1] + x_first_step_matrix @ x_values[0]), qubit_values)
+			x_values[1] = encoding_matrix @ qubit_values
+		for step in range(first_step, number_of_steps):
+			qubo_matrix = qubo_quadratic_matrix.copy()
+			qubo_matrix[diagonal_index] += linear_term_matrix @ (b_step_values[step] + x_step_matrix @ x_values[step])
+			qubit_values = qubo_sampler(qubo_matrix, qubit_values)
+			x_values[step + 1] = encoding_matrix @ qubit_values
+
+	transient_dict = {"time": time_values, "x": x_values}
+	for variable_index, variable in enumerate(list_of_variables):
+		transient_dict[variable] = x_values[:, variable_index]
+
+	if print_info:
+		print(transient_dict)
+
+	return transient_dict
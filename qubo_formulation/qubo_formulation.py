@@ -19,6 +19,8 @@ https://arxiv.org/abs/2106.10819
 
 # Import Libraries
 import numpy as np
+from sympy import Symbol
+from scipy.sparse import issparse, triu
 from helpers.constants import LinearCircuitSolver
 
 
@@ -268,4 +270,117 @@ def get_qubo_matrix_with_sign_method(list_of_variables, num_qubits_dict, a_matri
 	return qubo_matrix
 
 
+def get_complex_list_of_variables(list_of_variables, num_qubits_dict):
+	"""
+	This function splits each complex (phasor) variable in its real and imaginary parts, which are encoded as two
+	independent real variables with the same number of qubits as the original variable
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable
+	:return: list of variables of the real equivalent system (real parts first, then imaginary parts) and its
+	dictionary with the number of qubits for integer and fractional parts of each variable
+	"""
+
+	real_list_of_variables = [Symbol("re_" + str(variable)) for variable in list_of_variables]
+	imag_list_of_variables = [Symbol("im_" + str(variable)) for variable in list_of_variables]
+
+	complex_num_qubits_dict = {}
+	for variable, real_variable, imag_variable in zip(list_of_variables, real_list_of_variables,
+	                                                  imag_list_of_variables):
+		complex_num_qubits_dict[real_variable] = dict(num_qubits_dict[variable])
+		complex_num_qubits_dict[imag_variable] = dict(num_qubits_dict[variable])
+
+	return real_list_of_variables + imag_list_of_variables, complex_num_qubits_dict
+
+
+def get_real_equivalent_system(a_matrix, b_matrix):
+	"""
+	This function returns the real equivalent system (2n x 2n) of a complex system A x = b (n x n):
+	[[Re(A), -Im(A)], [Im(A), Re(A)]] [Re(x), Im(x)] = [Re(b), Im(b)]
+	:param a_matrix: complex A matrix (for instance, A(s) of Modified Nodal Analysis evaluated at s = j*w)
+	:param b_matrix: complex b matrix
+	:return: real A and b matrices of the equivalent system
+	"""
+
+	a_matrix = np.asarray(a_matrix, dtype=complex)
+	b_matrix = np.asarray(b_matrix, dtype=complex)
+
+	real_a_matrix = np.block([[a_matrix.real, -a_matrix.imag], [a_matrix.imag, a_matrix.real]])
+	real_b_matrix = np.concatenate([b_matrix.real, b_matrix.imag])
+
+	return real_a_matrix, real_b_matrix
+
+
+def get_complex_qubo_matrix(method, list_of_variables, num_qubits_dict, a_matrix, b_matrix):
+	"""
+	This function builds the QUBO matrix of a complex system (AC phasor analysis). Real and imaginary parts of each
+	variable are encoded separately, building the real equivalent system and calling get_qubo_matrix with the selected
+	method
+	:param method: Method 1 or same number of qubits for positive and negative values, Method 2 or one qubit for the
+	sign and the rest of qubits for absolute value
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable.
+	Currently, the same number of qubits for all variables
+	:param a_matrix: complex A matrix
+	:param b_matrix: complex b matrix
+	:return: QUBO matrix, list of variables of the real equivalent system and its dictionary with number of qubits (to
+	be used in get_qubits_per_variable and get_results)
+	"""
+
+	complex_list_of_variables, complex_num_qubits_dict = get_complex_list_of_variables(list_of_variables,
+	                                                                                   num_qubits_dict)
+	real_a_matrix, real_b_matrix = get_real_equivalent_system(a_matrix, b_matrix)
+
+	qubo_matrix = get_qubo_matrix(method, complex_list_of_variables, complex_num_qubits_dict, real_a_matrix,
+	                              real_b_matrix)
+
+	return qubo_matrix, complex_list_of_variables, complex_num_qubits_dict
+
+
+def get_complex_qubo_matrix_batch(method, list_of_variables, num_qubits_dict, a0_matrix, a1_matrix, b_matrix,
+                                  frequencies):
+	"""
+	This function builds the QUBO matrices of A(s) x = b (A(s) = A0 + s * A1) at s = j*2*pi*f for each frequency. All
+	the QUBO matrices share the same qubit layout, so the same list of variables and number of qubits are used for all
+	of them
+	:param method: Method 1 (METHOD_WITHOUT_SIGN) or Method 2 (METHOD_WITH_SIGN)
+	:param list_of_variables: list of variables in symbolic format (x matrix)
+	:param num_qubits_dict: dictionary with the number of qubits for integer and fractional parts of each variable.
+	:param a0_matrix: A0 matrix (NumPy), terms of A(s) independent of s
+	:param a1_matrix: A1 matrix (NumPy), terms of A(s) multiplied by s
+	:param b_matrix: b matrix (NumPy)
+	:param frequencies: list of frequencies in Hz
+	:return: list of QUBO matrices (one per frequency), list of variables of the real equivalent system and its
+	dictionary with number of qubits
+	"""
+
+	complex_list_of_variables, complex_num_qubits_dict = get_complex_list_of_variables(list_of_variables,
+	                                                                                   num_qubits_dict)
+	qubo_matrix_list = []
+	for frequency in frequencies:
+		a_matrix = np.asarray(a0_matrix) + 2j * np.pi * frequency * np.asarray(a1_matrix)
+		real_a_matrix, real_b_matrix = get_real_equivalent_system(a_matrix, b_matrix)
+		qubo_matrix_list.append(get_qubo_matrix(method, complex_list_of_variables, complex_num_qubits_dict,
+		                                        real_a_matrix, real_b_matrix))
+
+	return qubo_matrix_list, complex_list_of_variables, complex_num_qubits_dict
+
+
+def get_qubo_terms(qubo_matrix):
+	"""
+	This function returns the terms to program in the annealer solvers (linear terms and nonzero quadratic terms of the
+	upper triangle of the QUBO matrix), without going through all the pairs of qubits
+	:param qubo_matrix: QUBO matrix (NumPy or SciPy sparse)
+	:return: NumPy array with linear terms (diagonal) and NumPy arrays with the rows, columns (row < column) and values
+	of the quadratic terms
+	"""
+
+	if issparse(qubo_matrix):
+		linear = np.asarray(qubo_matrix.diagonal(), dtype=float)
+		quadratic = triu(qubo_matrix, k=1).tocoo()
+		nonzero = quadratic.data != 0
+		return linear, quadratic.row[nonzero], quadratic.col[nonzero], np.asarray(quadratic.data[nonzero], dtype=float)
+
+	qubo_matrix = np.asarray(qubo_matrix, dtype=float)
+	rows, columns = np.nonzero(np.triu(qubo_matrix, k=1))
 
+	return np.diagonal(qubo_matrix).copy(), rows, columns, qubo_matrix[rows, columns]
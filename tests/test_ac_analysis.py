@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the AC analysis (frequency sweep)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import numpy as np
+import pytest
+from sympy import Symbol, sqrt
+from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
+from modified_nodal_analysis.mna_numeric import get_numeric_a_b_s_terms
+from modified_nodal_analysis.ac_analysis import get_ac_solution, get_ac_sweep
+
+# RLC circuit with coupled inductors (transformer loaded by a parallel RC)
+RLC_NETLIST = "V1 1 0 1\nR1 1 2 50\nL1 2 0 1e-3\nL2 3 0 4e-3\nK1 L1 L2 0.9\nC1 3 0 1e-6\nR2 3 0 100\n.end\n"
+FREQUENCIES = np.logspace(1, 6, 101)
+
+
+@pytest.fixture
+def rlc_circuit(tmp_path):
+	"""
+	This fixture returns the MnaMatrixGenerator object of the RLC circuit with coupled inductors
+	"""
+
+	netlist_filename = tmp_path / "rlc.net"
+	netlist_filename.write_text(RLC_NETLIST)
+	mna_matrix_gen = MnaMatrixGenerator()
+	with contextlib.redirect_stdout(io.StringIO()):
+		mna_matrix_gen.get_a_b_x_matrix(str(netlist_filename))
+
+	return mna_matrix_gen
+
+
+def get_reference_solution(mna_matrix_gen, frequencies):
+	"""
+	This function solves the circuit at each frequency with NumPy, substituting s = j*2*pi*f in the symbolic A matrix
+	(the mutual inductance is M1 = K1 * sqrt(L1 * L2))
+	"""
+
+	symbol_value_dict = dict(mna_matrix_gen.get_symbol_value_dict())
+	symbol_value_dict[Symbol("M1")] = 0.9 * sqrt(1e-3 * 4e-3)
+	a_matrix = mna_matrix_gen.a_matrix.subs(symbol_value_dict)
+	b_matrix = np.array([complex(expr.subs(symbol_value_dict)) for expr in mna_matrix_gen.z_matrix])
+
+	return np.array([np.linalg.solve(np.asarray(a_matrix.subs(mna_matrix_gen.s, 2j * np.pi * frequency),
+	                                            dtype=complex), b_matrix)
+	                 for frequency in frequencies])
+
+
+@pytest.mark.parametrize("sparse, chunk_size", [(False, 1024), (False, 16), (True, 1024)])
+def test_ac_solution_matches_solution_of_each_frequency(rlc_circuit, sparse, chunk_size):
+	"""
+	The dense batches (also split in several chunks) and the sparse LU with reused ordering solve every frequency as
+	an independent dense solve
+	"""
+
+	a0_matrix, a1_matrix, b_matrix = get_numeric_a_b_s_terms(rlc_circuit)
+	x_values = get_ac_solution(a0_matrix, a1_matrix, b_matrix, FREQUENCIES, sparse=sparse, chunk_size=chunk_size)
+	reference_values = get_reference_solution(rlc_circuit, FREQUENCIES)
+
+	assert x_values.shape == (len(FREQUENCIES), len(rlc_circuit.x_matrix))
+	assert np.max(np.abs(x_values - reference_values) / np.max(np.abs(reference_values), axis=0)) < 1e-12
+
+
+def test_ac_sweep_magnitude_and_phase(rlc_circuit):
+	"""
+	The magnitude and phase of each variable are the ones of the complex solution, and the source node is fixed by the
+	source (1 V, phase 0)
+	"""
+
+	ac_sweep_dict = get_ac_sweep(rlc_circuit, FREQUENCIES, sparse=True)
+	v1, v3 = Symbol("V1"), Symbol("V3")
+	v3_values = ac_sweep_dict["x"][:, rlc_circuit.x_matrix.index(v3)]
+
+	assert np.allclose(ac_sweep_dict[v1]["magnitude"], 1.0) and np.allclose(ac_sweep_dict[v1]["phase"], 0.0)
+	assert np.allclose(ac_sweep_dict[v3]["magnitude"], np.abs(v3_values))
+	assert np.allclose(ac_sweep_dict[v3]["magnitude_db"], 20 * np.log10(np.abs(v3_values)))
+	assert np.allclose(ac_sweep_dict[v3]["phase"], np.angle(v3_values, deg=True))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the anytime execution (time budget) of the local solvers
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import numpy as np
+from helpers.anytime import get_response_info, is_partial_response
+from helpers.constants import AnnealerSolution
+from helpers.linear_solver import get_solution
+
+
+def get_random_qubo_matrix(number_qubits, seed=0):
+	"""
+	This function returns a dense upper triangular QUBO matrix with random coefficients
+	"""
+
+	return np.triu(np.random.default_rng(seed).normal(size=(number_qubits, number_qubits)))
+
+
+def test_small_budget_returns_partial_response():
+	"""
+	When the time budget expires before all the reads are solved, the merged response of the solved chunks is returned
+	as partial result, with fewer reads than requested
+	"""
+
+	num_reads = 100000
+	response = get_solution(AnnealerSolution.LOCAL_SA, 16, get_random_qubo_matrix(16), num_reads, local_seed=0,
+	                        time_budget_s=0.2)
+	anytime_info = get_response_info(response)["anytime"]
+
+	assert is_partial_response(response) is True
+	assert anytime_info["requested_reads"] == num_reads
+	assert 0 < anytime_info["reads"] < num_reads
+	assert response["num_occurrences"].sum() == anytime_info["reads"]
+
+
+def test_generous_budget_returns_complete_response():
+	"""
+	When all the reads are solved within the time budget, the response is not partial
+	"""
+
+	num_reads = 20
+	response = get_solution(AnnealerSolution.LOCAL_SA, 8, get_random_qubo_matrix(8), num_reads, local_seed=0,
+	                        time_budget_s=60)
+	anytime_info = get_response_info(response)["anytime"]
+
+	assert is_partial_response(response) is False
+	assert anytime_info["partial"] is False
+	assert anytime_info["reads"] == num_reads
+	assert response["num_occurrences"].sum() == num_reads
+
+
+def test_parallel_parts_with_budget_are_merged():
+	"""
+	With several workers, each part of the reads is solved with the time budget and the information of the parts is
+	merged: reads and chunks are added, and the response is partial if any part is partial
+	"""
+
+	num_reads = 100000
+	response = get_solution(AnnealerSolution.LOCAL_SA, 16, get_random_qubo_matrix(16), num_reads, num_workers=2,
+	                        local_seed=0, time_budget_s=0.5)
+	anytime_info = get_response_info(response)["anytime"]
+
+	assert is_partial_response(response) is True
+	assert anytime_info["requested_reads"] == num_reads
+	assert anytime_info["chunks"] >= 2
+	assert 0 < anytime_info["reads"] < num_reads
+	assert response["num_occurrences"].sum() == anytime_info["reads"]
+
+	complete_response = get_solution(AnnealerSolution.LOCAL_SA, 8, get_random_qubo_matrix(8), 20, num_workers=2,
+	                                 local_seed=0, time_budget_s=60)
+	assert is_partial_response(complete_response) is False
+	assert get_response_info(complete_response)["anytime"]["reads"] == 20
+	assert complete_response["num_occurrences"].sum() == 20
+
+
+def test_exact_solver_with_budget_returns_partial_response():
+	"""
+	The exact solver stops the enumeration when the time budget expires: the reads of its anytime information are the
+	enumerated states, fewer than all the states of the QUBO matrix, and the best states found so far are returned
+	"""
+
+	number_qubits = 28
+	response = get_solution(AnnealerSolution.LOCAL_EXACT, number_qubits, get_random_qubo_matrix(number_qubits), 5,
+	                        local_max_workers=1, time_budget_s=0.2)
+	anytime_info = get_response_info(response)["anytime"]
+
+	assert is_partial_response(response) is True
+	assert anytime_info["requested_reads"] == 2 ** number_qubits
+	assert 0 < anytime_info["reads"] < 2 ** number_qubits
+	assert len(response["energies"]) == 5
+	assert np.all(np.diff(response["energies"]) >= 0)
+
+	complete_response = get_solution(AnnealerSolution.LOCAL_EXACT, 10, get_random_qubo_matrix(10), 5,
+	                                 local_max_workers=1, time_budget_s=60)
+	assert is_partial_response(complete_response) is False
+	assert get_response_info(complete_response)["anytime"]["reads"] == 2 ** 10
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the classical solver (CLASSICAL), baseline of the annealer solvers
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from sympy import Symbol
+from helpers.classical_solver import get_error_wrt_classical_solution
+from helpers.constants import AnnealerSolution, ClassicalSolver, LinearCircuitSolver
+from helpers.linear_solver import get_solution, get_results
+from helpers.variables import get_qubits_per_variable
+from qubo_formulation.qubo_formulation import get_qubo_matrix
+
+A_MATRIX = np.array([[2.0, -1.0], [-1.0, 2.0]])
+X_MATRIX = [Symbol("V1"), Symbol("V2")]
+METHOD = LinearCircuitSolver.Method.METHOD_WITH_SIGN
+NUM_QUBITS_DICT = {variable: {"INTEGER": 2, "FRACTIONAL": 0} for variable in X_MATRIX}
+
+
+def get_classical_results(b_matrix, solver, sparse=False):
+	"""
+	This function solves the 2x2 system with CLASSICAL and returns the response and its results
+	"""
+
+	_, number_qubits_used = get_qubits_per_variable(X_MATRIX, METHOD, NUM_QUBITS_DICT)
+	response = get_solution(AnnealerSolution.CLASSICAL, number_qubits_used, None, 1,
+	                        a_matrix=csr_matrix(A_MATRIX) if sparse else A_MATRIX, b_matrix=b_matrix,
+	                        classical_solver_type=solver)
+
+	return response, get_results(AnnealerSolution.CLASSICAL, X_MATRIX, METHOD, response, NUM_QUBITS_DICT)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+@pytest.mark.parametrize("solver", [ClassicalSolver.DIRECT, ClassicalSolver.ITERATIVE])
+def test_classical_solution_is_the_ground_state(solver, sparse):
+	"""
+	The classical solution of a system whose solution is representable with the qubits of each variable (V1 = 1,
+	V2 = 2) has the energy of the ground state of the QUBO, found by LOCAL_EXACT
+	"""
+
+	b_matrix = np.array([0.0, 3.0])
+	response, data = get_classical_results(b_matrix, solver, sparse)
+
+	_, number_qubits_used = get_qubits_per_variable(X_MATRIX, METHOD, NUM_QUBITS_DICT)
+	with contextlib.redirect_stdout(io.StringIO()):
+		qubo_matrix = get_qubo_matrix(METHOD, X_MATRIX, NUM_QUBITS_DICT, A_MATRIX, b_matrix)
+	exact_response = get_solution(AnnealerSolution.LOCAL_EXACT, number_qubits_used,
+	                              np.asarray(qubo_matrix, dtype=float), 1)
+	exact_data = get_results(AnnealerSolution.LOCAL_EXACT, X_MATRIX, METHOD, exact_response, NUM_QUBITS_DICT)
+
+	assert np.allclose(response["solution"], [1.0, 2.0])
+	assert response["info"]["solver"] == solver
+	assert response["info"]["residual"] < 1e-9
+	assert data["result_1"][X_MATRIX[0]] == 1 and data["result_1"][X_MATRIX[1]] == 2
+	assert data["result_1"]["energy"] == -9.0
+	assert data["result_1"]["energy"] == exact_data["result_1"]["energy"]
+
+
+@pytest.mark.parametrize("solver", [ClassicalSolver.DIRECT, ClassicalSolver.ITERATIVE])
+def test_error_wrt_classical_solution(solver):
+	"""
+	The classical solution of a system whose solution is not representable (V1 = 5/3, V2 = 7/3) is quantized to the
+	closest values, and the error of a result is measured with respect to the exact solution
+	"""
+
+	b_matrix = np.array([1.0, 3.0])
+	response, data = get_classical_results(b_matrix, solver)
+	quantized_values = np.array([data["result_1"][variable] for variable in X_MATRIX], dtype=float)
+	residual = A_MATRIX @ quantized_values - b_matrix
+
+	assert np.allclose(response["solution"], [5 / 3, 7 / 3])
+	assert np.array_equal(quantized_values, [2.0, 2.0])
+	assert np.isclose(data["result_1"]["energy"], residual @ residual - b_matrix @ b_matrix)
+
+	comparison = get_error_wrt_classical_solution(data_dict=data["result_1"], classical_response=response,
+	                                              list_of_variables=X_MATRIX, solver_time=1.0)
+	assert np.allclose([comparison["absolute_error"][variable] for variable in X_MATRIX], [1 / 3, -1 / 3])
+	assert np.isclose(comparison["max_absolute_error"], 1 / 3)
+	assert np.isclose(comparison["residual"], np.linalg.norm(residual))
+	assert comparison["time_ratio"] > 0
+
+
+def test_invalid_classical_solver():
+	"""
+	A classical solver which is not DIRECT or ITERATIVE is rejected
+	"""
+
+	with pytest.raises(Exception, match="Classical solver not valid"):
+		get_classical_results(np.array([0.0, 3.0]), "CHOLESKY")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the QUBO formulation of complex systems (AC phasor analysis)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import numpy as np
+from sympy import Symbol
+from helpers.constants import AnnealerSolution, LinearCircuitSolver
+from helpers.linear_solver import get_solution, get_results, get_complex_results
+from helpers.variables import get_qubits_per_variable
+from qubo_formulation.qubo_formulation import get_complex_qubo_matrix, get_complex_qubo_matrix_batch
+
+X_MATRIX = [Symbol("V1"), Symbol("V2")]
+METHOD = LinearCircuitSolver.Method.METHOD_WITH_SIGN
+NUM_QUBITS_DICT = {variable: {"INTEGER": 1, "FRACTIONAL": 1} for variable in X_MATRIX}
+# A(s) = A0 + s * A1, evaluated at s = j (frequency 1 / (2 * pi))
+A0_MATRIX = np.array([[2.0, -1.0], [-1.0, 2.0]])
+A1_MATRIX = np.array([[1.0, 0.0], [0.0, -0.5]])
+A_MATRIX = A0_MATRIX + 1j * A1_MATRIX
+PHASORS = np.array([1 + 0.5j, -0.5 + 1j])
+B_MATRIX = A_MATRIX @ PHASORS
+
+
+def get_exact_complex_results(qubo_matrix, complex_list_of_variables, complex_num_qubits_dict):
+	"""
+	This function solves the QUBO matrix of a complex system with LOCAL_EXACT and returns the complex results
+	"""
+
+	_, number_qubits_used = get_qubits_per_variable(complex_list_of_variables, METHOD, complex_num_qubits_dict)
+	response = get_solution(AnnealerSolution.LOCAL_EXACT, number_qubits_used, np.asarray(qubo_matrix, dtype=float), 3)
+	data = get_results(AnnealerSolution.LOCAL_EXACT, complex_list_of_variables, METHOD, response,
+	                   complex_num_qubits_dict)
+
+	return get_complex_results(data, X_MATRIX)
+
+
+def test_complex_system_decodes_to_phasors():
+	"""
+	Real and imaginary parts of each variable are encoded separately, and the ground state of the QUBO matrix decodes
+	to the exact phasors, with energy -norm(b)^2
+	"""
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		qubo_matrix, complex_list_of_variables, complex_num_qubits_dict = \
+			get_complex_qubo_matrix(METHOD, X_MATRIX, NUM_QUBITS_DICT, A_MATRIX, B_MATRIX)
+	complex_data = get_exact_complex_results(qubo_matrix, complex_list_of_variables, complex_num_qubits_dict)
+
+	assert sorted(map(str, complex_list_of_variables)) == ["im_V1", "im_V2", "re_V1", "re_V2"]
+	assert complex_data["result_1"][X_MATRIX[0]] == 1 + 0.5j
+	assert complex_data["result_1"][X_MATRIX[1]] == -0.5 + 1j
+	assert np.isclose(complex_data["result_1"]["energy"], -np.vdot(B_MATRIX, B_MATRIX).real)
+	assert complex_data["result_2"]["energy"] > complex_data["result_1"]["energy"]
+
+
+def test_complex_qubo_matrix_batch():
+	"""
+	The QUBO matrices of the frequency sweep are the ones of A(s) at each frequency, with the same qubit layout
+	"""
+
+	frequencies = [0.0, 1 / (2 * np.pi)]
+	with contextlib.redirect_stdout(io.StringIO()):
+		qubo_matrix_list, complex_list_of_variables, complex_num_qubits_dict = \
+			get_complex_qubo_matrix_batch(METHOD, X_MATRIX, NUM_QUBITS_DICT, A0_MATRIX, A1_MATRIX, B_MATRIX,
+			                              frequencies)
+		expected_qubo_matrices = [get_complex_qubo_matrix(METHOD, X_MATRIX, NUM_QUBITS_DICT,
+		                                                  A0_MATRIX + 2j * np.pi * frequency * A1_MATRIX, B_MATRIX)
+		                          for frequency in frequencies]
+
+	assert len(qubo_matrix_list) == len(frequencies)
+	for qubo_matrix, (expected_qubo_matrix, expected_list_of_variables, _) in zip(qubo_matrix_list,
+	                                                                               expected_qubo_matrices):
+		assert complex_list_of_variables == expected_list_of_variables
+		assert np.allclose(np.asarray(qubo_matrix, dtype=float), np.asarray(expected_qubo_matrix, dtype=float))
+
+	complex_data = get_exact_complex_results(qubo_matrix_list[1], complex_list_of_variables, complex_num_qubits_dict)
+	assert [complex_data["result_1"][variable] for variable in X_MATRIX] == PHASORS.tolist()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the D-Wave path (embedding cache, chain strength, sampler pool and asynchronous submission),
+run offline with the local stand-ins of the remote solvers (see use_mock_samplers)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import time
+import numpy as np
+import pytest
+from sympy import Symbol
+from helpers.async_solver import solve_jobs
+from helpers.constants import AnnealerSolution, LinearCircuitSolver
+from helpers.variables import get_qubits_per_variable
+from qubo_formulation.qubo_formulation import get_qubo_matrix
+
+dwave_tools = pytest.importorskip("dwave_tools.dwave_tools")
+
+
+@pytest.fixture
+def mock_samplers():
+	"""
+	This fixture replaces the remote D-Wave solvers by local stand-ins and restores the samplers and caches afterwards
+	"""
+
+	sampler_factories = dict(dwave_tools.sampler_factories)
+	dwave_tools.close_sampler_pool()
+	dwave_tools.embedding_cache.clear()
+	dwave_tools.use_mock_samplers()
+	yield
+	dwave_tools.close_sampler_pool()
+	dwave_tools.embedding_cache.clear()
+	dwave_tools.sampler_factories.update(sampler_factories)
+
+
+def get_random_qubo_matrix(number_qubits, seed=0):
+	"""
+	This function returns a dense upper triangular QUBO matrix with random coefficients
+	"""
+
+	return np.triu(np.random.default_rng(seed).normal(size=(number_qubits, number_qubits)))
+
+
+def test_embedding_cache_hit(mock_samplers, tmp_path, monkeypatch):
+	"""
+	The embedding of a sparsity pattern is found once; QUBO matrices with the same pattern reuse it, from memory and
+	from the cache directory
+	"""
+
+	qpu = dwave_tools.get_pooled_sampler(AnnealerSolution.DWAVE_QPU)
+	qubo = dwave_tools.get_qubo_dict(6, get_random_qubo_matrix(6))
+	embedding = dwave_tools.get_embedding(qubo=qubo, target_edgelist=qpu["target_edgelist"], cache_directory=tmp_path,
+	                                      topology_hash=qpu["topology_hash"])
+	assert len(list(tmp_path.glob("*.json"))) == 1
+
+	def find_embedding(*args, **kwargs):
+		raise AssertionError("minorminer must not run for a cached sparsity pattern")
+
+	monkeypatch.setattr(dwave_tools, "find_embedding", find_embedding)
+	same_pattern_qubo = dwave_tools.get_qubo_dict(6, 2 * get_random_qubo_matrix(6))
+	assert dwave_tools.get_embedding(qubo=same_pattern_qubo, target_edgelist=qpu["target_edgelist"],
+	                                 cache_directory=tmp_path, topology_hash=qpu["topology_hash"]) == embedding
+
+	dwave_tools.embedding_cache.clear()
+	assert dwave_tools.get_embedding(qubo=same_pattern_qubo, target_edgelist=qpu["target_edgelist"],
+	                                 cache_directory=tmp_path, topology_hash=qpu["topology_hash"]) == embedding
+
+
+def test_chain_strength_retry(mock_samplers, tmp_path):
+	"""
+	The QUBO is submitted again with a stronger chain strength while the broken chains exceed the threshold (a negative
+	threshold is always exceeded), at most chain_strength_retries times. The chain break report is keyed to the samples
+	of the aggregated response
+	"""
+
+	response = dwave_tools.get_dwave_solution(AnnealerSolution.DWAVE_QPU, 12, get_random_qubo_matrix(12), num_reads=50,
+	                                          chain_strength=0.5, embedding_cache_directory=tmp_path,
+	                                          chain_break_threshold=-1, chain_strength_retries=2,
+	                                          chain_strength_factor=2)
+	report = response.info["chain_breaks"]
+
+	assert [attempt["chain_strength"] for attempt in report["attempts"]] == [0.5, 1.0, 2.0]
+	assert len(report["per_sample"]) == len(response)
+	assert np.allclose(report["per_sample"], response.record.chain_break_fraction)
+	assert np.isclose(report["per_sample"] @ response.record.num_occurrences / 50, report["total"])
+
+
+def test_mock_samplers_replace_remote_solvers(mock_samplers, tmp_path):
+	"""
+	The Hybrid Solver and the QPU are solved by the local stand-ins, without D-Wave token
+	"""
+
+	assert not isinstance(dwave_tools.get_pooled_sampler(AnnealerSolution.DWAVE_QPU)["sampler"],
+	                      dwave_tools.DWaveSampler)
+	qubo_matrix = get_random_qubo_matrix(4)
+	hybrid_response = dwave_tools.get_dwave_solution(AnnealerSolution.DWAVE_HYBRID_SOLVER, 4, qubo_matrix)
+	qpu_response = dwave_tools.get_dwave_solution(AnnealerSolution.DWAVE_QPU, 4, qubo_matrix, num_reads=20,
+	                                              embedding_cache_directory=tmp_path)
+
+	assert len(hybrid_response) == 1
+	assert sum(qpu_response.record.num_occurrences) == 20
+	assert np.isclose(hybrid_response.first.energy, qpu_response.first.energy)
+
+
+def test_pooled_sampler_is_reused(mock_samplers):
+	"""
+	The sampler of a solver and configuration is created once and reused, until its factory is replaced
+	"""
+
+	pooled_sampler = dwave_tools.get_pooled_sampler(AnnealerSolution.DWAVE_HYBRID_SOLVER)
+	assert dwave_tools.get_pooled_sampler(AnnealerSolution.DWAVE_HYBRID_SOLVER) is pooled_sampler
+	assert dwave_tools.get_pooled_sampler(AnnealerSolution.DWAVE_HYBRID_SOLVER, {"num_reads": 5}) is not pooled_sampler
+
+	dwave_tools.use_mock_samplers()
+	assert dwave_tools.get_pooled_sampler(AnnealerSolution.DWAVE_HYBRID_SOLVER) is not pooled_sampler
+
+
+def test_solve_jobs_overlaps_latency(mock_samplers, tmp_path, monkeypatch):
+	"""
+	Jobs of remote solvers are solved concurrently: with the latency of D-Wave cloud simulated by the stand-ins, a batch
+	takes about the latency of one job instead of the sum of all of them
+	"""
+
+	latency_s = 0.5
+	dwave_tools.use_mock_samplers(latency_s=latency_s)
+	# The embedding cache is written in the default directory (relative to the working directory)
+	monkeypatch.chdir(tmp_path)
+	x_matrix = [Symbol("V1"), Symbol("V2")]
+	method = LinearCircuitSolver.Method.METHOD_WITH_SIGN
+	num_qubits_dict = {variable: {"INTEGER": 2, "FRACTIONAL": 0} for variable in x_matrix}
+	_, number_qubits_used = get_qubits_per_variable(x_matrix, method, num_qubits_dict)
+	with contextlib.redirect_stdout(io.StringIO()):
+		qubo_matrix = get_qubo_matrix(method, x_matrix, num_qubits_dict, np.array([[2.0, -1.0], [-1.0, 2.0]]),
+		                              np.array([0.0, 3.0]))
+	jobs = [{"annealer_solution": annealer_solution, "number_qubits_used": number_qubits_used,
+	         "qubo_matrix": qubo_matrix, "num_reads": 20, "x_matrix": x_matrix, "method": method,
+	         "num_qubits_dict": num_qubits_dict}
+	        for annealer_solution in [AnnealerSolution.DWAVE_HYBRID_SOLVER, AnnealerSolution.DWAVE_QPU] * 3]
+	# The samplers (and the embedding) are created before the batch, so that only the latency is measured
+	with contextlib.redirect_stdout(io.StringIO()):
+		solve_jobs(jobs[:2], max_in_flight=2)
+		time_start = time.perf_counter()
+		results = solve_jobs(jobs, max_in_flight=len(jobs))
+	elapsed_time = time.perf_counter() - time_start
+
+	assert elapsed_time < len(jobs) * latency_s / 2
+	for data in results:
+		assert data["result_1"][x_matrix[0]] == 1 and data["result_1"][x_matrix[1]] == 2
+
+
+def test_chain_strength_is_settled_in_first_chunk(mock_samplers, tmp_path):
+	"""
+	With time budget, the chain strength is adjusted in the first chunk (several reads) and kept without retries in the
+	next chunks
+	"""
+
+	response = dwave_tools.get_dwave_solution(AnnealerSolution.DWAVE_QPU, 12, get_random_qubo_matrix(12), num_reads=200,
+	                                          chain_strength=0.5, embedding_cache_directory=tmp_path,
+	                                          chain_break_threshold=-1, chain_strength_retries=2,
+	                                          chain_strength_factor=2, time_budget_s=5)
+	attempts = response.info["chain_breaks"]["attempts"]
+	anytime_info = response.info["anytime"]
+
+	assert anytime_info["chunks"] > 1
+	assert [attempt["chain_strength"] for attempt in attempts[:3]] == [0.5, 1.0, 2.0]
+	assert [attempt["chain_strength"] for attempt in attempts[3:]] == [2.0] * (anytime_info["chunks"] - 1)
+	assert sum(response.record.num_occurrences) == anytime_info["reads"]
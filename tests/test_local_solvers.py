@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the local solvers (only NumPy/SciPy)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from helpers.constants import AnnealerSolution
+from helpers.linear_solver import get_solution
+from helpers.solver_backends import get_solver_backend
+from local_tools.local_tools import DigitalAnnealerSolution, get_merged_da_response
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Local solvers compared with the brute force ground state, with their specific parameters
+LOCAL_SOLVERS = [(AnnealerSolution.LOCAL_SA, {}), (AnnealerSolution.LOCAL_PT, {}), (AnnealerSolution.LOCAL_TABU, {}),
+                 (AnnealerSolution.LOCAL_DA, {}), (AnnealerSolution.LOCAL_EXACT, {}),
+                 (AnnealerSolution.DECOMPOSITION, {"decomposition_subproblem_size": 4}),
+                 (AnnealerSolution.DECOMPOSITION, {"decomposition_subproblem_size": 4,
+                                                   "decomposition_sub_solution": AnnealerSolution.LOCAL_SA,
+                                                   "decomposition_sub_num_reads": 4, "local_num_sweeps": 100})]
+
+# Solves and decodes a small system with LOCAL_DA and prints the modules of the remote solvers which were imported
+LOCAL_DA_SCRIPT = """
+import contextlib, io, sys
+import numpy as np
+from sympy import Symbol
+from helpers.linear_solver import get_solution, get_results
+from helpers.constants import AnnealerSolution, LinearCircuitSolver
+from helpers.variables import get_qubits_per_variable
+from qubo_formulation.qubo_formulation import get_qubo_matrix
+
+x_matrix = [Symbol("V1"), Symbol("V2")]
+method = LinearCircuitSolver.Method.METHOD_WITH_SIGN
+num_qubits_dict = {variable: {"INTEGER": 2, "FRACTIONAL": 0} for variable in x_matrix}
+_, number_qubits_used = get_qubits_per_variable(x_matrix, method, num_qubits_dict)
+with contextlib.redirect_stdout(io.StringIO()):
+    qubo_matrix = get_qubo_matrix(method, x_matrix, num_qubits_dict, np.array([[2.0, -1.0], [-1.0, 2.0]]),
+                                  np.array([0.0, 3.0]))
+response = get_solution(AnnealerSolution.LOCAL_DA, number_qubits_used, np.asarray(qubo_matrix, dtype=float), 20,
+                        local_seed=0)
+data = get_results(AnnealerSolution.LOCAL_DA, x_matrix, method, response, num_qubits_dict)
+assert data["result_1"][x_matrix[0]] == 1 and data["result_1"][x_matrix[1]] == 2, data["result_1"]
+print(sorted(module for module in sys.modules if module.split(".")[0] in ("dadk", "fujitsu_tools", "dwave", "dimod")))
+"""
+
+
+def get_brute_force_ground_energy(qubo_matrix):
+	"""
+	This function returns the minimum energy of the QUBO matrix, evaluating all the states
+	"""
+
+	number_qubits = len(qubo_matrix)
+	states = (np.arange(2 ** number_qubits)[:, None] >> np.arange(number_qubits)) & 1
+
+	return np.einsum("si,ij,sj->s", states, qubo_matrix, states).min()
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+@pytest.mark.parametrize("annealer_solution, solver_parameters", LOCAL_SOLVERS)
+def test_local_solver_finds_ground_state(annealer_solution, solver_parameters, sparse):
+	"""
+	The local solvers find the brute force ground state of small random QUBO matrices, and the energy of each sample
+	is its QUBO energy
+	"""
+
+	backend = get_solver_backend(annealer_solution)
+	for seed in range(3):
+		qubo_matrix = np.triu(np.random.default_rng(seed).normal(size=(10, 10)))
+		response = get_solution(annealer_solution, 10, csr_matrix(qubo_matrix) if sparse else qubo_matrix, 20,
+		                        local_seed=seed, **solver_parameters)
+		samples_dict = backend.get_samples(response)
+		samples = samples_dict["samples"].astype(float)
+
+		assert np.isclose(samples_dict["energies"].min(), get_brute_force_ground_energy(qubo_matrix))
+		assert np.allclose(samples_dict["energies"], np.einsum("si,ij,sj->s", samples, qubo_matrix, samples))
+
+
+def test_local_da_does_not_import_remote_solvers():
+	"""
+	LOCAL_DA is solved and decoded through local_tools, without importing Fujitsu DADK or D-Wave Ocean SDK (a new
+	interpreter is used, so that the modules imported by other tests are not counted)
+	"""
+
+	result = subprocess.run([sys.executable, "-c", LOCAL_DA_SCRIPT], cwd=REPOSITORY_DIRECTORY, capture_output=True,
+	                        text=True)
+
+	assert result.returncode == 0, result.stderr
+	assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_merged_da_response_displays_graphs_of_each_response():
+	"""
+	The merged response of the Digital Annealer keeps the merged responses, so that the graphs of Fujitsu responses
+	(for instance, the chunks solved with time budget) are still displayed
+	"""
+
+	displayed = []
+
+	class FujitsuSolutionList:
+		def __init__(self, name, configuration):
+			self.name = name
+			self.solutions = [DigitalAnnealerSolution(configuration, -1.0, 2)]
+
+		def display_graphs(self):
+			displayed.append(self.name)
+
+	responses = [FujitsuSolutionList("chunk_1", [1, 0]), FujitsuSolutionList("chunk_2", [1, 0])]
+	response = get_merged_da_response(responses)
+	response.display_graphs()
+
+	assert displayed == ["chunk_1", "chunk_2"]
+	assert [solution.frequency for solution in response.solutions] == [4]
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+@pytest.mark.parametrize("annealer_solution", [AnnealerSolution.LOCAL_SA, AnnealerSolution.LOCAL_TABU,
+                                               AnnealerSolution.LOCAL_DA])
+def test_parallel_reads_are_merged_and_reproducible(annealer_solution, sparse):
+	"""
+	With several workers, the parts of the reads (sparse QUBO matrices are shared in CSR format) are merged into one
+	response with all the reads, and the response is reproducible for a fixed local_seed
+	"""
+
+	backend = get_solver_backend(annealer_solution)
+	qubo_matrix = np.triu(np.random.default_rng(0).normal(size=(12, 12)))
+	qubo_matrix[np.abs(qubo_matrix) < 0.8] = 0
+	samples_dicts = [backend.get_samples(get_solution(annealer_solution, 12,
+	                                                  csr_matrix(qubo_matrix) if sparse else qubo_matrix, 50,
+	                                                  num_workers=3, local_seed=3))
+	                 for _ in range(2)]
+
+	assert samples_dicts[0]["num_occurrences"].sum() == 50
+	for key in ["samples", "energies", "num_occurrences"]:
+		assert np.array_equal(samples_dicts[0][key], samples_dicts[1][key])
+	assert np.isclose(samples_dicts[0]["energies"].min(), get_brute_force_ground_energy(qubo_matrix))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the portfolio solver (race of local solvers on a small system)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import numpy as np
+import pytest
+from sympy import Symbol
+from helpers.anytime import is_partial_response
+from helpers.constants import AnnealerSolution, LinearCircuitSolver
+from helpers.linear_solver import get_solution, get_results
+from helpers.variables import get_qubits_per_variable
+from qubo_formulation.qubo_formulation import get_qubo_matrix
+
+A_MATRIX = np.array([[2.0, -1.0], [-1.0, 2.0]])
+B_MATRIX = np.array([0.0, 3.0])
+MEMBERS = [AnnealerSolution.LOCAL_SA, AnnealerSolution.LOCAL_TABU]
+
+
+@pytest.fixture(scope="module")
+def system():
+	"""
+	This fixture returns the variables, method, number of qubits and QUBO matrix of a 2x2 system (solution V1 = 1,
+	V2 = 2)
+	"""
+
+	x_matrix = [Symbol("V1"), Symbol("V2")]
+	method = LinearCircuitSolver.Method.METHOD_WITH_SIGN
+	num_qubits_dict = {variable: {"INTEGER": 2, "FRACTIONAL": 0} for variable in x_matrix}
+	_, number_qubits_used = get_qubits_per_variable(x_matrix, method, num_qubits_dict)
+	with contextlib.redirect_stdout(io.StringIO()):
+		qubo_matrix = get_qubo_matrix(method, x_matrix, num_qubits_dict, A_MATRIX, B_MATRIX)
+
+	return x_matrix, method, num_qubits_dict, number_qubits_used, np.asarray(qubo_matrix, dtype=float)
+
+
+def get_decoded_residual(system, response):
+	"""
+	This function returns the residual norm(A x - b) of the decoded result of the winner of the portfolio
+	"""
+
+	x_matrix, method, num_qubits_dict, _, _ = system
+	with contextlib.redirect_stdout(io.StringIO()):
+		data = get_results(AnnealerSolution.PORTFOLIO, x_matrix, method, response, num_qubits_dict)
+	x_values = np.array([float(data["result_1"][variable]) for variable in x_matrix])
+
+	return np.linalg.norm(A_MATRIX @ x_values - B_MATRIX)
+
+
+def test_race_without_budget(system):
+	"""
+	Without time budget, each member runs one round and the winner is the member with the lowest energy. The residual
+	of the winner, obtained from its energy, is the one of its decoded result
+	"""
+
+	response = get_solution(AnnealerSolution.PORTFOLIO, system[3], system[4], 10, portfolio_members=MEMBERS,
+	                        b_matrix=B_MATRIX, local_seed=0)
+
+	assert [member_stats["status"] for member_stats in response["stats"]] == ["finished", "finished"]
+	assert [member_stats["rounds"] for member_stats in response["stats"]] == [1, 1]
+	assert response["energy"] == min(member_stats["best_energy"] for member_stats in response["stats"])
+	assert np.isclose(response["residual"], get_decoded_residual(system, response))
+	assert np.isclose(response["energy"], -B_MATRIX @ B_MATRIX)
+	assert is_partial_response(response) is False
+
+
+def test_race_is_over_when_target_is_reached(system):
+	"""
+	The first member which reaches the target residual wins the race and the other one is cancelled
+	"""
+
+	response = get_solution(AnnealerSolution.PORTFOLIO, system[3], system[4], 10, portfolio_members=MEMBERS,
+	                        portfolio_target_residual=1e-9, time_budget_s=20, b_matrix=B_MATRIX, local_seed=0)
+	statuses = [member_stats["status"] for member_stats in response["stats"]]
+
+	assert statuses[response["index"]] == "target"
+	assert sorted(statuses) == ["cancelled", "target"]
+	assert response["annealer_solution"] == MEMBERS[response["index"]]
+	assert response["residual"] <= 1e-9
+	assert np.isclose(response["residual"], get_decoded_residual(system, response))
+	assert response["time"] < 20
+	assert is_partial_response(response) is False
+
+
+def test_expired_budget_returns_best_so_far(system):
+	"""
+	When the time budget expires before the (unreachable) target residual, the best result so far is returned as
+	partial result
+	"""
+
+	response = get_solution(AnnealerSolution.PORTFOLIO, system[3], system[4], 10, portfolio_members=MEMBERS,
+	                        portfolio_target_residual=-1.0, time_budget_s=0.5, b_matrix=B_MATRIX, local_seed=0)
+	best_energies = [member_stats["best_energy"] for member_stats in response["stats"]]
+
+	assert is_partial_response(response) is True
+	assert response["info"]["anytime"]["time_budget_s"] == 0.5
+	assert "target" not in [member_stats["status"] for member_stats in response["stats"]]
+	assert response["energy"] == min(energy for energy in best_energies if energy is not None)
+	assert response["stats"][response["index"]]["rounds"] >= 1
+	assert np.isclose(response["residual"], get_decoded_residual(system, response))
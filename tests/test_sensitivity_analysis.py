@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the sensitivity analysis (adjoint method), compared with finite differences
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import os
+import numpy as np
+import pytest
+from sympy import Symbol
+from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
+from modified_nodal_analysis.sensitivity_analysis import get_sensitivities
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPAMP_NETLIST = "V1 1 0 1\nR1 1 2 1\nR2 2 3 2\nO1 0 2 3\n.end\n"
+
+
+def get_circuit(netlist_filename):
+	"""
+	This function returns the MnaMatrixGenerator object of a netlist
+	"""
+
+	mna_matrix_gen = MnaMatrixGenerator()
+	with contextlib.redirect_stdout(io.StringIO()):
+		mna_matrix_gen.get_a_b_x_matrix(str(netlist_filename))
+
+	return mna_matrix_gen
+
+
+def get_numeric_solution(mna_matrix_gen, symbol_value_dict):
+	"""
+	This function solves the circuit (DC operating point) with the given values of the elements
+	"""
+
+	a_matrix = np.asarray(mna_matrix_gen.a_matrix.subs(symbol_value_dict), dtype=float)
+	b_matrix = np.array([float(expr.subs(symbol_value_dict)) for expr in mna_matrix_gen.z_matrix])
+
+	return np.linalg.solve(a_matrix, b_matrix)
+
+
+@pytest.mark.parametrize("test_circuit", [3, 4])
+def test_sensitivities_match_finite_differences(test_circuit):
+	"""
+	The sensitivities of all the variables with respect to every element are the central finite differences of the
+	solution, and the normalized sensitivities are (p / y) * dy/dp (N/A if y is 0)
+	"""
+
+	mna_matrix_gen = get_circuit(os.path.join(REPOSITORY_DIRECTORY, "test_circuits",
+	                                          "test_circuit_{:d}".format(test_circuit),
+	                                          "netlist_test_circuit_{:d}.net".format(test_circuit)))
+	symbol_value_dict = mna_matrix_gen.get_symbol_value_dict()
+	x_values = get_numeric_solution(mna_matrix_gen, symbol_value_dict)
+	sensitivity_dict = get_sensitivities(mna_matrix_gen)
+	normalized_dict = get_sensitivities(mna_matrix_gen, normalized=True)
+
+	for element_symbol, value in symbol_value_dict.items():
+		step = 1e-6 * max(abs(value), 1)
+		x_plus = get_numeric_solution(mna_matrix_gen, {**symbol_value_dict, element_symbol: value + step})
+		x_minus = get_numeric_solution(mna_matrix_gen, {**symbol_value_dict, element_symbol: value - step})
+		finite_differences = (x_plus - x_minus) / (2 * step)
+		for index, variable in enumerate(mna_matrix_gen.x_matrix):
+			sensitivity = sensitivity_dict[variable][element_symbol]
+			assert isinstance(sensitivity, float)
+			assert np.isclose(sensitivity, finite_differences[index], rtol=1e-6, atol=1e-6)
+			if x_values[index] != 0:
+				assert np.isclose(normalized_dict[variable][element_symbol], sensitivity * value / x_values[index])
+			else:
+				assert normalized_dict[variable][element_symbol] == "N/A"
+
+
+def test_elements_without_value_are_not_included(tmp_path):
+	"""
+	Op amps have no numeric value, so there is no sensitivity (nor normalized sensitivity) with respect to them
+	"""
+
+	netlist_filename = tmp_path / "opamp.net"
+	netlist_filename.write_text(OPAMP_NETLIST)
+	mna_matrix_gen = get_circuit(netlist_filename)
+	v3 = Symbol("V3")
+
+	for normalized in [False, True]:
+		sensitivity_dict = get_sensitivities(mna_matrix_gen, normalized=normalized)
+		assert all(Symbol("O1") not in element_dict for element_dict in sensitivity_dict.values())
+		assert not any(isinstance(sensitivity, float) and np.isnan(sensitivity)
+		               for element_dict in sensitivity_dict.values() for sensitivity in element_dict.values())
+
+	# Inverting amplifier, V3 = -R2 / R1 * V1
+	sensitivity_dict = get_sensitivities(mna_matrix_gen, output_variables=[v3])
+	assert np.allclose([sensitivity_dict[v3][Symbol(name)] for name in ["V1", "R1", "R2"]], [-2.0, 2.0, -1.0])
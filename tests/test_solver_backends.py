@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the registry of annealer solvers (backends)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from sympy import Symbol
+from helpers.constants import AnnealerSolution, LinearCircuitSolver
+from helpers.linear_solver import get_solution, get_results
+from helpers.solver_backends import (SolverBackend, QUBO_PARAMETERS, register_solver_backend, get_solver_backend,
+                                     check_solver_parameters, get_local_samples, solver_backends)
+from helpers.variables import get_qubits_per_variable
+from qubo_formulation.qubo_formulation import get_qubo_matrix
+
+TOY_SOLUTION = "TOY"
+
+
+def get_toy_solution(total_num_qubits, qubo_matrix, num_reads=1, penalty=0.0, calls=None):
+	"""
+	This function solves the QUBO matrix by evaluating all the states and returns the num_reads lowest energy states
+	(samples format of local solvers). The penalty is added to the energies
+	"""
+
+	calls.append({"qubo_matrix": qubo_matrix, "num_reads": num_reads, "penalty": penalty})
+	states = (np.arange(2 ** total_num_qubits)[:, None] >> np.arange(total_num_qubits)) & 1
+	energies = np.einsum("si,ij,sj->s", states, qubo_matrix, states) + penalty
+	order = np.argsort(energies, kind="stable")[:num_reads]
+
+	return {"samples": states[order].astype(np.int8), "energies": energies[order],
+	        "num_occurrences": np.ones(len(order), dtype=int)}
+
+
+@pytest.fixture
+def toy_backend():
+	"""
+	This fixture registers the toy solver (with its specific parameter toy_penalty) and removes it afterwards
+	"""
+
+	calls = []
+	register_solver_backend(TOY_SOLUTION, SolverBackend(
+		solve_function=get_toy_solution, parameters=dict(QUBO_PARAMETERS, toy_penalty="penalty"),
+		get_samples=get_local_samples, fixed_parameters={"calls": calls}))
+	yield calls
+	solver_backends.pop(TOY_SOLUTION, None)
+
+
+def test_registered_backend_is_solved_and_decoded(toy_backend):
+	"""
+	A registered solver is called by get_solution with its parameters (QUBO matrix as NumPy array, as it does not accept
+	sparse input) and its response is decoded by get_results
+	"""
+
+	x_matrix = [Symbol("V1"), Symbol("V2")]
+	method = LinearCircuitSolver.Method.METHOD_WITH_SIGN
+	num_qubits_dict = {variable: {"INTEGER": 2, "FRACTIONAL": 0} for variable in x_matrix}
+	_, number_qubits_used = get_qubits_per_variable(x_matrix, method, num_qubits_dict)
+	with contextlib.redirect_stdout(io.StringIO()):
+		qubo_matrix = get_qubo_matrix(method, x_matrix, num_qubits_dict, np.array([[2.0, -1.0], [-1.0, 2.0]]),
+		                              np.array([0.0, 3.0]))
+	qubo_matrix = np.asarray(qubo_matrix, dtype=float)
+
+	response = get_solution(TOY_SOLUTION, number_qubits_used, csr_matrix(qubo_matrix), 3, toy_penalty=1.0,
+	                        local_seed=0)
+	data = get_results(TOY_SOLUTION, x_matrix, method, response, num_qubits_dict)
+
+	assert len(toy_backend) == 1
+	assert isinstance(toy_backend[0]["qubo_matrix"], np.ndarray)
+	assert np.array_equal(toy_backend[0]["qubo_matrix"], qubo_matrix)
+	assert toy_backend[0]["num_reads"] == 3 and toy_backend[0]["penalty"] == 1.0
+	assert data["result_1"][x_matrix[0]] == 1 and data["result_1"][x_matrix[1]] == 2
+	assert data["result_1"]["energy"] == -8.0
+	assert len(data) == 3
+
+
+def test_parameters_of_registered_backend_are_accepted(toy_backend):
+	"""
+	The specific parameters of a registered solver are known to check_solver_parameters only while it is registered
+	"""
+
+	check_solver_parameters({"toy_penalty": 1.0, "local_seed": 0})
+	del solver_backends[TOY_SOLUTION]
+
+	with pytest.raises(Exception, match="Solver parameter not found : toy_penalty"):
+		check_solver_parameters({"toy_penalty": 1.0})
+
+
+def test_misspelled_parameter_is_rejected():
+	"""
+	A misspelled parameter raises an exception instead of being silently ignored by the solvers
+	"""
+
+	with pytest.raises(Exception, match="Solver parameter not found : local_sed"):
+		get_solution(AnnealerSolution.LOCAL_SA, 2, np.eye(2), 1, local_sed=0)
+
+
+def test_unknown_annealer_solution_is_rejected():
+	"""
+	An annealer solution which is not registered raises an exception
+	"""
+
+	with pytest.raises(Exception, match="Annealer Solution not found : UNKNOWN"):
+		get_solver_backend("UNKNOWN")
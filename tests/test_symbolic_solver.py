@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the exact symbolic solution (expanded and nested) of the Modified Nodal Analysis system
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import time
+import numpy as np
+from sympy import Symbol, cancel, sympify
+from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
+from modified_nodal_analysis.symbolic_solver import get_symbolic_solution, get_expanded_solution, \
+	get_transfer_function
+
+
+def get_rc_ladder(tmp_path, number_of_nodes):
+	"""
+	This function returns the MnaMatrixGenerator object of a fully symbolic RC ladder
+	"""
+
+	lines = ["V1 1 0 1"]
+	for k in range(1, number_of_nodes):
+		lines += ["R{} {} {} 1".format(k, k, k + 1), "C{} {} 0 1".format(k, k + 1)]
+	netlist_filename = tmp_path / "ladder_{}.net".format(number_of_nodes)
+	netlist_filename.write_text("\n".join(lines) + "\n.end\n")
+	mna_matrix_gen = MnaMatrixGenerator()
+	with contextlib.redirect_stdout(io.StringIO()):
+		mna_matrix_gen.get_a_b_x_matrix(str(netlist_filename))
+
+	return mna_matrix_gen
+
+
+def get_random_values(mna_matrix_gen, seed=0):
+	"""
+	This function returns random values of all the symbols of the circuit (complex value of s)
+	"""
+
+	rng = np.random.default_rng(seed)
+	symbols = set(mna_matrix_gen.a_matrix.free_symbols)
+	for expr in mna_matrix_gen.z_matrix:
+		symbols |= sympify(expr).free_symbols
+	values = {symbol: rng.uniform(0.5, 2) for symbol in symbols}
+	values[mna_matrix_gen.s] = complex(rng.uniform(0.5, 2), rng.uniform(0.5, 2))
+
+	return values
+
+
+def get_numeric_solution(mna_matrix_gen, values):
+	"""
+	This function solves the numeric system (symbols replaced by their values) with NumPy
+	"""
+
+	a_matrix = np.asarray(mna_matrix_gen.a_matrix.xreplace(values), dtype=complex)
+	b_matrix = np.array([complex(sympify(expr).xreplace(values)) for expr in mna_matrix_gen.z_matrix])
+
+	return np.linalg.solve(a_matrix, b_matrix)
+
+
+def get_nested_values(replacements, solution_dict, values):
+	"""
+	This function evaluates the nested solution, evaluating the replacements in order
+	"""
+
+	values = dict(values)
+	for symbol, expr in replacements:
+		values[symbol] = complex(expr.xreplace(values))
+
+	return {variable: complex(expr.xreplace(values)) for variable, expr in solution_dict.items()}
+
+
+def test_nested_solution_is_expanded_solution(tmp_path):
+	"""
+	The nested solution (and transfer function) is the expanded one once the replacements are substituted, and both
+	are the numeric solution for random values of the symbols
+	"""
+
+	mna_matrix_gen = get_rc_ladder(tmp_path, 5)
+	solution_dict = get_symbolic_solution(mna_matrix_gen.a_matrix, mna_matrix_gen.z_matrix, mna_matrix_gen.x_matrix,
+	                                      use_cache=False)
+	replacements, nested_solution_dict = get_symbolic_solution(mna_matrix_gen.a_matrix, mna_matrix_gen.z_matrix,
+	                                                           mna_matrix_gen.x_matrix, use_cache=False, nested=True)
+	expanded_solution_dict = get_expanded_solution(replacements, nested_solution_dict)
+
+	for variable in mna_matrix_gen.x_matrix:
+		assert cancel(solution_dict[variable] - expanded_solution_dict[variable]) == 0
+
+	# Both solutions are the numeric solution for random values of the symbols
+	values = get_random_values(mna_matrix_gen)
+	nested_values = get_nested_values(replacements, nested_solution_dict, values)
+	for variable, value in zip(mna_matrix_gen.x_matrix, get_numeric_solution(mna_matrix_gen, values)):
+		assert np.isclose(complex(solution_dict[variable].xreplace(values)), value, rtol=1e-10, atol=1e-12)
+		assert np.isclose(nested_values[variable], value, rtol=1e-10, atol=1e-12)
+
+	output_variable = mna_matrix_gen.x_matrix[-2]
+	transfer_function = get_transfer_function(solution_dict, output_variable, Symbol("V1"))
+	transfer_replacements, nested_transfer_function = get_transfer_function(nested_solution_dict, output_variable,
+	                                                                        Symbol("V1"), replacements)
+	assert cancel(get_expanded_solution(transfer_replacements, {output_variable: nested_transfer_function})
+	              [output_variable] - transfer_function) == 0
+
+
+def test_nested_solution_of_large_ladder(tmp_path):
+	"""
+	The expanded solution of a fully symbolic ladder of 20 nodes has millions of terms, the nested one is linear (and
+	it is the numeric solution for random values of the symbols)
+	"""
+
+	mna_matrix_gen = get_rc_ladder(tmp_path, 20)
+	time_start = time.perf_counter()
+	replacements, solution_dict = get_symbolic_solution(mna_matrix_gen.a_matrix, mna_matrix_gen.z_matrix,
+	                                                    mna_matrix_gen.x_matrix, use_cache=False, nested=True)
+
+	assert time.perf_counter() - time_start < 10
+	assert len(replacements) < 4 * len(mna_matrix_gen.x_matrix)
+
+	for seed in range(2):
+		values = get_random_values(mna_matrix_gen, seed)
+		nested_values = get_nested_values(replacements, solution_dict, values)
+		assert np.allclose([nested_values[variable] for variable in mna_matrix_gen.x_matrix],
+		                   get_numeric_solution(mna_matrix_gen, values), rtol=1e-10, atol=1e-12)
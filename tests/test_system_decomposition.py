@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the decomposition of the system in subsystems (connected components and block triangular form)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import os
+import numpy as np
+import pytest
+from sympy import Symbol
+from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
+from helpers.system_decomposition import solve_decomposed_system, get_block_triangular_form, get_subsystem
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def solve_subsystem_exactly(a_matrix, b_matrix, list_of_variables):
+	"""
+	This function solves a subsystem with NumPy and returns the result with the format of get_results
+	"""
+
+	result_dict = dict(zip(list_of_variables, np.linalg.solve(a_matrix, b_matrix)))
+	result_dict["occurrences"] = 1
+	result_dict["energy"] = 0.0
+
+	return {"result_1": result_dict}
+
+
+def get_test_circuit_system(test_circuit):
+	"""
+	This function returns the numeric A and b matrices and the variables of a test circuit
+	"""
+
+	mna_matrix_gen = MnaMatrixGenerator()
+	with contextlib.redirect_stdout(io.StringIO()):
+		b_matrix, x_matrix, a_matrix, _, symbol_value_dict = mna_matrix_gen.get_a_b_x_matrix(
+			os.path.join(REPOSITORY_DIRECTORY, "test_circuits", "test_circuit_{:d}".format(test_circuit),
+			             "netlist_test_circuit_{:d}.net".format(test_circuit)))
+
+	return (np.asarray(a_matrix.subs(symbol_value_dict), dtype=float),
+	        np.array([float(expr.subs(symbol_value_dict)) for expr in b_matrix]), x_matrix)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+@pytest.mark.parametrize("block_triangular", [True, False])
+@pytest.mark.parametrize("test_circuit", [3, 4])
+def test_decomposed_solution_is_the_solution(test_circuit, block_triangular, max_workers):
+	"""
+	The solutions of the subsystems (blocks of block triangular form or connected components), stitched together, are
+	the solution of the whole system
+	"""
+
+	a_matrix, b_matrix, x_matrix = get_test_circuit_system(test_circuit)
+	data, block_data_list = solve_decomposed_system(a_matrix, b_matrix, x_matrix, solve_subsystem_exactly,
+	                                                block_triangular=block_triangular, max_workers=max_workers)
+
+	assert np.allclose([data["result_1"][variable] for variable in x_matrix], np.linalg.solve(a_matrix, b_matrix))
+	assert sum(len(block_data["result_1"]) - 2 for block_data in block_data_list) == len(x_matrix)
+
+
+def test_block_triangular_form_of_test_circuit():
+	"""
+	The controlled sources of test circuit 4 split the system in several blocks, each one after its dependencies
+	"""
+
+	a_matrix, _, _ = get_test_circuit_system(4)
+	blocks = get_block_triangular_form(a_matrix)
+
+	assert len(blocks) > 1
+	assert sorted(index for block in blocks for index in block["variables_index"]) == list(range(len(a_matrix)))
+	for index, block in enumerate(blocks):
+		assert all(dependency < index and blocks[dependency]["level"] < block["level"]
+		           for dependency in block["dependencies"])
+
+
+def test_coefficients_below_tolerance_are_ignored():
+	"""
+	Coefficients below the tolerance of the decomposition do not couple the subsystem to variables which are not solved
+	yet (their nan values would be moved to the b matrix)
+	"""
+
+	a_matrix = np.array([[2.0, 1e-15], [0.0, 4.0]])
+	b_matrix = np.array([2.0, 8.0])
+	x_matrix = [Symbol("V1"), Symbol("V2")]
+
+	data, _ = solve_decomposed_system(a_matrix, b_matrix, x_matrix, solve_subsystem_exactly, max_workers=1)
+
+	assert np.allclose([data["result_1"][variable] for variable in x_matrix], [1.0, 2.0])
+	with pytest.raises(Exception, match="Subsystem depends on variables not solved"):
+		get_subsystem(a_matrix, b_matrix, {"rows": [0], "variables_index": [0]}, np.full(2, np.nan), tolerance=0)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the reductions of the system (presolve, reordering and Kron reduction) and the restoration of
+the eliminated variables
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import os
+import numpy as np
+import pytest
+from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
+from helpers.system_reduction import get_presolved_system, get_reordered_system, get_kron_reduced_system, \
+	restore_reduced_variables
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_test_circuit_system(test_circuit):
+	"""
+	This function returns the numeric A and b matrices and the variables of a test circuit
+	"""
+
+	mna_matrix_gen = MnaMatrixGenerator()
+	with contextlib.redirect_stdout(io.StringIO()):
+		b_matrix, x_matrix, a_matrix, _, symbol_value_dict = mna_matrix_gen.get_a_b_x_matrix(
+			os.path.join(REPOSITORY_DIRECTORY, "test_circuits", "test_circuit_{:d}".format(test_circuit),
+			             "netlist_test_circuit_{:d}.net".format(test_circuit)))
+
+	return (np.asarray(a_matrix.subs(symbol_value_dict), dtype=float),
+	        np.array([float(expr.subs(symbol_value_dict)) for expr in b_matrix]), x_matrix)
+
+
+@pytest.mark.parametrize("test_circuit", [1, 2, 3, 4])
+def test_reductions_round_trip(test_circuit):
+	"""
+	The system is presolved, reordered and Kron reduced (one variable with nonzero diagonal, if any is left), the
+	reduced system is solved and all the variables are restored: they are the solution of the whole system, in the
+	original order (test circuits 1 and 2 are fully solved by presolve, so the next reductions receive an empty system)
+	"""
+
+	a_matrix, b_matrix, x_matrix = get_test_circuit_system(test_circuit)
+	presolved_a_matrix, presolved_b_matrix, presolved_variables, presolve_dict = \
+		get_presolved_system(a_matrix, b_matrix, x_matrix)
+	reordered_a_matrix, reordered_b_matrix, reordered_variables, reorder_dict = \
+		get_reordered_system(presolved_a_matrix, presolved_b_matrix, presolved_variables)
+	assert sorted(map(str, reordered_variables)) == sorted(map(str, presolved_variables))
+
+	eliminated_variables = [variable for index, variable in enumerate(reordered_variables)
+	                        if abs(reordered_a_matrix[index, index]) > 1e-12][:1]
+	reduced_a_matrix, reduced_b_matrix, reduced_variables, kron_dict = \
+		get_kron_reduced_system(reordered_a_matrix, reordered_b_matrix, reordered_variables, eliminated_variables)
+	assert reduced_variables == [variable for variable in reordered_variables if variable not in eliminated_variables]
+
+	result_dict = dict(zip(reduced_variables, np.linalg.solve(reduced_a_matrix, reduced_b_matrix)
+	                       if reduced_variables else []))
+	result_dict["occurrences"] = 1
+	result_dict["energy"] = 0.0
+	data = restore_reduced_variables({"result_1": result_dict}, [presolve_dict, reorder_dict, kron_dict])
+
+	assert list(data["result_1"]) == list(x_matrix) + ["occurrences", "energy"]
+	assert np.allclose([data["result_1"][variable] for variable in x_matrix], np.linalg.solve(a_matrix, b_matrix))
+	assert data["result_1"]["occurrences"] == 1 and data["result_1"]["energy"] == 0.0
+
+
+def test_reordering_of_empty_system():
+	"""
+	A system without variables is returned unchanged
+	"""
+
+	a_matrix, b_matrix, variables, reorder_dict = get_reordered_system(np.zeros((0, 0)), np.zeros(0), [])
+
+	assert a_matrix.shape == (0, 0) and b_matrix.shape == (0,) and variables == []
+	assert reorder_dict["kept_variables"] == [] and reorder_dict["list_of_variables"] == []
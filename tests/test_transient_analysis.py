@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Master's Thesis Quantum Computing in Electronics Design (Universidad Politecnica de Madrid)
+Code with the tests of the transient analysis (companion models)
+
+:author: Javier Parra Paredes
+"""
+
+# Import Libraries
+import contextlib
+import io
+import numpy as np
+import pytest
+from modified_nodal_analysis.mna_matrix_generator import MnaMatrixGenerator
+from modified_nodal_analysis.transient_analysis import get_transient_solution
+from helpers.constants import TransientMethod
+
+RC_NETLIST = "V1 1 0 1\nR1 1 2 1000\nC1 2 0 1e-6\n.end\n"
+RC_TIME_CONSTANT = 1e-3
+
+
+@pytest.fixture
+def rc_circuit(tmp_path):
+	"""
+	This fixture returns the MnaMatrixGenerator object of a RC circuit (step response of the capacitor voltage)
+	"""
+
+	netlist_filename = tmp_path / "rc.net"
+	netlist_filename.write_text(RC_NETLIST)
+	mna_matrix_gen = MnaMatrixGenerator()
+	with contextlib.redirect_stdout(io.StringIO()):
+		mna_matrix_gen.get_a_b_x_matrix(str(netlist_filename))
+
+	return mna_matrix_gen
+
+
+@pytest.mark.parametrize("transient_method, tolerance", [(TransientMethod.BACKWARD_EULER, 2e-2),
+                                                         (TransientMethod.TRAPEZOIDAL, 1e-3)])
+def test_rc_step_response(rc_circuit, transient_method, tolerance):
+	"""
+	The source voltage is constant and the capacitor voltage is 1 - exp(-t/RC), also with x = 0 as initial condition
+	(not consistent with the voltage source, see transient_analysis)
+	"""
+
+	v1, v2, i_v1 = rc_circuit.x_matrix
+	transient_dict = get_transient_solution(rc_circuit, 1e-4, 50, transient_method=transient_method)
+
+	assert np.allclose(transient_dict[v1][1:], 1.0)
+	assert np.all(transient_dict[i_v1][1:] < 0)
+	assert np.allclose(transient_dict[v2], 1 - np.exp(-transient_dict["time"] / RC_TIME_CONSTANT), atol=tolerance)